@@ -1,105 +1,226 @@
 # analyze.py — 전문가용 위험 분석 (KFI 맞춤형)
-import math
+#
+# 조회탭에서 render() 를 호출한다. 계산/그래프 생성은 조건·입력값 기준으로 캐시되어
+# 같은 조건으로 다시 그릴 때는 재계산하지 않는다.
 import numpy as np
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
 
-# =========================
-# 0) 입력/상태 확인
-# =========================
+import montecarlo
+import sensitivity
+import timing
+from engine import ALLOWABLE, GRADES, group_mean_rate, risk_grade, risk_index
+from rate_index import age_band
 
-df = st.session_state.get("filtered")
-내부식률 = st.session_state.get("내부식률")
-측정두께 = st.session_state.get("측정두께")
-사용연수_내탱크 = st.session_state.get("사용연수_내탱크")
-
-재질 = st.session_state.get("재질")
-품명 = st.session_state.get("품명")
-탱크형상 = st.session_state.get("탱크형상")
-히팅코일 = st.session_state.get("히팅코일")
-지역 = st.session_state.get("지역")
-
-if df is None:
-    st.info("조회 조건을 먼저 선택하세요.")
-    st.stop()
-if df.empty:
-    st.warning("해당 조건의 표본이 없습니다. 조건을 변경해 주세요.")
-    st.stop()
-if 내부식률 is None or 측정두께 is None:
-    st.warning("내 탱크 데이터가 없어 일부 분석을 진행할 수 없습니다.")
-    st.stop()
-
-ALLOWABLE = 3.2
 
 # =========================
-# 기본 통계
+# 캐시된 계산 (_sketches/_trends 는 해시 제외, version 으로 데이터 버전 구분)
 # =========================
+@st.cache_data(show_spinner=False, max_entries=256)
+def risk_summary(_sketches, version, cond_items, 내부식률, 측정두께):
+    """(위험지수, 등급 텍스트, 등급 색, p50, p75, p90) — 분위수는 그룹 스케치에서."""
+    조건 = dict(cond_items)
+    stats = _sketches.stats(조건)
+    mean_r = group_mean_rate(_sketches, 조건)
+    p50, p75, p90 = stats["p50"], stats["p75"], stats["p90"]
+
+    risk = float(risk_index(내부식률, 측정두께, mean_r))
+    _, grade_text, grade_color = GRADES[int(risk_grade(risk))]
+    return risk, grade_text, grade_color, p50, p75, p90
+
+
+def risk_interval(ci, 내부식률, 측정두께):
+    """평균부식률 95% 신뢰구간 → (위험지수 하한, 상한, 등급 하한 텍스트, 등급 상한 텍스트).
+    위험지수는 그룹 평균이 클수록 낮아지므로 평균 상한이 위험지수 하한이 된다."""
+    mean_lo, mean_hi = ci["mean"]
+    lo = float(risk_index(내부식률, 측정두께, mean_hi))
+    hi = float(risk_index(내부식률, 측정두께, mean_lo))
+    return lo, hi, GRADES[int(risk_grade(lo))][1], GRADES[int(risk_grade(hi))][1]
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def prediction_figure(측정두께, p50, p75, p90):
+    years = np.array([0, 5, 10, 20])
 
-df_valid = df["부식률"].astype(float).dropna()
-mean_r = max(df_valid.mean(), 0.0005)
-p50 = max(df_valid.quantile(0.5), 0.0005)
-p75 = max(df_valid.quantile(0.75), 0.0005)
-p90 = max(df_valid.quantile(0.90), 0.0005)
-
-# =========================
-# 위험등급 계산 함수
-# =========================
-def compute_risk_index(my_rate, my_thk):
-    margin = my_thk - ALLOWABLE
-    abs_score = min(40, max(0, (5 - margin)) / 5 * 40)
-    rel_score = min(30, (my_rate / mean_r) * 15)
-
-    pred20 = my_thk - my_rate * 20
-    fut_score = 30 if pred20 <= ALLOWABLE else max(0, (10 - pred20) * 3)
+    def predict(rate):
+        return 측정두께 - rate * years
 
-    total = min(abs_score + rel_score + fut_score, 100)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=years, y=predict(p50), name="평균(P50)", mode="lines+markers"))
+    fig.add_trace(go.Scatter(x=years, y=predict(p75), name="보수(P75)", mode="lines+markers"))
+    fig.add_trace(go.Scatter(x=years, y=predict(p90), name="매우보수(P90)", mode="lines+markers"))
+    fig.add_hline(y=ALLOWABLE, line_dash="dot", annotation_text="허용두께 3.2mm")
 
-    if total < 30: grade = ("A (안전)", "#0f9d58")
-    elif total < 55: grade = ("B (주의)", "#f4b400")
-    elif total < 80: grade = ("C (경계)", "#db4437")
-    else: grade = ("D (위험)", "#a50e0e")
+    fig.update_layout(template="plotly_white",
+                      xaxis_title="경과년수(년)", yaxis_title="예상두께(mm)")
+    return fig
 
-    return total, grade
 
+@st.cache_data(show_spinner=False, max_entries=256)
+def comparison(_trends, version, cond_items):
+    """전기방식 O/X 5년 구간 평균 (조회탭과 동일 조건, 전기방식만 제외) → (그래프, 감소율%).
+    구간 평균·이동평균·선형 추세 신뢰구간은 모두 추세표(trend.TrendTable)에서 조회."""
+    조건 = dict(cond_items)
+    comp_O = _trends.curve(dict(조건, 전기방식="O"))
+    comp_X = _trends.curve(dict(조건, 전기방식="X"))
+    if comp_O.empty and comp_X.empty:
+        return None, None
 
-# =========================
-# 1) 위험등급 표시 (강조 디자인)
-# =========================
+    # 🔹 그래프 그리기 (이동평균 선 + 선형 추세 95% 신뢰구간 음영)
+    fig2 = go.Figure()
 
-risk, (grade_text, grade_color) = compute_risk_index(내부식률, 측정두께)
+    for comp, name, color, fill in [(comp_O, "전기방식설비 설치", "green", "rgba(0,128,0,0.12)"),
+                                    (comp_X, "전기방식설비 미설치", "red", "rgba(255,0,0,0.12)")]:
+        if comp.empty:
+            continue
+        fig2.add_trace(go.Scatter(
+            x=comp["사용연수구간"], y=comp["상한"], mode="lines",
+            line=dict(width=0), showlegend=False, hoverinfo="skip"
+        ))
+        fig2.add_trace(go.Scatter(
+            x=comp["사용연수구간"], y=comp["하한"], mode="lines", fill="tonexty",
+            fillcolor=fill, line=dict(width=0), name=f"{name} 추세(95%)", hoverinfo="skip"
+        ))
+        fig2.add_trace(go.Scatter(
+            x=comp["사용연수구간"],
+            y=comp["이동평균"],
+            name=name,
+            mode="lines+markers",
+            line=dict(color=color, width=3)
+        ))
+
+    fig2.update_layout(
+        template="plotly_white",
+        xaxis_title="사용연수",
+        yaxis_title="평균 부식률(mm/년)",
+        title="전기방식설비 유무에 따른 부식률 경향"
+    )
+
+    # 🔹 전체 평균 기준 효과 (구간 평균의 평균 비교)
+    return fig2, _trends.effect(조건)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def probability_figure(_sketches, version, cond_items, band, 측정두께):
+    """동일 조건·연수구간 경험분포 Monte Carlo (③과 같은 그룹) → (연도별 미달 확률 그래프, 수명 P10/P50/P90)."""
+    mc = montecarlo.simulate(_sketches, dict(cond_items), band, 측정두께)
 
-st.markdown("## 📌 위험등급 평가 (Risk Index)")
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=mc["years"], y=mc["p_below"] * 100, name="미달 확률",
+                             mode="lines+markers", line=dict(color="#db4437", width=3)))
+    fig.update_layout(template="plotly_white", xaxis_title="경과년수(년)",
+                      yaxis_title="허용두께 미달 확률(%)", yaxis_range=[0, 100])
+    return fig, mc["life"]
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def sensitivity_grid(_sketches, version, cond_items, 설계두께):
+    """조건·설계두께별 민감도 격자 (측정두께/사용연수 입력이 바뀌어도 재계산하지 않음)."""
+    thickness, ages = sensitivity.grid_axes(설계두께)
+    return sensitivity.sweep(_sketches, dict(cond_items), 설계두께, thickness, ages)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def sensitivity_figure(_sketches, version, cond_items, 설계두께, 측정두께, 사용연수):
+    """위험등급 히트맵 + 산정방식별 합격 경계선 + 내 탱크 위치."""
+    g = sensitivity_grid(_sketches, version, cond_items, 설계두께)
+
+    # 등급 인덱스(0~3) → GRADES 색 (계단형 색상표)
+    colors = [c for _, _, c in GRADES]
+    n = len(colors)
+    scale = []
+    for i, c in enumerate(colors):
+        scale += [[i / n, c], [(i + 1) / n, c]]
+
+    fig = go.Figure(go.Heatmap(
+        x=g["thickness"], y=g["ages"], z=g["grade"], zmin=-0.5, zmax=n - 0.5,
+        colorscale=scale, opacity=0.55, customdata=np.round(g["risk"], 1),
+        hovertemplate="측정두께 %{x:.2f}mm<br>사용연수 %{y:.0f}년<br>위험지수 %{customdata:.1f}<extra></extra>",
+        colorbar=dict(title="위험등급", tickvals=list(range(n)), ticktext=[t for _, t, _ in GRADES]),
+    ))
+    dash = ["solid", "dash", "dot", "dashdot"]
+    for m, mode in enumerate(g["modes"]):
+        fig.add_trace(go.Scatter(
+            x=g["boundary"][m], y=g["ages"], mode="lines", name=f"합격 경계: {mode}",
+            line=dict(color="#111827", width=2, dash=dash[m % len(dash)]),
+        ))
+    fig.add_trace(go.Scatter(
+        x=[측정두께], y=[사용연수], mode="markers", name="내 탱크",
+        marker=dict(symbol="x", size=14, color="#1d4ed8"),
+    ))
+    fig.update_layout(template="plotly_white", xaxis_title="측정두께(mm)", yaxis_title="사용연수(년)",
+                      legend=dict(orientation="h", y=-0.2), height=520)
+    return fig
 
-risk_col1, risk_col2 = st.columns([1, 1])
 
-with risk_col1:
-    st.markdown(f"""
+# =========================
+# 화면
+# =========================
+def render(cube, sketches, trends, version, 조건, 내부식률, 설계두께, 측정두께, 사용연수, intervals=None):
+    # =========================
+    # 0) 입력/상태 확인
+    # =========================
+    if 조건 is None:
+        st.info("조회 조건을 먼저 선택하세요.")
+        return
+    if cube.stats(조건)["count"] == 0:
+        st.warning("해당 조건의 표본이 없습니다. 조건을 변경해 주세요.")
+        return
+    if 내부식률 is None or 측정두께 is None:
+        st.warning("내 탱크 데이터가 없어 일부 분석을 진행할 수 없습니다.")
+        return
+
+    cond_items = tuple(sorted(조건.items()))
+    risk, grade_text, grade_color, p50, p75, p90 = risk_summary(
+        sketches, version, cond_items, 내부식률, 측정두께
+    )
+    # 부트스트랩 신뢰구간 (표가 아직 준비 중이면 생략)
+    ci = intervals.interval(조건) if intervals is not None else None
+    risk_ci = grade_ci = ""
+    if ci is not None:
+        r_lo, r_hi, g_lo, g_hi = risk_interval(ci, 내부식률, 측정두께)
+        if round(r_lo, 1) != round(r_hi, 1):  # 상대 위험도가 상한(30점)이면 평균 구간과 무관
+            risk_ci = f"<div style='font-size:14px;color:#bbb;'>95% CI {r_lo:.1f} – {r_hi:.1f}</div>"
+        if g_lo != g_hi:
+            grade_ci = f"<div style='font-size:14px;'>95% CI {g_lo} – {g_hi}</div>"
+    timing.lap("분석: 위험지수")
+
+    # =========================
+    # 1) 위험등급 표시 (강조 디자인)
+    # =========================
+    st.markdown("## 📌 위험등급 평가 (Risk Index)")
+
+    risk_col1, risk_col2 = st.columns([1, 1])
+
+    with risk_col1:
+        st.markdown(f"""
     <div style='padding:15px;border-radius:10px;border:2px solid #333;
                 background-color:#222;color:white;text-align:center;'>
         <div style='font-size:22px;font-weight:600;'>Risk Index</div>
         <div style='font-size:40px;font-weight:700;color:#4fc3f7;'>{risk:.1f}</div>
+        {risk_ci}
     </div>
     """, unsafe_allow_html=True)
 
-with risk_col2:
-    st.markdown(f"""
+    with risk_col2:
+        st.markdown(f"""
     <div style='padding:15px;border-radius:10px;border:2px solid {grade_color};
                 background-color:{grade_color}22;text-align:center;'>
         <div style='font-size:22px;font-weight:600;'>위험등급</div>
         <div style='font-size:40px;font-weight:800;color:{grade_color};'>{grade_text}</div>
+        {grade_ci}
     </div>
     """, unsafe_allow_html=True)
 
-# =========================
-# 1-1) 평가 기준 설명 (2열)
-# =========================
-st.markdown("### 📝 위험등급 평가 기준 설명")
+    # =========================
+    # 1-1) 평가 기준 설명 (2열)
+    # =========================
+    st.markdown("### 📝 위험등급 평가 기준 설명")
 
-colL, colR = st.columns(2)
+    colL, colR = st.columns(2)
 
-with colL:
-    st.markdown("""
+    with colL:
+        st.markdown("""
 #### 1) 절대 위험도 (최대 40점)
 - 현재 두께가 허용두께(3.2mm)에 얼마나 근접했는지 평가  
 - 여유가 적을수록 점수가 높아짐  
@@ -109,8 +230,8 @@ with colL:
 - 평균 대비 약 **2배 빠르면 최대점(30점)**  
 """)
 
-with colR:
-    st.markdown("""
+    with colR:
+        st.markdown("""
 #### 3) 미래 위험도 (최대 30점)
 - 향후 **20년 예측 두께** 계산  
 - 허용두께 이하로 내려가면 위험 점수 증가  
@@ -122,125 +243,76 @@ with colR:
 - **D (80~100점):** 위험  
 """)
 
-st.markdown("---")
-
-# =========================
-# 2 & 3) 예측 + 전기방식 비교 (한 행)
-# =========================
-
-left, right = st.columns(2)
-
-# ------------------------------
-# 2) 향후 20년 두께 예측
-# ------------------------------
-with left:
-    st.markdown("## 📈 향후 20년 두께 예측")
-
-    years = np.array([0, 5, 10, 20])
-
-    def predict(rate):
-        return 측정두께 - rate * years
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=years, y=predict(p50), name="평균(P50)", mode="lines+markers"))
-    fig.add_trace(go.Scatter(x=years, y=predict(p75), name="보수(P75)", mode="lines+markers"))
-    fig.add_trace(go.Scatter(x=years, y=predict(p90), name="매우보수(P90)", mode="lines+markers"))
-    fig.add_hline(y=ALLOWABLE, line_dash="dot", annotation_text="허용두께 3.2mm")
-
-    fig.update_layout(template="plotly_white",
-                      xaxis_title="경과년수(년)", yaxis_title="예상두께(mm)")
-
-    st.plotly_chart(fig, use_container_width=True)
-
-# ------------------------------
-# 3) 전기방식 유무 비교 그래프 (5년 구간 + 스무딩)
-# ------------------------------
-with right:
-    st.markdown("## ⚡ 전기방식설비 유무 비교")
-
-    df_source = st.session_state.get("full_df", None)
-
-    if df_source is None:
-        st.warning("전체 데이터(df)를 찾을 수 없습니다. 조회탭에서 먼저 조회를 실행하세요.")
-    else:
-        # 조회탭과 동일 조건(전기방식만 제외)
-        cond = (
-            (df_source["재질"] == 재질) &
-            (df_source["품명"] == 품명) &
-            (df_source["탱크형상"] == 탱크형상) &
-            (df_source["히팅코일"] == 히팅코일) &
-            (df_source["지역"] == 지역)
-        )
-
-        comp = df_source[cond].copy()
-
-        if comp.empty:
+    st.markdown("---")
+
+    # =========================
+    # 2 & 3) 예측 + 전기방식 비교 (한 행)
+    # =========================
+    left, right = st.columns(2)
+
+    # ------------------------------
+    # 2) 향후 20년 두께 예측
+    # ------------------------------
+    with left:
+        st.markdown("## 📈 향후 20년 두께 예측")
+        st.plotly_chart(prediction_figure(측정두께, p50, p75, p90), use_container_width=True)
+        if ci is not None:
+            st.caption("부식률 95% 신뢰구간 (부트스트랩): " + " · ".join(
+                f"{name} {ci[key][0]:.4f}–{ci[key][1]:.4f}"
+                for name, key in [("P50", "p50"), ("P75", "p75"), ("P90", "p90")]) + " mm/년")
+        timing.lap("분석: 두께 예측")
+
+    # ------------------------------
+    # 3) 전기방식 유무 비교 그래프 (5년 구간 + 스무딩)
+    # ------------------------------
+    with right:
+        st.markdown("## ⚡ 전기방식설비 유무 비교")
+
+        fig2, diff = comparison(trends, version, cond_items)
+
+        if fig2 is None:
             st.info("해당 조건에서 전기방식 O/X 비교 가능한 표본이 없습니다.")
         else:
-            # 🔹 5년 단위 사용연수 구간 생성 (0,5,10,15,...)
-            comp["사용연수구간"] = (comp["사용연수"] // 5) * 5
-
-            # O / X 각각 5년 구간별 평균 부식률
-            comp_O = (
-                comp[comp["전기방식"] == "O"]
-                .groupby("사용연수구간")["부식률"]
-                .mean()
-                .reset_index()
-                .sort_values("사용연수구간")
-            )
-            comp_X = (
-                comp[comp["전기방식"] == "X"]
-                .groupby("사용연수구간")["부식률"]
-                .mean()
-                .reset_index()
-                .sort_values("사용연수구간")
-            )
-
-            # 🔹 이동평균(스무딩) 함수
-            def smooth(series, window=2):
-                return series.rolling(window=window, min_periods=1).mean()
-
-            if len(comp_O):
-                comp_O["부식률_smooth"] = smooth(comp_O["부식률"])
-            if len(comp_X):
-                comp_X["부식률_smooth"] = smooth(comp_X["부식률"])
-
-            # 🔹 그래프 그리기
-            fig2 = go.Figure()
-
-            if len(comp_O):
-                fig2.add_trace(go.Scatter(
-                    x=comp_O["사용연수구간"],
-                    y=comp_O["부식률_smooth"],
-                    name="전기방식설비 설치",
-                    mode="lines+markers",
-                    line=dict(color="green", width=3)
-                ))
-
-            if len(comp_X):
-                fig2.add_trace(go.Scatter(
-                    x=comp_X["사용연수구간"],
-                    y=comp_X["부식률_smooth"],
-                    name="전기방식설비 미설치",
-                    mode="lines+markers",
-                    line=dict(color="red", width=3)
-                ))
-
-            fig2.update_layout(
-                template="plotly_white",
-                xaxis_title="사용연수",
-                yaxis_title="평균 부식률(mm/년)",
-                title="전기방식설비 유무에 따른 부식률 경향"
-            )
-
             st.plotly_chart(fig2, use_container_width=True)
 
-            # 🔹 전체 평균 기준 효과 메시지
-            if len(comp_O) and len(comp_X):
-                diff = (1 - comp_O["부식률"].mean() / comp_X["부식률"].mean()) * 100
+            if diff is not None:
                 st.success(f"📉 전기방식 설치 시 평균 **{diff:.1f}%** 부식률 감소 효과")
             else:
                 st.info("전기방식설비 설치 유무 표본이 부족합니다.")
+        timing.lap("분석: 전기방식 비교")
+
+    # =========================
+    # 4) 확률적 잔여수명 (Monte Carlo)
+    # =========================
+    st.markdown("---")
+    st.markdown("## 🎲 확률적 잔여수명 (Monte Carlo)")
+
+    연수구간 = age_band([사용연수])[0]
+    fig_mc, life = probability_figure(sketches, version, cond_items, 연수구간, 측정두께)
+    mc_left, mc_right = st.columns([2, 1])
+    with mc_left:
+        st.plotly_chart(fig_mc, use_container_width=True)
+    with mc_right:
+        st.markdown(f"""
+- 동일 조건·연수구간({연수구간}) 표본의 부식률 분포에서 **{montecarlo.N_DRAWS:,}회** 추출 (③과 같은 그룹)  
+- 잔여수명 P10: **{life['p10']:.1f}년**  
+- 잔여수명 P50: **{life['p50']:.1f}년**  
+- 잔여수명 P90: **{life['p90']:.1f}년**  
+""")
+    timing.lap("분석: 확률 예측")
+
+    # =========================
+    # 5) 민감도 분석 (What-if)
+    # =========================
+    st.markdown("---")
+    st.markdown("## 🧭 민감도 분석 (What-if)")
+    st.caption("측정두께·사용연수를 바꿨을 때의 위험등급(색)과 산정방식별 합격 경계(선). "
+               "경계선 오른쪽이 11년 후 허용두께 이상(적합)입니다.")
+    if 설계두께 <= ALLOWABLE:
+        st.info("설계두께가 허용두께(3.2mm)보다 커야 민감도 격자를 그릴 수 있습니다.")
+    else:
+        st.plotly_chart(sensitivity_figure(sketches, version, cond_items, 설계두께, 측정두께, 사용연수),
+                        use_container_width=True)
+    timing.lap("분석: 민감도")
 
-
-st.caption("※ 본 분석은 참고자료이며, 최종 안전판정은 관련 법령·기준에 따릅니다.")
+    st.caption("※ 본 분석은 참고자료이며, 최종 안전판정은 관련 법령·기준에 따릅니다.")
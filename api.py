@@ -0,0 +1,406 @@
+# api.py — 부식률 조회 JSON API (asyncio + 표준 라이브러리 HTTP, 외부 서비스 불필요)
+#
+# 사용 예:
+#   python api.py                                   # http://127.0.0.1:8600
+#   python api.py --host 0.0.0.0 --port 8600 --data data.xlsx
+#   curl -G localhost:8600/stats --data-urlencode 재질=SS400 --data-urlencode '연수구간=10년 이상'
+#   curl -X POST localhost:8600/assess -d '{"재질": "SS400", ..., "설계두께": 12, "측정두께": 9.5, "사용연수": 18}'
+#   curl -X POST localhost:8600/assess -d '{"mode": "상위 75% (보수)", "tanks": [{...}, {...}]}'
+#
+# 화면(test.py)과 같은 통계원(그룹 스케치)과 같은 계산(engine)을 쓰므로 값이 화면과 같다.
+#   GET  /health   데이터 버전, 그룹 수, 표본 수
+#   GET  /stats    조건 그룹의 표본수/평균/표준편차/P50/P75/P90 (쿼리: 6개 키, 연수구간, min_count)
+#   POST /stats    같은 조회 여러 건: {"queries": [{조건...}, ...]}
+#   POST /assess   탱크 한 대 (객체) 또는 여러 대 {"mode": ..., "tanks": [...]}
+#                  → 대표부식률, 예상두께, 판정, 잔여수명, 위험지수, 위험등급 (engine.RESULT_COLUMNS 만,
+#                    대수와 무관하게 같은 형태 — 요청의 다른 필드는 돌려주지 않는다)
+#
+# 서버는 단일 스레드 이벤트 루프다. 단건 조회는 스케치의 통계 캐시 + 조합별 조회 캐시로
+# 요청당 수십 µs 안에 끝나므로 스레드를 쓰지 않는다. BULK_THREAD 대 이상의 일괄 평가만
+# engine.assess_fleet 로 한 번에 계산하고 다른 연결이 막히지 않도록 스레드로 넘긴다.
+# 데이터 버전이 바뀌면(ingest.py 로 델타 적재 등) 백그라운드에서 스케치를 다시 읽어 교체한다.
+#
+# 처리량 목표: 한 코어에서 keep-alive 단건 조회(/stats, /assess) 3,000 req/s 이상.
+#   python benchmarks/api_bench.py 로 확인한다 (목표 미달이면 종료코드 1).
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from engine import (GRADES, HORIZON, RATE_MODES, RESULT_COLUMNS, assess_fleet, group_mean_rate,
+                    predict, representative_rate, risk_grade, risk_index, tank_rate)
+from ingest import load_sketches
+from loader import dataset_version
+from rate_index import AGE_BINS, AGE_LABELS, KEYS
+from validate import clean_label
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8600
+RELOAD_INTERVAL = 5.0      # 데이터 버전 확인 주기 (초)
+LOOKUP_CACHE = 50_000      # (조건, 연수구간, 방식) 조회 캐시 크기
+BULK_THREAD = 200          # 이 대수 이상의 일괄 평가는 스레드에서 assess_fleet 로 계산
+MAX_BODY = 16 * 1024 * 1024
+MAX_HEADER = 64 * 1024
+NUMBERS = ("설계두께", "측정두께", "사용연수")   # 탱크 평가 필수 수치 (양의 유한수)
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 431: "Request Header Fields Too Large",
+            500: "Internal Server Error"}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# =========================
+# JSON 변환
+# =========================
+def _plain(value):
+    """numpy 값 → JSON 값 (NaN/inf 는 null)."""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, (np.integer, np.bool_)):
+        return value.item()
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return value if math.isfinite(value) else None
+    return value
+
+
+def _number(value):
+    """요청 값 → float (pd.to_numeric(errors="coerce") 와 같게 변환 실패는 NaN).
+    JSON 숫자·문자열만 받는다 — true/false(float(True) == 1.0), 목록, 객체도 NaN."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _age_band(age):
+    """사용연수 → 연수구간 라벨 (rate_index.age_band 의 스칼라판, 범위 밖·결측은 None)."""
+    i = int(np.searchsorted(AGE_BINS, age, side="right")) - 1
+    return AGE_LABELS[i] if 0 <= i < len(AGE_LABELS) else None
+
+
+def _mode(obj, default="평균"):
+    mode = obj.get("mode", default)
+    if not isinstance(mode, str) or mode not in RATE_MODES:
+        raise ApiError(400, f"알 수 없는 산정 방식: {mode} (가능: {', '.join(RATE_MODES)})")
+    return mode
+
+
+# =========================
+# 조회 상태 (데이터 버전당 하나)
+# =========================
+class QueryState:
+    """한 데이터 버전의 스케치와 조합별 조회 캐시."""
+
+    def __init__(self, sketches, version):
+        self.sketches = sketches
+        self.version = version
+        self._lookups = OrderedDict()
+        self._known = {k: set(sketches.labels[k].tolist()) for k in KEYS}
+
+    def condition(self, obj):
+        """요청의 6개 키 중 주어진 것만, 적재 때와 같은 표기 정규화(validate.clean_label) 후.
+        데이터에 없는 값은 400 — 조용히 상위 조건으로 내려가지 않고, 스케치 캐시도 키우지 않는다."""
+        cond = {}
+        for k in KEYS:
+            if obj.get(k) is None:
+                continue
+            label = clean_label(obj[k], k)
+            if label not in self._known[k]:
+                raise ApiError(400, f"알 수 없는 {k}: {obj[k]}")
+            cond[k] = label
+        return cond
+
+    def lookup(self, cond, band, mode):
+        """(대표부식률, 표본수, 상위조건보정, 동일조건 평균) — assess_fleet 의 조합별 조회와 같다."""
+        key = (tuple(cond.get(k) for k in KEYS), band, mode)
+        hit = self._lookups.get(key)
+        if hit is not None:
+            self._lookups.move_to_end(key)
+            return hit
+        rate, stats, dropped = representative_rate(self.sketches, cond, band, mode)
+        hit = (float(rate), int(stats["count"]), "·".join(dropped),
+               float(group_mean_rate(self.sketches, cond)))
+        self._lookups[key] = hit
+        if len(self._lookups) > LOOKUP_CACHE:
+            self._lookups.popitem(last=False)
+        return hit
+
+    def stats(self, query):
+        if not isinstance(query, dict):
+            raise ApiError(400, "조회 조건은 객체여야 합니다")
+        band = query.get("연수구간")
+        if band is not None and band not in AGE_LABELS:
+            raise ApiError(400, f"알 수 없는 연수구간: {band} (가능: {', '.join(AGE_LABELS)})")
+        cond = self.condition(query)
+        axis = "연수구간" if band is not None else None
+        min_count = query.get("min_count")
+        if min_count is None:
+            stats, dropped = self.sketches.stats(cond, axis, band), []
+        else:
+            n = _number(min_count)
+            if not (math.isfinite(n) and n >= 0):
+                raise ApiError(400, f"min_count 는 0 이상의 숫자여야 합니다: {min_count}")
+            stats, dropped = self.sketches.backoff(cond, axis, band, min_count=int(n))
+        return {"조건": cond, "연수구간": band, "상위조건보정": dropped, "stats": _plain(stats)}
+
+    def tank(self, tank):
+        """탱크 한 대의 입력 검사 → (조건, 설계두께, 측정두께, 사용연수).
+        수치가 없거나 숫자가 아니거나 0 이하이면 400 — 빠진 입력을 '적합' 으로 판정하지 않는다.
+        측정두께 > 설계두께 도 400 (validate.py 의 두께역전과 같은 측정 오류, 음의 부식률이 '안전' 으로 나옴).
+        연수구간 밖 사용연수도 400 (engine.assess_fleet 의 입력오류와 같은 기준)."""
+        missing = [c for c in KEYS + list(NUMBERS) if c not in tank]
+        if missing:
+            raise ApiError(400, f"필수 컬럼 누락: {', '.join(missing)}")
+        cond = self.condition(tank)
+        values = []
+        for c in NUMBERS:
+            v = _number(tank[c])
+            if not (math.isfinite(v) and v > 0):
+                raise ApiError(400, f"{c} 는 0보다 큰 숫자여야 합니다: {tank[c]}")
+            values.append(v)
+        설계두께, 측정두께, 사용연수 = values
+        if 측정두께 > 설계두께:
+            raise ApiError(400, f"측정두께({tank['측정두께']})가 설계두께({tank['설계두께']})보다 큽니다 (측정 오류)")
+        if _age_band(사용연수) is None:
+            raise ApiError(400, f"사용연수가 연수구간 범위({AGE_BINS[0]}~{AGE_BINS[-1]}년) 밖입니다: {tank['사용연수']}")
+        return (cond, *values)
+
+    def assess_one(self, tank, mode):
+        """탱크 한 대 평가 (assess_fleet 한 행과 같은 값, DataFrame 없이)."""
+        cond, 설계두께, 측정두께, 사용연수 = self.tank(tank)
+        band = _age_band(사용연수)
+
+        대표부식률, 표본수, 보정, 조건평균 = self.lookup(cond, band, mode)
+        내부식률 = float(tank_rate(설계두께, 측정두께, 사용연수))
+        _, 예상두께, 적합, 기대수명 = predict(측정두께, 대표부식률)
+        risk = float(risk_index(내부식률, 측정두께, 조건평균))
+        grade = "-" if math.isnan(risk) else GRADES[int(risk_grade(risk))][1]
+        return _plain({
+            **{k: cond.get(k) for k in KEYS}, "설계두께": 설계두께, "측정두께": 측정두께, "사용연수": 사용연수,
+            "연수구간": band,
+            "내부식률": 내부식률,
+            "대표부식률": 대표부식률,
+            "표본수": 표본수,
+            "상위조건보정": 보정,
+            f"예상두께({HORIZON}년)": 예상두께,
+            "판정": "적합" if 적합 else "부적합",
+            "잔여수명(년)": max(float(기대수명), 0.0),
+            "위험지수": risk,
+            "위험등급": grade,
+        })
+
+    def assess_many(self, tanks, mode):
+        """여러 대 평가 — 대수가 많으면 assess_fleet 로 한 번에."""
+        if len(tanks) < BULK_THREAD:
+            return [self.assess_one(t, mode) for t in tanks]
+        for i, tank in enumerate(tanks):
+            try:
+                self.tank(tank)
+            except ApiError as e:
+                raise ApiError(400, f"tanks[{i}]: {e}")
+        try:
+            result = assess_fleet(self.sketches, pd.DataFrame.from_records(tanks), mode)
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        # 단건 경로와 같은 형태: 문서화된 컬럼만, 수치는 검사를 거친 float
+        result = result[RESULT_COLUMNS].astype({c: float for c in NUMBERS})
+        result["연수구간"] = result["연수구간"].astype(object).where(result["연수구간"].notna(), None)
+        return _plain(result.to_dict("records"))
+
+
+# =========================
+# HTTP 서버
+# =========================
+class CorrosionApi:
+    """부식률 조회 API. handle() 하나가 연결 하나를 맡는다 (HTTP/1.1 keep-alive)."""
+
+    def __init__(self, data_path="data.xlsx", reload_interval=RELOAD_INTERVAL):
+        self.data_path = data_path
+        self.reload_interval = reload_interval
+        self.state = QueryState(load_sketches(data_path), dataset_version(data_path))
+        self.started = time.time()
+        self.requests = 0
+        self.routes = {
+            "/health": {"GET": self._health},
+            "/stats": {"GET": self._stats_get, "POST": self._stats_post},
+            "/assess": {"POST": self._assess},
+        }
+
+    # ---- 데이터 버전 감시 ----
+    async def reload_loop(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.reload()
+            except Exception as e:  # 다음 주기에 다시 시도 (이전 상태로 계속 응답)
+                print(f"데이터 다시 읽기 실패: {e}", file=sys.stderr)
+
+    async def reload(self):
+        version = dataset_version(self.data_path)
+        if version != self.state.version:
+            sketches = await asyncio.to_thread(load_sketches, self.data_path)
+            self.state = QueryState(sketches, version)
+
+    # ---- 처리기 ----
+    async def _health(self, query, body):
+        sk = self.state.sketches
+        return {"status": "ok", "version": self.state.version, "groups": len(sk.n),
+                "rows": int(sk.n.sum()), "requests": self.requests,
+                "uptime": round(time.time() - self.started, 1)}
+
+    async def _stats_get(self, query, body):
+        return self.state.stats(query)
+
+    async def _stats_post(self, query, body):
+        queries = body.get("queries") if isinstance(body, dict) else body
+        if not isinstance(queries, list):
+            raise ApiError(400, '본문은 {"queries": [...]} 또는 조건 목록이어야 합니다')
+        state = self.state
+        return {"version": state.version, "results": [state.stats(q) for q in queries]}
+
+    async def _assess(self, query, body):
+        if not isinstance(body, dict):
+            raise ApiError(400, "본문은 탱크 객체 또는 {\"tanks\": [...]} 이어야 합니다")
+        mode = _mode(body, query.get("mode", "평균"))
+        state = self.state
+        if "tanks" not in body:
+            return state.assess_one(body, mode)
+        tanks = body["tanks"]
+        if not isinstance(tanks, list) or not all(isinstance(t, dict) for t in tanks):
+            raise ApiError(400, "tanks 는 객체 목록이어야 합니다")
+        if len(tanks) < BULK_THREAD:
+            results = state.assess_many(tanks, mode)
+        else:
+            results = await asyncio.to_thread(state.assess_many, tanks, mode)
+        return {"version": state.version, "mode": mode, "results": results}
+
+    async def dispatch(self, method, target, raw_body):
+        """(상태코드, 응답 dict)."""
+        url = urlsplit(target)
+        methods = self.routes.get(url.path)
+        if methods is None:
+            return 404, {"error": f"없는 경로: {url.path}"}
+        handler = methods.get(method)
+        if handler is None:
+            return 405, {"error": f"{url.path} 는 {', '.join(methods)} 만 지원합니다"}
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+        except ValueError as e:
+            return 400, {"error": f"JSON 형식 오류: {e}"}
+        try:
+            return 200, await handler(dict(parse_qsl(url.query)), body)
+        except ApiError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            print(f"{method} {target} 처리 오류: {e!r}", file=sys.stderr)
+            return 500, {"error": "서버 내부 오류"}
+
+    @staticmethod
+    def _response(status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False, allow_nan=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode("latin-1") + body
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.LimitOverrunError:
+                    writer.write(self._response(431, {"error": "헤더가 너무 큽니다"}, False))
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                    target = target.encode("latin-1").decode("utf-8")   # 인코딩 안 된 한글 경로 허용
+                except ValueError:
+                    writer.write(self._response(400, {"error": "잘못된 요청 줄"}, False))
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    writer.write(self._response(400, {"error": "잘못된 Content-Length"}, False))
+                    break
+                if length > MAX_BODY:
+                    writer.write(self._response(413, {"error": "본문이 너무 큽니다"}, False))
+                    break
+                raw_body = await reader.readexactly(length) if length else b""
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = (connection != "close" if version == "HTTP/1.1"
+                              else connection == "keep-alive")
+                self.requests += 1
+                status, payload = await self.dispatch(method, target, raw_body)
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """서버 시작 (port=0 이면 빈 포트) → asyncio.Server."""
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER)
+
+
+async def serve(data_path="data.xlsx", host=DEFAULT_HOST, port=DEFAULT_PORT,
+                reload_interval=RELOAD_INTERVAL):
+    api = CorrosionApi(data_path, reload_interval)
+    server = await api.start(host, port)
+    reloader = asyncio.create_task(api.reload_loop())
+    print(f"부식률 API: http://{host}:{server.sockets[0].getsockname()[1]} "
+          f"(데이터 {api.state.version}, 그룹 {len(api.state.sketches.n):,}개)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        reloader.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="위험물탱크 부식률 조회 JSON API")
+    parser.add_argument("--data", default="data.xlsx", help="부식률 원본 데이터 (기본: data.xlsx)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"수신 주소 (기본: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"포트 (기본: {DEFAULT_PORT})")
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL,
+                        help="데이터 버전 확인 주기(초)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.data, args.host, args.port, args.reload_interval))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
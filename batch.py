@@ -0,0 +1,112 @@
+# batch.py — 탱크 목록 일괄 평가 CLI (Streamlit 없이 실행)
+#
+# 사용 예:
+#   python batch.py tanks.xlsx -o results.parquet
+#   python batch.py tanks.csv -o results.csv --mode "상위 75% (보수)" --workers 8
+#   python batch.py tanks.csv -o results.csv --mc-draws 100000     # 확률 컬럼 추가
+#   python batch.py tanks.csv -o results.csv --neighbors 30        # 유사 탱크 통계 컬럼 추가
+#
+# 목록을 청크로 나눠 프로세스 풀에 분배한다. 각 워커는 시작 시 그룹 스케치(와 유사 탱크 색인)를
+# 한 번만 읽고, 청크마다 engine.assess_fleet 를 호출한다 (화면과 같은 계산).
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from engine import INPUT_ERROR, RATE_MODES, assess_fleet, read_tank_list
+from ingest import load_sketches
+from loader import load_shared
+from montecarlo import assess_fleet_mc
+from neighbors import NeighborIndex
+
+_source = None
+_neighbors = None
+
+
+def _init_worker(data_path, neighbors_k=0):
+    global _source, _neighbors
+    _source = load_sketches(data_path)
+    if neighbors_k:
+        _neighbors = NeighborIndex(load_shared(data_path))
+
+
+def _assess_chunk(args):
+    chunk, mode, mc_draws, neighbors_k = args
+    if mc_draws:
+        result = assess_fleet_mc(_source, chunk, mode, n_draws=mc_draws)
+    else:
+        result = assess_fleet(_source, chunk, mode)
+    if neighbors_k:
+        result = result.join(_neighbors.query_fleet(result, neighbors_k))
+    return result
+
+
+def run(tanks, data_path="data.xlsx", mode="평균", workers=None, chunk_size=50_000, mc_draws=0,
+        neighbors_k=0):
+    """탱크 목록 DataFrame 평가. workers=1 이면 현재 프로세스에서 바로 계산.
+
+    mc_draws > 0 이면 조합당 그만큼 추출한 Monte Carlo 미달 확률/수명 분위 컬럼을 더한다.
+    neighbors_k > 0 이면 가장 비슷한 점검 기록 k개의 부식률 통계 컬럼(neighbors.FLEET_COLUMNS)을 더한다.
+    """
+    workers = workers or os.cpu_count() or 1
+    n_chunks = max(1, int(np.ceil(len(tanks) / chunk_size)))
+
+    if workers == 1 or n_chunks == 1:
+        _init_worker(data_path, neighbors_k)
+        return _assess_chunk((tanks, mode, mc_draws, neighbors_k))
+
+    # 캐시는 부모에서 먼저 데워 둔다 — 워커는 이미 저장된 스케치/공유 열만 읽는다
+    load_sketches(data_path)
+    if neighbors_k:
+        load_shared(data_path)
+    chunks = [tanks.iloc[i:i + chunk_size] for i in range(0, len(tanks), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(workers, n_chunks),
+                             initializer=_init_worker, initargs=(data_path, neighbors_k)) as pool:
+        parts = list(pool.map(_assess_chunk, [(c, mode, mc_draws, neighbors_k) for c in chunks]))
+    return pd.concat(parts)
+
+
+def write_result(result, path):
+    if path.lower().endswith(".parquet"):
+        result.to_parquet(path, index=False)
+    else:
+        result.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="위험물탱크 부식률 일괄 평가")
+    parser.add_argument("tanks", help="탱크 목록 (CSV / Excel)")
+    parser.add_argument("-o", "--output", required=True, help="결과 파일 (.parquet / .csv)")
+    parser.add_argument("--data", default="data.xlsx", help="부식률 원본 데이터 (기본: data.xlsx)")
+    parser.add_argument("--mode", default="평균", choices=list(RATE_MODES), help="부식률 산정 방식")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="청크당 탱크 수")
+    parser.add_argument("--mc-draws", type=int, default=0,
+                        help="조합당 Monte Carlo 추출 수 (0 이면 확률 컬럼 생략)")
+    parser.add_argument("--neighbors", type=int, default=0, metavar="K",
+                        help="가장 비슷한 점검 기록 K개의 부식률 통계 컬럼 추가 (0 이면 생략)")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    tanks = read_tank_list(args.tanks)
+    try:
+        result = run(tanks, args.data, args.mode, args.workers, args.chunk_size, args.mc_draws,
+                     args.neighbors)
+    except ValueError as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 1
+    write_result(result, args.output)
+
+    부적합 = int((result["판정"] == "부적합").sum())
+    입력오류 = int((result["판정"] == INPUT_ERROR).sum())
+    print(f"{len(result):,}개 평가 완료 (부적합 {부적합:,}개, 입력오류 {입력오류:,}개) — "
+          f"{time.perf_counter() - t0:.2f}초 → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
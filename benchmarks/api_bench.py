@@ -0,0 +1,145 @@
+# api_bench.py — 조회 API(api.py) 처리량 / 지연시간 측정
+#
+# 사용 예:
+#   python benchmarks/api_bench.py                          # 서버를 자식 프로세스로 띄워 측정
+#   python benchmarks/api_bench.py --connections 32 --requests 20000
+#   python benchmarks/api_bench.py --url http://127.0.0.1:8600 --target 0   # 떠 있는 서버 측정
+#
+# keep-alive 연결 여러 개로 실제 데이터에서 뽑은 단건 /stats, /assess 요청을 번갈아 보낸다.
+# 처리량(req/s)이 --target 보다 낮으면 종료코드 1 (api.py 의 목표: 한 코어 3,000 req/s).
+# 클라이언트도 같은 기계에서 돌므로 코어가 하나뿐이면 측정값은 서버 처리량의 하한이다.
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import quote, urlsplit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from loader import load_data  # noqa: E402
+from rate_index import AGE_LABELS, KEYS  # noqa: E402
+
+TARGET_RPS = 3000
+N_SAMPLES = 500            # 요청 본문을 만들 실제 행 수
+
+
+def make_requests(data_path, n=N_SAMPLES, seed=4):
+    """실제 행의 조건으로 만든 (메서드, 경로, 본문 bytes) 목록 — /stats 와 /assess 반반."""
+    df = load_data(data_path)
+    rng = np.random.default_rng(seed)
+    rows = df.iloc[rng.integers(len(df), size=n)].to_dict("records")
+    out = []
+    for i, row in enumerate(rows):
+        cond = {k: row[k] for k in KEYS}
+        if i % 2:
+            query = "&".join(f"{quote(k)}={quote(str(v))}" for k, v in cond.items())
+            band = quote(AGE_LABELS[i % len(AGE_LABELS)])
+            out.append(("GET", f"/stats?{query}&{quote('연수구간')}={band}", b""))
+        else:
+            tank = dict(cond, 설계두께=float(row["설계두께"]), 측정두께=float(row["측정두께"]),
+                        사용연수=float(row["사용연수"]))
+            out.append(("POST", "/assess", json.dumps(tank, ensure_ascii=False).encode("utf-8")))
+    return out
+
+
+async def _connection(host, port, requests, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for method, path, body in requests:
+            t0 = time.perf_counter()
+            writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.decode("latin-1").split("\r\n")[1:]:
+                name, _, value = line.partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors.append(head.split(b"\r\n", 1)[0].decode("latin-1"))
+    finally:
+        writer.close()
+
+
+async def run(host, port, requests, connections, total):
+    """(경과 초, 지연시간 배열, 오류 목록)."""
+    per_conn = total // connections
+    plans = [[requests[(c * per_conn + i) % len(requests)] for i in range(per_conn)]
+             for c in range(connections)]
+    latencies, errors = [], []
+    # 예열 (조합별 조회 캐시는 실제 운영처럼 채워진 상태로 잰다)
+    await _connection(host, port, requests, [], [])
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_connection(host, port, p, latencies, errors) for p in plans))
+    return time.perf_counter() - t0, np.array(latencies), errors
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(data_path, port, timeout=120):
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "api.py"), "--data", data_path,
+                             "--port", str(port)], cwd=ROOT)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("api.py 가 시작 중 종료되었습니다")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("api.py 시작 시간 초과")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="부식률 조회 API 처리량 측정")
+    parser.add_argument("--data", default=os.path.join(ROOT, "data.xlsx"), help="부식률 원본 데이터")
+    parser.add_argument("--url", default=None, help="이미 떠 있는 서버 주소 (없으면 자식 프로세스로 띄움)")
+    parser.add_argument("--connections", type=int, default=16, help="동시 keep-alive 연결 수")
+    parser.add_argument("--requests", type=int, default=10_000, help="전체 요청 수")
+    parser.add_argument("--target", type=float, default=TARGET_RPS, help="목표 처리량 req/s (0 이면 검사 안 함)")
+    args = parser.parse_args(argv)
+
+    requests = make_requests(args.data)
+    proc = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = "127.0.0.1", _free_port()
+        proc = _start_server(args.data, port)
+    try:
+        elapsed, lat, errors = asyncio.run(run(host, port, requests, args.connections, args.requests))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    rps = len(lat) / elapsed
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99]) * 1e3
+    print(f"{len(lat):,}건 / {elapsed:.2f}초 = {rps:,.0f} req/s  "
+          f"(연결 {args.connections}, 지연 p50 {p50:.2f} / p95 {p95:.2f} / p99 {p99:.2f} ms, 오류 {len(errors)}건)")
+    for e in sorted(set(errors))[:5]:
+        print(f"  오류 응답: {e}")
+    if errors or (args.target and rps < args.target):
+        print(f"목표 미달 (목표 {args.target:,.0f} req/s)" if not errors else "오류 응답 있음", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+# bench.py — 적재 → 조회 → 집계 → 위험지수 파이프라인 벤치마크
+#
+# 사용 예:
+#   python benchmarks/bench.py                          # 10k / 1M / 10M 행
+#   python benchmarks/bench.py --sizes 10000 1000000 -o benchmarks/results/today.json
+#   python benchmarks/bench.py --sizes 10000 --baseline benchmarks/baseline.json
+#
+# 합성 데이터(synthetic.py)로 단계별 소요시간(초)을 재서 JSON 으로 저장한다.
+# 모든 단계는 REPEAT 번(기본 5) 실행한 중앙값이다.
+# --baseline 을 주면 같은 크기·단계끼리 비교해, 비율 허용치(--tolerance)와 절대 허용치(--min-delta)를
+# 둘 다 넘게 느려진 단계가 있으면 종료코드 1 (밀리초 미만 단계의 타이머 잡음으로는 실패하지 않음).
+# 조회 단계는 1회당 시간을 기록하되, 절대 허용치는 N_QUERIES 회 묶음 시간에 적용한다.
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cube import AggregationCube  # noqa: E402
+from engine import RATE_MODES, assess_fleet, risk_index  # noqa: E402
+from loader import compact, export_columns, open_columns  # noqa: E402
+from neighbors import NeighborIndex  # noqa: E402
+from rate_index import AGE_LABELS, KEYS, RateIndex  # noqa: E402
+from sketch import GroupSketches  # noqa: E402
+from synthetic import make_inspections, make_tanks  # noqa: E402
+from trend import TrendTable  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+N_QUERIES = 100            # 조회 단계에서 재는 조건 수 (결과는 조회 1회당 시간)
+N_TANKS = 100_000          # 일괄평가 탱크 수
+MAX_WORKBOOK_ROWS = 100_000  # 이보다 크면 엑셀 읽기는 건너뛴다 (openpyxl 쓰기가 너무 느림)
+REPEAT = 5                 # 단계별 반복 횟수 (중앙값을 기록)
+MIN_DELTA = 0.001          # 비교 시 절대 허용치(초): 이만큼도 안 느려졌으면 비율과 무관하게 통과
+# 조회 1회당 시간으로 기록하는 단계 — 절대 허용치는 N_QUERIES 회 묶음 시간에 적용한다
+PER_QUERY_STAGES = frozenset({
+    "filter", "percentile_rank", "section4_breakdown", "facets", "analyze_percentiles",
+    "analyze_comparison", "representative_rate", "neighbors_query",
+})
+
+
+def _timed(fn, repeat=REPEAT, setup=None):
+    """fn 을 repeat 번 실행한 시간(초)의 중앙값과 마지막 결과.
+
+    setup 은 매 반복 전에 (시간 밖에서) 부른다 — 메모가 있는 객체는 여기서 비워야
+    두 번째 반복부터 사전 조회만 재는 일이 없다.
+    """
+    times, out = [], None
+    for _ in range(repeat):
+        out = None            # 이전 결과를 놓아 큰 결과가 두 벌 동시에 메모리에 있지 않게
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times)), out
+
+
+def _per_query(fn, conds, repeat=REPEAT, setup=None):
+    t, _ = _timed(lambda: [fn(c) for c in conds], repeat, setup)
+    return t / len(conds)
+
+
+def _conditions(df, n, seed=2):
+    """실제 행에서 뽑은 조건 (조회탭처럼 6개 키 전부 + 연수구간)."""
+    rng = np.random.default_rng(seed)
+    rows = df.iloc[rng.integers(len(df), size=n)]
+    bands = rng.choice(AGE_LABELS, size=n)
+    return [({k: row[k] for k in KEYS}, band) for (_, row), band in zip(rows.iterrows(), bands)]
+
+
+def _load_stages(n, workdir, res, max_workbook_rows, repeat):
+    """적재 단계들을 재서 res 에 넣고, 공유 사본(메모리 맵)을 돌려준다.
+
+    원본·압축본은 이 함수 안에서만 살아 있어, 이후 단계가 1천만 행 원본을 들고 있지 않는다."""
+    df = make_inspections(n)
+    if n <= max_workbook_rows:
+        xlsx = os.path.join(workdir, f"bench_{n}.xlsx")
+        df.to_excel(xlsx, sheet_name="Sheet1", index=False)
+        res["load_workbook"], _ = _timed(lambda: pd.read_excel(xlsx, engine="openpyxl"), repeat)
+    snap = os.path.join(workdir, f"bench_{n}.parquet")
+    res["snapshot_write"], _ = _timed(lambda: df.to_parquet(snap, index=False), repeat)
+    res["snapshot_read"], _ = _timed(lambda: pd.read_parquet(snap), repeat)
+    res["compact"], small = _timed(lambda: compact(df), repeat)
+
+    exports = itertools.count()
+
+    def export():
+        # 반복마다 새 폴더로 내보낸다 (있는 폴더로는 이름 바꾸기가 실패해 버리는 일만 재게 됨)
+        dest = os.path.join(workdir, f"bench_{n}.{next(exports)}.shared")
+        export_columns(small, dest)
+        return dest
+
+    res["shared_export"], shared = _timed(export, repeat)
+    res["shared_open"], data = _timed(lambda: open_columns(shared), repeat)
+    return data
+
+
+def run_size(n, workdir, max_workbook_rows=MAX_WORKBOOK_ROWS, repeat=REPEAT):
+    """n행 합성 데이터로 단계별 시간(초, repeat 회 중앙값) dict."""
+    res = {}
+
+    # ---- 적재 ----
+    data = _load_stages(n, workdir, res, max_workbook_rows, repeat)
+
+    conds = _conditions(data, N_QUERIES)
+
+    # ---- ① 조회 (색인) ----
+    res["index_build"], idx = _timed(lambda: RateIndex(data), repeat)
+    res["filter"] = _per_query(lambda c: len(idx.rows(c[0])), conds, repeat)
+    res["percentile_rank"] = _per_query(lambda c: idx.percentile_rank(c[0], 0.02), conds, repeat)
+
+    # ---- ④ / ⑥ 집계 ----
+    res["cube_build"], cube = _timed(lambda: AggregationCube(data), repeat)
+    res["section4_breakdown"] = _per_query(lambda c: cube.breakdown(c[0], "연수구간"), conds, repeat)
+    res["facets"] = _per_query(lambda c: cube.facets(c[0]), conds, repeat)
+    res["section6_tables"], _ = _timed(
+        lambda: (cube.table(["재질"]), cube.table([], "연수구간"), cube.table(["지역"])), repeat)
+
+    # ---- analyze.py: 분위수 / 전기방식 비교 ----
+    res["sketch_build"], sk = _timed(lambda: GroupSketches().update(data), repeat)
+    # 스케치는 (조건 → 통계)·(라벨 → 마스크)를 메모하므로 반복마다 비워 매번 새로 계산하게 한다
+    res["analyze_percentiles"] = _per_query(lambda c: sk.stats(c[0]), conds, repeat, sk.clear_memo)
+    res["trend_build"], trends = _timed(lambda: TrendTable(cube), repeat)
+    res["analyze_comparison"] = _per_query(
+        lambda c: ([trends.curve(dict(c[0], 전기방식=v)) for v in ("O", "X")], trends.effect(c[0])),
+        conds, repeat)
+    res["representative_rate"] = _per_query(
+        lambda c: sk.backoff(c[0], "연수구간", c[1]), conds, repeat, sk.clear_memo)
+
+    # ---- 위험지수 일괄 계산 ----
+    tanks = make_tanks(N_TANKS)
+    rate = np.abs(np.random.default_rng(3).normal(0.02, 0.01, N_TANKS))
+    res["risk_index_batch"], _ = _timed(
+        lambda: risk_index(rate, tanks["측정두께"].to_numpy(), 0.021), repeat)
+    res["assess_fleet"], _ = _timed(
+        lambda: assess_fleet(sk, tanks, next(iter(RATE_MODES))), repeat, sk.clear_memo)
+
+    # ---- 유사 탱크 최근접 ----
+    res["neighbors_build"], nn = _timed(lambda: NeighborIndex(data), repeat)
+    ages = tanks["사용연수"].to_numpy(dtype=float)
+    res["neighbors_query"] = _per_query(
+        lambda c: nn.query(c[0], ages[len(c[0]["재질"]) % len(ages)]), conds, repeat)
+    res["neighbors_fleet"], _ = _timed(lambda: nn.query_fleet(tanks), repeat)
+    return res
+
+
+def environment():
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(current, baseline, tolerance, min_delta=MIN_DELTA):
+    """(크기, 단계, 기준, 현재, 비율) 중 기준보다 비율(tolerance)과 절대값(min_delta 초) 모두 넘게 느려진 항목 목록.
+
+    조회 단계(PER_QUERY_STAGES)는 1회당 시간이라, 절대값은 N_QUERIES 회 묶음 시간의 차이로 본다."""
+    slower = []
+    for size, stages in current["results"].items():
+        base = baseline.get("results", {}).get(size, {})
+        for stage, t in stages.items():
+            b = base.get(stage)
+            scale = N_QUERIES if stage in PER_QUERY_STAGES else 1
+            if b and t > b * (1 + tolerance) and (t - b) * scale > min_delta:
+                slower.append((size, stage, b, t, t / b))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="부식률 조회 파이프라인 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="합성 데이터 행 수")
+    parser.add_argument("-o", "--output", default=None, help="결과 JSON (기본: benchmarks/results/<시각>.json)")
+    parser.add_argument("--baseline", default=None, help="비교할 기준 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="허용 지연 비율 (기본 0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=MIN_DELTA,
+                        help="허용 지연 절대값(초) — 비율과 둘 다 넘어야 느려짐 (기본 0.001)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="단계별 반복 횟수, 중앙값 기록 (기본 5)")
+    parser.add_argument("--max-workbook-rows", type=int, default=MAX_WORKBOOK_ROWS,
+                        help="엑셀 읽기를 잴 최대 행 수")
+    args = parser.parse_args(argv)
+
+    result = {"environment": environment(), "repeat": args.repeat, "results": {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            t0 = time.perf_counter()
+            result["results"][str(n)] = run_size(n, workdir, args.max_workbook_rows, args.repeat)
+            print(f"{n:>12,}행 — {time.perf_counter() - t0:.1f}초")
+            for stage, t in result["results"][str(n)].items():
+                print(f"    {stage:<22}{t * 1000:>12.3f} ms")
+
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"→ {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        slower = compare(result, baseline, args.tolerance, args.min_delta)
+        for size, stage, b, t, ratio in slower:
+            print(f"느려짐: {int(size):,}행 {stage} {b * 1000:.3f} → {t * 1000:.3f} ms (×{ratio:.2f})")
+        if slower:
+            return 1
+        print(f"기준 대비 느려진 단계 없음 (허용 {args.tolerance:.0%} 및 {args.min_delta * 1000:g} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# cold_start.py — 첫 화면까지 시간 측정 (새 프로세스에서 앱 첫 재실행)
+#
+# 사용 예:
+#   python benchmarks/cold_start.py                 # 예열 없음 / 예열 후 각 3회
+#   python benchmarks/cold_start.py --repeat 5 --fresh
+#
+# 매번 새 파이썬 프로세스에서 Streamlit AppTest 로 test.py 를 한 번 실행한다.
+#   - 예열 없음: 프로세스 시작 → 첫 재실행 완료 (timing.first_render_ms, import·데이터 준비 포함)
+#   - 예열 후:   serve.py 처럼 resources.start_warmup() 이 끝난 뒤 들어온 첫 요청의 재실행 시간
+# --fresh 이면 data.xlsx 를 임시 폴더에 복사해 디스크 캐시(.cache 스냅샷·메모리 맵) 없이 잰다.
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = {"plotly", "openpyxl", "matplotlib", "analyze", "scipy"}
+
+_CHILD = """
+import json, sys, time
+import timing
+warm_ms = None
+if {warm}:
+    import resources
+    resources.start_warmup()
+    while resources.warmup_status()["state"] == "진행 중":
+        time.sleep(0.01)
+    warm_ms = sum(resources.warmup_status()["steps"].values())
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({script!r}, default_timeout=600)
+at.run()
+if at.exception:
+    sys.exit(f"앱 예외: {{at.exception}}")
+run = timing.summary()
+print(json.dumps({{"first_render_ms": timing.first_render_ms(),
+                  "run_ms": float(run.loc[run["구간"] == "전체", "p50(ms)"].iloc[0]),
+                  "warm_ms": warm_ms,
+                  "modules": sorted({{m.split(".")[0] for m in sys.modules}} & {heavy!r})}}))
+"""
+
+
+def measure(warm, cwd):
+    """새 프로세스에서 한 번 실행 → 결과 dict."""
+    env = dict(os.environ, PYTHONPATH=ROOT, TIMING_LOG="")
+    code = _CHILD.format(warm=warm, script=os.path.join(ROOT, "test.py"), heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="첫 화면까지 시간 측정 (예열 전후)")
+    parser.add_argument("--repeat", type=int, default=3, help="경우별 반복 횟수")
+    parser.add_argument("--fresh", action="store_true", help="디스크 캐시 없이 (원본 변환부터) 측정")
+    args = parser.parse_args(argv)
+
+    for warm in (False, True):
+        results = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as tmp:
+                cwd = ROOT
+                if args.fresh:
+                    shutil.copy(os.path.join(ROOT, "data.xlsx"), tmp)
+                    cwd = tmp
+                try:
+                    results.append(measure(warm, cwd))
+                except subprocess.CalledProcessError as e:
+                    print(f"오류:\n{e.stderr[-2000:]}", file=sys.stderr)
+                    return 1
+        if warm:
+            run = np.median([r["run_ms"] for r in results])
+            pre = np.median([r["warm_ms"] for r in results])
+            print(f"예열 후   : 첫 요청 → 첫 화면 {run:,.0f} ms (예열 {pre:,.0f} ms, 중앙값 {args.repeat}회)")
+        else:
+            first = np.median([r["first_render_ms"] for r in results])
+            run = np.median([r["run_ms"] for r in results])
+            print(f"예열 없음 : 프로세스 시작 → 첫 화면 {first:,.0f} ms "
+                  f"(첫 재실행 {run:,.0f} ms, 중앙값 {args.repeat}회)")
+        print(f"  첫 화면 시점에 불러온 무거운 모듈: {', '.join(results[-1]['modules']) or '없음'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+# load_test.py — 동시 접속 부하 시험 (앱 서버 한 대에 점검자 N명)
+#
+# 사용 예:
+#   python benchmarks/load_test.py                                   # 세션 1 / 2 / 4 / 8, 세션당 조작 20회
+#   python benchmarks/load_test.py --sessions 1 4 16 --steps 50 --think 0.5 -o benchmarks/results/load.json
+#   python benchmarks/load_test.py --max-p95 2000                    # p95 가 2초를 넘는 단계가 있으면 종료코드 1
+#   python benchmarks/load_test.py --url http://127.0.0.1:8501 --pid 12345   # 떠 있는 서버 측정
+#
+# serve.py 로 앱 서버를 자식 프로세스로 띄우고, 브라우저와 같은 웹소켓 프로토콜(_stcore/stream, protobuf)로
+# 세션 N개를 동시에 붙인다. AppTest 는 실행마다 전역 Runtime 을 바꿔 끼우므로 한 프로세스에서 동시에 돌릴 수 없다.
+# 세션은 첫 화면을 받고 내 탱크 두께를 넣은 뒤 점검자의 조작을 흉내 낸다:
+#   ① 조건 변경(표본 있는 값 중 하나) / ② 두께 입력 / ③ 산정방식 변경 / 탭 전환 — 가중치는 ACTIONS.
+# 조작 하나 = 위젯 값을 보내고 재실행이 끝날 때(script_finished)까지의 시간이다.
+# 세션 수를 늘려 가며 재실행 지연 p50/p95/p99, 처리량(재실행/초), 응답 크기, 세션당 메모리
+# ((세션이 붙어 있는 동안의 서버 최대 RSS − 예열 직후 유휴 RSS) ÷ N — 세션 상태·조건별 캐시 증가 포함)를 잰다.
+# 서버를 직접 띄우면 단계마다 새 서버로 재서 앞 단계가 남긴 메모리가 섞이지 않는다 (--url 은 한 서버를 계속 씀).
+# 외부 서비스 없이 Linux 한 대에서 돈다.
+# 클라이언트도 같은 기계에서 돌므로 코어가 적으면 측정값은 서버 성능의 하한이다.
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streamlit.proto.BackMsg_pb2 import BackMsg  # noqa: E402
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+from streamlit.proto.WidgetStates_pb2 import WidgetState  # noqa: E402
+from websockets.asyncio.client import connect  # noqa: E402  (streamlit 의존성)
+
+from bench import environment  # noqa: E402
+from engine import RATE_MODES  # noqa: E402
+
+DEFAULT_SESSIONS = [1, 2, 4, 8]
+DEFAULT_STEPS = 20
+TABS = ["🔎 조회", "📊 결과분석", "🏭 일괄평가"]
+FACETS = ["재질", "품명", "탱크형상", "전기방식", "히팅코일", "지역"]
+ACTIONS = {"조건 변경": 4, "두께 입력": 3, "산정방식": 2, "탭 전환": 2}   # 조작 종류별 가중치
+THICKNESS = ["설계두께(mm)", "측정두께(mm)", "내 탱크 사용연수 (년)"]     # 키 없는 number_input 은 라벨로 찾는다
+RERUN = ForwardMsg.ScriptFinishedStatus.Value("FINISHED_EARLY_FOR_RERUN")
+RSS_INTERVAL = 0.05      # 단계 중 서버 RSS 를 읽는 간격 (초, 최대값 기록)
+
+
+def _rss_mb(pid):
+    """프로세스 RSS (MB)."""
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class Session:
+    """점검자 한 명 — 웹소켓 연결 하나, 보낸 위젯 값, 조작 난수열.
+
+    브라우저처럼 지금까지 정한 위젯 값을 매 재실행마다 전부 보내고, 앱이 session_state 로 바꾼 값
+    (set_value) 은 받아서 반영한다. 위젯은 key 가 있으면 key, 없으면 라벨로 찾는다.
+    """
+
+    def __init__(self, url, seed, think=0.0):
+        self.url = url
+        self.rng = random.Random(seed)
+        self.think = think
+        self.widgets = {}          # key 또는 라벨 → (위젯 id, 선택지)
+        self.values = {}           # 위젯 id → WidgetState
+        self.records = []          # (조작, ms, 응답 bytes, 예외 메시지 목록)
+        self.ws = None
+
+    async def open(self):
+        self.ws = await connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        await self.ws.close()
+
+    def _on_element(self, element):
+        """받은 요소 하나를 반영 → 예외 요소면 그 메시지."""
+        kind = element.WhichOneof("type")
+        widget = getattr(element, kind)
+        if kind == "exception":
+            return widget.message
+        if not getattr(widget, "id", "") or not getattr(widget, "label", ""):    # 그래프 등 위젯이 아닌 요소
+            return None
+        key = widget.id.rsplit("-", 1)[1]
+        name = widget.label if key == "None" else key
+        self.widgets[name] = (widget.id, list(getattr(widget, "options", [])))
+        if kind == "selectbox" and widget.set_value:    # 앱이 session_state 로 고친 값
+            self._set(name, string_value=widget.raw_value)
+        return None
+
+    async def rerun(self, action):
+        """지금 위젯 값으로 재실행을 요청하고 끝날 때까지 받은 메시지를 반영."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.widget_states.widgets.extend(self.values.values())
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        size, errors = 0, []
+        while True:
+            data = await self.ws.recv()
+            size += len(data)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                error = self._on_element(fwd.delta.new_element)
+                if error:
+                    errors.append(error)
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "add_block":
+                block = fwd.delta.add_block
+                if block.WhichOneof("type") == "tab_container" and block.tab_container.id:
+                    self.widgets["main_tab"] = (block.tab_container.id, TABS)
+            elif kind == "script_finished" and fwd.script_finished != RERUN:
+                break
+        self.records.append((action, (time.perf_counter() - t0) * 1000, size, errors))
+
+    def _set(self, name, **value):
+        widget_id = self.widgets[name][0]
+        state = self.values.setdefault(widget_id, WidgetState(id=widget_id))
+        for field, v in value.items():
+            setattr(state, field, v)
+
+    def _thickness(self):
+        설계 = self.rng.choice([6.0, 8.0, 9.0, 10.0, 12.0, 15.0])
+        측정 = round(설계 - self.rng.uniform(0.1, 2.5), 2)
+        연수 = float(self.rng.randint(3, 40))
+        for label, v in zip(THICKNESS, (설계, 측정, 연수)):
+            self._set(label, double_value=v)
+
+    async def step(self):
+        """가중치대로 조작 하나를 고르고 재실행."""
+        if self.think:
+            await asyncio.sleep(self.rng.expovariate(1 / self.think))
+        action = self.rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+        if action == "조건 변경":
+            key = f"facet_{self.rng.choice(FACETS)}"
+            self._set(key, string_value=self.rng.choice(self.widgets[key][1]))
+        elif action == "두께 입력":
+            self._thickness()
+        elif action == "산정방식" and "rate_mode_fixed11" in self.widgets:
+            self._set("rate_mode_fixed11", string_value=self.rng.choice(list(RATE_MODES)))
+        else:
+            action = "탭 전환"
+            self._set("main_tab", string_value=self.rng.choice(TABS))
+        await self.rerun(action)
+
+    async def drive(self, steps):
+        await self.rerun("첫 접속")
+        self._thickness()          # 첫 조작은 항상 내 탱크 입력 (없으면 ③·분석탭이 비어 있음)
+        await self.rerun("두께 입력")
+        for _ in range(steps - 1):
+            await self.step()
+
+
+def _percentiles(ms):
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99, "max": float(np.max(ms))}
+
+
+async def _sample_peak(pid, peak):
+    """취소될 때까지 서버 RSS 를 RSS_INTERVAL 마다 읽어 peak["mb"] 에 최대값을 남긴다."""
+    while True:
+        peak["mb"] = max(peak["mb"], _rss_mb(pid))
+        await asyncio.sleep(RSS_INTERVAL)
+
+
+async def run_level(url, n, steps, think=0.0, seed=0, pid=None, idle_mb=None):
+    """세션 n개 동시 실행 → 결과 dict (지연 ms, 처리량, 응답 크기, 서버 메모리).
+
+    idle_mb 는 예열 직후 세션이 없을 때의 서버 RSS. 세션당 메모리 = (단계 중 최대 RSS − idle_mb) ÷ n,
+    음수(유휴 때보다 작음)는 0 으로 자르고 rss_below_idle 로 표시한다.
+    """
+    sessions = [Session(url, seed * 1000 + i, think) for i in range(n)]
+    peak = {"mb": 0.0}
+    sampler = asyncio.create_task(_sample_peak(pid, peak)) if pid else None
+    await asyncio.gather(*(s.open() for s in sessions))
+
+    t0 = time.perf_counter()
+    outcomes = await asyncio.gather(*(s.drive(steps) for s in sessions), return_exceptions=True)
+    elapsed = time.perf_counter() - t0
+
+    # 세션이 모두 붙어 있는 동안 서버 메모리를 읽고 연결을 닫는다
+    rss_after = _rss_mb(pid) if pid else None
+    if sampler is not None:
+        sampler.cancel()
+        peak["mb"] = max(peak["mb"], rss_after)
+    await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+    growth = None if pid is None or idle_mb is None else peak["mb"] - idle_mb
+
+    records = [r for s in sessions for r in s.records]
+    ms = np.array([r[1] for r in records])
+    by_action = {}
+    for action, t, _, _ in records:
+        by_action.setdefault(action, []).append(t)
+    return {
+        "sessions": n,
+        "reruns": len(records),
+        "seconds": elapsed,
+        "throughput": len(records) / elapsed,
+        "latency_ms": _percentiles(ms),
+        "actions": {a: dict(_percentiles(v), count=len(v)) for a, v in by_action.items()},
+        "response_kb": float(np.mean([r[2] for r in records])) / 1024,
+        "server_rss_mb": rss_after,
+        "idle_rss_mb": idle_mb,
+        "peak_rss_mb": peak["mb"] if pid else None,
+        "per_session_mb": None if growth is None else max(growth, 0.0) / n,
+        "rss_below_idle": growth is not None and growth < 0,
+        "errors": [repr(e) for e in outcomes if isinstance(e, BaseException)]
+                  + sorted({m for r in records for m in r[3]}),
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(port, timeout=300):
+    # 끊긴 세션은 바로 정리해 단계 사이에 메모리가 남지 않게 한다 (serve.py 가 공유 캐시 예열도 시작)
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "serve.py"), "--server.headless", "true",
+         "--server.port", str(port), "--server.address", "127.0.0.1", "--browser.gatherUsageStats", "false",
+         "--server.disconnectedSessionTTL", "0", "--logger.level", "error"],
+        cwd=ROOT, env=dict(os.environ, TIMING_LOG=""), stdout=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("serve.py 가 시작 중 종료되었습니다")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("serve.py 시작 시간 초과")
+
+
+async def warm_up(url):
+    """세션 하나로 조회·분석 화면을 한 번씩 (공유 캐시·모듈 import 는 운영처럼 채워진 상태로 잰다)."""
+    warm = Session(url, -1)
+    await warm.open()
+    await warm.drive(2)
+    warm._set("main_tab", string_value=TABS[1])
+    await warm.rerun("탭 전환")
+    await warm.close()
+
+
+async def measure(url, n, steps, think, seed, pid, warm=True):
+    """(예열 후) 유휴 RSS 를 읽고 세션 n개 단계를 잰다."""
+    if warm:
+        await warm_up(url)
+    idle = _rss_mb(pid) if pid else None
+    return await run_level(url, n, steps, think, seed, pid, idle)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streamlit 앱 동시 접속 부하 시험")
+    parser.add_argument("--sessions", type=int, nargs="+", default=DEFAULT_SESSIONS, help="동시 세션 수 (단계별)")
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="세션당 조작(재실행) 수 (첫 접속 제외)")
+    parser.add_argument("--think", type=float, default=0.0, help="조작 사이 평균 대기(초, 지수분포). 0 이면 쉬지 않음")
+    parser.add_argument("--seed", type=int, default=0, help="조작 난수 시드")
+    parser.add_argument("--url", default=None, help="이미 떠 있는 서버 주소 (없으면 serve.py 를 자식 프로세스로 띄움)")
+    parser.add_argument("--pid", type=int, default=None, help="--url 서버의 프로세스 번호 (주면 서버 메모리도 잰다)")
+    parser.add_argument("--max-p95", type=float, default=0, help="어느 단계든 p95(ms)가 이보다 크면 종료코드 1 (0 = 검사 안 함)")
+    parser.add_argument("-o", "--output", default=None, help="결과 JSON")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        url = urlsplit(args.url)
+        ws_url = f"ws://{url.hostname}:{url.port or 80}/_stcore/stream"
+
+    result = {"environment": environment(), "steps": args.steps, "think": args.think, "levels": []}
+    print(f"{'세션':>4} {'재실행':>6} {'처리량/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'최대 ms':>8}"
+          f" {'응답 KB':>7} {'세션당 MB':>9}  오류")
+
+    def report(level):
+        result["levels"].append(level)
+        lat, per = level["latency_ms"], level["per_session_mb"]
+        per = "-" if per is None else f"{per:.1f}" + ("*" if level["rss_below_idle"] else "")
+        print(f"{level['sessions']:>6} {level['reruns']:>8,} {level['throughput']:>11.1f}"
+              f" {lat['p50']:>10.0f} {lat['p95']:>10.0f} {lat['p99']:>10.0f} {lat['max']:>10.0f}"
+              f" {level['response_kb']:>9.0f} {per:>11}  {len(level['errors'])}")
+        for action, a in level["actions"].items():
+            print(f"{'':>8}{action:<8} {a['count']:>5}회  p50 {a['p50']:>7.0f}  p95 {a['p95']:>7.0f} ms")
+        for e in level["errors"][:5]:
+            print(f"{'':>8}오류: {e[:200]}", file=sys.stderr)
+
+    if args.url:
+        # 떠 있는 서버 하나로 단계를 이어서 잰다 (예열은 처음 한 번, 유휴 RSS 는 단계마다 다시 읽음)
+        for i, n in enumerate(args.sessions):
+            report(asyncio.run(measure(ws_url, n, args.steps, args.think, args.seed, args.pid, warm=i == 0)))
+    else:
+        # 단계마다 새 서버 — 앞 단계의 세션·캐시가 남긴 메모리 없이 같은 출발점에서 잰다
+        for n in args.sessions:
+            port = _free_port()
+            proc = _start_server(port)
+            try:
+                report(asyncio.run(measure(f"ws://127.0.0.1:{port}/_stcore/stream", n, args.steps,
+                                           args.think, args.seed, proc.pid)))
+            finally:
+                proc.terminate()
+                proc.wait()
+    if any(lv["rss_below_idle"] for lv in result["levels"]):
+        print("* 단계 중 최대 RSS 가 유휴 RSS 보다 작음 — 세션당 메모리를 0 으로 표시", file=sys.stderr)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2, default=float)
+        print(f"→ {args.output}")
+
+    failed = [lv["sessions"] for lv in result["levels"] if lv["errors"]]
+    slow = [lv["sessions"] for lv in result["levels"] if args.max_p95 and lv["latency_ms"]["p95"] > args.max_p95]
+    if failed:
+        print(f"오류 발생: 세션 {failed}", file=sys.stderr)
+    if slow:
+        print(f"p95 초과 ({args.max_p95:,.0f} ms): 세션 {slow}", file=sys.stderr)
+    return 1 if failed or slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
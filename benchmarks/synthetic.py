@@ -0,0 +1,62 @@
+# synthetic.py — data.xlsx 와 같은 스키마의 합성 점검자료 생성
+#
+# 범주 빈도는 실제 데이터와 비슷하게 치우치게 두고, 부식률은 조건별 효과 × 로그정규 잡음이다.
+# 같은 seed 면 같은 데이터가 나온다 (벤치마크 반복 측정용).
+import numpy as np
+import pandas as pd
+
+CATEGORIES = {
+    "재질": ["SS400", "A283-C", "A516-70", "A537-CL2", "A240-316L", "A516-60", "A131-B",
+           "A240-304", "A573-70", "A-7", "STS304", "FE52-C", "SPV 46Q", "HW50", "SWS41A",
+           "STS316", "SM520-B", "A36", "A537-70", "A285-C", "SS499", "SPV 490Q"],
+    "품명": ["제2석유류", "제1석유류", "제3석유류", "알코올류", "제4석유류", "특수인화물", "제6류위험물"],
+    "탱크형상": ["고정지붕", "내부부상지붕", "부상지붕"],
+    "지역": ["울산", "서산", "여수", "기타"],
+    "전기방식": ["X", "O"],
+    "히팅코일": ["X", "O"],
+}
+WEIGHTS = {
+    "재질": [0.503, 0.337, 0.023, 0.02, 0.02, 0.018, 0.017, 0.016, 0.015, 0.006, 0.005,
+           0.005, 0.003, 0.003, 0.002, 0.002, 0.002, 0.002, 0.001, 0.001, 0.0005, 0.0005],
+    "품명": [0.305, 0.285, 0.223, 0.114, 0.063, 0.008, 0.002],
+    "탱크형상": [0.783, 0.116, 0.101],
+    "지역": [0.683, 0.143, 0.097, 0.077],
+    "전기방식": [0.838, 0.162],
+    "히팅코일": [0.57, 0.43],
+}
+DESIGN_THICKNESS = [6.0, 7.0, 8.0, 9.0, 9.4, 10.0, 12.0, 15.0]
+
+
+def _choice(rng, values, weights, n):
+    p = np.asarray(weights, dtype=float)
+    return pd.Categorical.from_codes(rng.choice(len(values), size=n, p=p / p.sum()), values)
+
+
+def make_inspections(n, seed=0):
+    """점검자료 n행 (재질~지역 6개 키 + 사용연수/설계두께/측정두께/부식률)."""
+    rng = np.random.default_rng(seed)
+    out = {k: _choice(rng, CATEGORIES[k], WEIGHTS[k], n) for k in CATEGORIES}
+
+    # 조건별 배수 (키 값마다 고정) × 로그정규 잡음
+    effect = np.ones(n)
+    for k, values in CATEGORIES.items():
+        factors = np.random.default_rng(len(values)).lognormal(0, 0.3, len(values))
+        effect *= factors[out[k].codes]
+    effect *= np.where(out["전기방식"].codes == 1, 0.7, 1.0)
+
+    age = rng.integers(7, 47, n)
+    rate = 0.0126 * effect * rng.lognormal(0, 0.8, n)
+    design = rng.choice(DESIGN_THICKNESS, n)
+
+    out = pd.DataFrame(out).astype(str)
+    out["사용연수"] = age
+    out["설계두께"] = design
+    out["측정두께"] = np.round(design - rate * age, 2)
+    out["부식률"] = (design - out["측정두께"]) / age
+    return out
+
+
+def make_tanks(n, seed=1):
+    """일괄평가용 탱크 목록 n개 (engine.INPUT_COLUMNS 형식)."""
+    df = make_inspections(n, seed)
+    return df.drop(columns=["부식률"])
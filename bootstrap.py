@@ -0,0 +1,269 @@
+# bootstrap.py — 그룹별 부식률 통계의 부트스트랩 신뢰구간 (사전 계산, 데이터 버전당 한 번)
+#
+# 사용 예:
+#   python bootstrap.py                          # data.xlsx 기준 계산 → .cache/data.bootstrap.npz
+#   python bootstrap.py --workers 4 --resamples 2000
+#
+# ③ 대표부식률과 분석탭이 보여줄 수 있는 모든 그룹 — 6개 키 조합과 백오프로 키를 뺀 상위 조합
+# × (연수구간 없음 / 연수구간별) — 마다 평균·P50·P75·P90 의 95% 백분위 부트스트랩 구간을 구한다.
+# 표본은 그룹 스케치의 버킷 히스토그램(화면 분위수와 같은 원천)이다. 재표본은 그룹별 반복문 대신
+# 청크의 모든 그룹을 NumPy 배열 한 번으로 뽑고(_chunk_intervals), 청크는 프로세스 풀에 분배한다.
+# 결과는 데이터 버전과 함께 .cache/ 에 저장하므로 화면은 표 조회만 한다.
+import argparse
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cube import QUANTILES
+from engine import MIN_SAMPLES
+from ingest import load_sketches
+from loader import CACHE_DIR, dataset_version
+from rate_index import KEYS
+from sketch import N_BUCKETS, bucket_value
+
+N_RESAMPLES = 1000       # 그룹당 재표본 수
+LEVEL = 0.95             # 신뢰수준
+SEED = 0
+STATS = ["mean", "p50", "p75", "p90"]
+MEAN_EXACT_MAX = 1000    # 평균을 복원추출로 구하는 최대 표본수 (더 크면 정규근사)
+CHUNK_GROUPS = 128       # 청크당 그룹 수 (청크 = 프로세스 풀 작업 단위 = 난수 시드 단위)
+
+_Z = {0.9: 1.6449, 0.95: 1.9600, 0.99: 2.5758}
+_DRAW_BLOCK = 4_000_000  # 평균 복원추출 시 한 번에 만드는 난수 개수 상한
+
+
+def group_key(cond, band=None):
+    """그룹 키 문자열 (시드 / 조회 공용). 조건에 없는 키·연수구간은 '*'."""
+    return "|".join(str(cond[k]) if k in cond else "*" for k in KEYS) + f"|{'*' if band is None else band}"
+
+
+# =========================
+# 재표본 계산 (그룹 청크 단위로 한 번에)
+# =========================
+def _chunk_intervals(args):
+    """[(그룹 키, 버킷 대표값, 버킷별 표본수)] → (그룹 수, 4, 2) 구간 배열.
+
+    재표본 X* 는 경험분포 F 의 역함수에 균등난수를 넣은 것이므로
+    - 분위수: 재표본 정렬값 X*(r) = F⁻¹(U(r)), 균등 순서통계량 U(r) ~ Beta(r, n-r+1) 이고
+      다음 순위 U(r+1) 은 (U(r), 1) 에 남은 n-r 개의 최솟값 → 그룹·분위·재표본 전체를 배열 한 번에 뽑는다.
+      (GroupSketches._quantile 과 같은 두 순위 사이 위치 보간)
+    - 평균: 표본 MEAN_EXACT_MAX 개 이하 그룹은 n 개 복원추출을 그대로, 더 큰 그룹은 정규근사.
+    모든 그룹의 정렬 표본을 이어 붙여 두면 F⁻¹(u) 는 (그룹 시작 + ⌊u·n⌋) 위치의 값이다.
+    """
+    groups, n_resamples, seed = args
+    G = len(groups)
+    rng = np.random.default_rng([seed, zlib.crc32(groups[0][0].encode("utf-8"))])
+    counts = [g[2] for g in groups]
+    n = np.array([c.sum() for c in counts], dtype=np.int64)
+    sample = np.concatenate([np.repeat(g[1], g[2]) for g in groups])
+    offset = np.r_[0, np.cumsum(n)[:-1]]
+
+    def inverse(u, gid):
+        # u ∈ [0, 1) 를 그룹 gid 의 경험분포 값으로
+        return sample[offset[gid] + np.minimum((u * n[gid]).astype(np.int64), n[gid] - 1)]
+
+    tail = (1 - LEVEL) / 2 * 100
+    out = np.empty((G, len(STATS), 2))
+
+    # ---- 분위수: 순서통계량 (재표본 수, 그룹, 분위) ----
+    q = np.asarray(QUANTILES)
+    pos = q[None, :] * (n[:, None] - 1)
+    lo = np.floor(pos)
+    r = lo + 1                                          # 1부터 세는 순위
+    rest = (n[:, None] - r).astype(float)               # r 보다 뒤 순위 개수
+    u_lo = rng.beta(r, n[:, None] - r + 1, size=(n_resamples, G, len(q)))
+    v = rng.random((n_resamples, G, len(q)))
+    with np.errstate(divide="ignore"):
+        u_hi = np.where(rest > 0, u_lo + (1 - u_lo) * (1 - v ** (1 / np.maximum(rest, 1))), u_lo)
+    gid = np.arange(G)[None, :, None]
+    x_lo = inverse(u_lo, gid)
+    x_hi = inverse(u_hi, gid)
+    quant = x_lo + (x_hi - x_lo) * (pos - lo)
+    out[:, 1:, :] = np.percentile(quant, [tail, 100 - tail], axis=0).transpose(1, 2, 0)
+
+    # ---- 평균: 작은 그룹은 복원추출, 큰 그룹은 정규근사 ----
+    small = np.flatnonzero(n <= MEAN_EXACT_MAX)
+    if len(small):
+        owner = np.repeat(small, n[small])
+        starts = np.r_[0, np.cumsum(n[small])[:-1]]         # owner 안에서 그룹별 시작
+        means = np.empty((n_resamples, len(small)))
+        step = max(1, _DRAW_BLOCK // len(owner))
+        for b in range(0, n_resamples, step):
+            x = inverse(rng.random((min(step, n_resamples - b), len(owner))), owner)
+            means[b:b + step] = np.add.reduceat(x, starts, axis=1) / n[small]
+        out[small, 0, :] = np.percentile(means, [tail, 100 - tail], axis=0).T
+    large = np.flatnonzero(n > MEAN_EXACT_MAX)
+    z = _Z[LEVEL]
+    for i in large:
+        mean = groups[i][1] @ counts[i] / n[i]
+        se = np.sqrt((groups[i][1] - mean) ** 2 @ counts[i] / (n[i] - 1) / n[i])
+        out[i, 0] = mean - z * se, mean + z * se
+    return out
+
+
+def subset_groups(sketches, subsets):
+    """(키 부분집합 × 연수구간 유무) 그룹 → [(그룹 키, 버킷 대표값, 버킷별 표본수)].
+
+    스케치의 0 아닌 버킷만 (행, 버킷, 개수) 로 펼쳐 부분집합마다 (그룹, 버킷) 별로 더한다.
+    """
+    rows, buckets = np.nonzero(sketches.counts)
+    cnt = sketches.counts[rows, buckets]
+    labels = sketches.labels
+    codes, sizes = {}, {}
+    for c in KEYS + ["연수구간"]:
+        cats, codes[c] = np.unique(labels[c][rows], return_inverse=True)
+        sizes[c] = len(cats)
+    in_band = labels["연수구간"][rows] != ""       # 사용연수 결측·구간 밖은 연수구간별 그룹에서 제외
+
+    groups = []
+    for subset in subsets:
+        for with_band in (False, True):
+            cols = list(subset) + (["연수구간"] if with_band else [])
+            use = in_band if with_band else np.ones(len(rows), dtype=bool)
+            gid = np.zeros(use.sum(), dtype=np.int64)
+            for c in cols:
+                gid = gid * sizes[c] + codes[c][use]
+            pair, first, inv = np.unique(gid * N_BUCKETS + buckets[use], return_index=True, return_inverse=True)
+            total = np.bincount(inv, weights=cnt[use]).astype(np.int64)
+            g = pair // N_BUCKETS
+            starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+            ends = np.r_[starts[1:], len(pair)]
+            src = rows[use][first[starts]]             # 그룹마다 라벨을 읽을 스케치 행
+            for s, e, row in zip(starts, ends, src):
+                cond = {k: labels[k][row] for k in subset}
+                band = labels["연수구간"][row] if with_band else None
+                groups.append((group_key(cond, band), bucket_value(pair[s:e] % N_BUCKETS), total[s:e]))
+    return groups
+
+
+def backoff_subsets(sketches):
+    """백오프가 거칠 수 있는 키 부분집합 (설명력 낮은 키부터 하나씩 제외 → 7개)."""
+    order = sorted(KEYS, key=lambda k: sketches.key_importance[k])
+    return [[k for k in KEYS if k not in order[:j]] for j in range(len(KEYS) + 1)]
+
+
+# =========================
+# 신뢰구간 표
+# =========================
+class IntervalTable:
+    """그룹 키 → 평균·P50·P75·P90 의 (하한, 상한)과 표본수. 데이터 버전과 함께 저장한다.
+
+    표본이 MIN_SAMPLES 개 미만인 그룹은 구간을 돌려주지 않는다 (재표본이 버킷 몇 개로 뭉쳐 의미가 없음).
+    """
+
+    def __init__(self, keys, intervals, counts, version=None, n_resamples=N_RESAMPLES):
+        self.keys = np.asarray(keys, dtype=str)
+        self.intervals = np.asarray(intervals, dtype=float).reshape(-1, len(STATS), 2)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.version = version
+        self.n_resamples = n_resamples
+        self._rows = {k: i for i, k in enumerate(self.keys)}
+
+    def _row(self, cond, band=None):
+        return self._rows.get(group_key({k: v for k, v in cond.items() if k in KEYS}, band))
+
+    def _at(self, i):
+        if i is None or self.counts[i] < MIN_SAMPLES:
+            return None
+        return {s: tuple(self.intervals[i, j]) for j, s in enumerate(STATS)}
+
+    def interval(self, cond, band=None):
+        """{"mean": (하한, 상한), "p50": ..., "p75": ..., "p90": ...} — 표본 없거나 적은 그룹은 None."""
+        return self._at(self._row(cond, band))
+
+    def backoff_interval(self, cond, dropped, band=None):
+        """backoff() 가 고른 통계와 같은 그룹의 구간 (연수 축까지 비어 전체로 내려간 경우 포함)."""
+        remaining = {k: v for k, v in cond.items() if k in KEYS and k not in dropped}
+        i = self._row(remaining, band)
+        return self._at(self._row({}) if i is None else i)
+
+    def save(self, path):
+        tmp = f"{path}.tmp{os.getpid()}.npz"   # 서버의 백그라운드 계산과 CLI 가 동시에 저장해도 안전하게
+        np.savez(tmp, keys=self.keys, intervals=self.intervals, counts=self.counts,
+                 version=np.array(self.version or ""), n_resamples=self.n_resamples)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            return cls(z["keys"], z["intervals"], z["counts"], str(z["version"]) or None, int(z["n_resamples"]))
+
+
+def compute(sketches, workers=None, n_resamples=N_RESAMPLES, seed=SEED, version=None):
+    """그룹 스케치 → IntervalTable. workers=1 이면 현재 프로세스에서 바로 계산.
+
+    청크 구성과 시드는 그룹 순서로만 정해지므로 워커 수와 무관하게 같은 결과가 나온다.
+    """
+    groups = subset_groups(sketches, backoff_subsets(sketches))
+    chunks = [(groups[i:i + CHUNK_GROUPS], n_resamples, seed) for i in range(0, len(groups), CHUNK_GROUPS)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) < 2:
+        parts = [_chunk_intervals(c) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            parts = list(pool.map(_chunk_intervals, chunks))
+    intervals = np.concatenate(parts) if parts else np.zeros((0, len(STATS), 2))
+    return IntervalTable([g[0] for g in groups], intervals, [g[2].sum() for g in groups], version, n_resamples)
+
+
+def _cache_path(data_path):
+    base_dir = os.path.join(os.path.dirname(os.path.abspath(data_path)), CACHE_DIR)
+    stem = os.path.splitext(os.path.basename(data_path))[0]
+    return base_dir, os.path.join(base_dir, f"{stem}.bootstrap.npz")
+
+
+def cache_mtime(data_path="data.xlsx"):
+    """저장된 표 파일의 수정 시각 (없으면 None) — 화면이 같은 파일을 매번 다시 읽지 않게."""
+    try:
+        return os.path.getmtime(_cache_path(data_path)[1])
+    except OSError:
+        return None
+
+
+def cached_intervals(data_path="data.xlsx", n_resamples=N_RESAMPLES):
+    """저장된 표가 현재 데이터 버전이면 그 표, 아니면 None (계산하지 않음 — 화면용)."""
+    try:
+        table = IntervalTable.load(_cache_path(data_path)[1])
+    except (OSError, KeyError, ValueError):
+        return None
+    if table.version == dataset_version(data_path) and table.n_resamples == n_resamples:
+        return table
+    return None
+
+
+def load_intervals(data_path="data.xlsx", workers=None, n_resamples=N_RESAMPLES):
+    """현재 데이터 버전의 신뢰구간 표. 저장된 표가 같은 버전이면 읽기만, 아니면 계산해 저장한다."""
+    table = cached_intervals(data_path, n_resamples)
+    if table is not None:
+        return table
+
+    base_dir, path = _cache_path(data_path)
+    table = compute(load_sketches(data_path), workers, n_resamples, version=dataset_version(data_path))
+    try:
+        os.makedirs(base_dir, exist_ok=True)
+        table.save(path)
+    except OSError:
+        pass
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="그룹별 부식률 부트스트랩 신뢰구간 사전 계산")
+    parser.add_argument("--data", default="data.xlsx", help="부식률 원본 데이터 (기본: data.xlsx)")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--resamples", type=int, default=N_RESAMPLES, help="그룹당 재표본 수")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    table = load_intervals(args.data, args.workers, args.resamples)
+    print(f"{len(table.keys):,}개 그룹 신뢰구간 ({LEVEL:.0%}, 재표본 {table.n_resamples:,}회) — "
+          f"{time.perf_counter() - t0:.2f}초 → {_cache_path(args.data)[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
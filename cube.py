@@ -0,0 +1,281 @@
+# cube.py — 조회조건 부분집합 × 사용연수 축 사전 집계 (roll-up lattice)
+#
+# 6개 조회조건의 모든 부분집합(64개)과 사용연수 축(없음/연수구간/5년 구간)의 조합마다
+# 표본수·합·제곱합·분위수(P50/P75/P90)를 데이터 버전당 한 번 계산해 둔다.
+# 화면의 평균/분위수/구간별 표, 전체 요약, 전기방식 비교는 모두 이 표의 조회가 된다.
+# 6개 키 전체 조합의 표본수는 조밀 배열로도 두어, ① 선택 목록의 값별 표본수(facets)를
+# 나머지 키를 고정한 1차원 조각으로 바로 읽는다.
+#
+# 전체 행 정렬은 한 번뿐이다: 부식률 순으로 한 번 정렬하고 가장 세밀한 그룹(6개 키 + 두 연수 축)을
+# 한 번 구한 뒤, 192개 조합의 표본수·합·제곱합은 세밀한 그룹을 합쳐(roll-up) 얻고,
+# 분위수는 부식률 순 행을 조합의 그룹 번호로 안정 기수정렬(O(n))해 그룹 안 순서를 그대로 얻는다.
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from rate_index import AGE_LABELS, KEYS, age_band, encode_columns
+
+AXES = [None, "연수구간", "사용연수구간"]
+QUANTILES = [0.5, 0.75, 0.9]
+
+
+def _empty_stats():
+    return {"count": 0, "mean": np.nan, "std": np.nan,
+            "p50": np.nan, "p75": np.nan, "p90": np.nan}
+
+
+def backoff(source, cond, axis=None, value=None, min_count=10):
+    """표본이 부족하면 설명력이 가장 낮은 키부터 하나씩 제외해 가며 통계를 찾는다.
+
+    source 는 stats(cond, axis, value) 와 key_importance 를 가진 통계원(집계표/스케치).
+    (통계, 제외한 키 목록) 을 돌려준다. 연수 축까지 비어 있으면 전체 통계로 내려간다.
+    """
+    remaining = {k: v for k, v in cond.items() if k in KEYS}
+    drop_order = sorted(remaining, key=lambda k: source.key_importance[k])
+    dropped = []
+    while True:
+        st = source.stats(remaining, axis, value)
+        if st["count"] >= min_count or not drop_order:
+            break
+        k = drop_order.pop(0)
+        del remaining[k]
+        dropped.append(k)
+    if st["count"] == 0:
+        st = source.stats({})
+    return st, dropped
+
+
+def eta_squared(labels, n, total, sumsq):
+    """그룹별 (표본수, 합, 제곱합) → 키별 설명력 η² (그룹간 제곱합 / 전체 제곱합)."""
+    N, S = n.sum(), total.sum()
+    ss_total = sumsq.sum() - S ** 2 / N
+    eta = {}
+    for k in KEYS:
+        _, inv = np.unique(labels[k], return_inverse=True)
+        n_k = np.bincount(inv, weights=n)
+        s_k = np.bincount(inv, weights=total)
+        ss_between = np.sum(s_k[n_k > 0] ** 2 / n_k[n_k > 0]) - S ** 2 / N
+        eta[k] = ss_between / ss_total if ss_total > 0 else 0.0
+    return eta
+
+
+def _stable_order(labels, n_groups):
+    """0..n_groups-1 라벨의 안정 정렬 순서. 16비트씩 기수정렬(numpy 의 uint16 안정 정렬)을 겹친다."""
+    order = np.argsort((labels & 0xFFFF).astype(np.uint16), kind="stable")
+    if n_groups > 0x10000:
+        order = order[np.argsort((labels[order] >> 16).astype(np.uint16), kind="stable")]
+    return order
+
+
+class _Cell:
+    """한 (키 부분집합, 연수 축) 조합의 그룹별 집계 (그룹 id 오름차순)."""
+
+    def __init__(self, ids, count, total, sumsq, rate_sorted):
+        # rate_sorted: 그룹 id 순, 그룹 안은 부식률 오름차순으로 늘어놓은 부식률
+        self.ids, self.count, self.sum, self.sumsq = ids, count, total, sumsq
+
+        # 그룹 내부가 정렬되어 있으므로 분위수는 위치 보간으로 한 번에 계산
+        starts = np.cumsum(count) - count
+        pos = starts[:, None] + np.asarray(QUANTILES)[None, :] * (count - 1)[:, None]
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, (starts + count - 1)[:, None])
+        self.quantiles = rate_sorted[lo] + (rate_sorted[hi] - rate_sorted[lo]) * (pos - lo)
+
+    @classmethod
+    def roll_up(cls, gid, fine, rate, n, total, sumsq):
+        """세밀한 그룹별 조합 그룹 id(gid) → 조합 집계.
+
+        fine 은 부식률 오름차순 행(rate)의 세밀한 그룹 번호, n/total/sumsq 는 세밀한 그룹별 집계.
+        """
+        ids, inv = np.unique(gid, return_inverse=True)
+        m = len(ids)
+        count = np.bincount(inv, weights=n, minlength=m).astype(np.int64)
+        labels = inv[fine]
+        return cls(ids, count,
+                   np.bincount(inv, weights=total, minlength=m),
+                   np.bincount(inv, weights=sumsq, minlength=m),
+                   rate[_stable_order(labels, m)] if m > 1 else rate)
+
+    def find(self, gid):
+        i = np.searchsorted(self.ids, gid)
+        return i if i < len(self.ids) and self.ids[i] == gid else None
+
+    def stats(self, i):
+        n = int(self.count[i])
+        mean = self.sum[i] / n
+        var = (self.sumsq[i] - n * mean ** 2) / (n - 1) if n > 1 else np.nan
+        p50, p75, p90 = self.quantiles[i]
+        return {"count": n, "mean": mean, "std": np.sqrt(max(var, 0.0)),
+                "p50": p50, "p75": p75, "p90": p90}
+
+
+class AggregationCube:
+    """모든 키 부분집합 × 연수 축의 그룹 통계 조회표."""
+
+    def __init__(self, df):
+        rate = df["부식률"].to_numpy(dtype=float)
+        valid = ~np.isnan(rate)
+        rate = rate[valid]
+
+        codes, self.categories = encode_columns(df)
+        codes = {k: c[valid] for k, c in codes.items()}
+        self.lookup = {k: {v: i for i, v in enumerate(c)} for k, c in self.categories.items()}
+        self.radix = {k: len(self.categories[k]) + 1 for k in KEYS}
+
+        # ---- 사용연수 축: 연수구간(4구간) / 5년 단위 구간 ----
+        age = df["사용연수"].to_numpy(dtype=float)[valid]
+        band = age_band(age).codes.astype(np.int64)
+        age5 = np.floor(age / 5) * 5
+        age5_values = np.unique(age5[~np.isnan(age5)])
+        self.axis_values = {
+            "연수구간": list(AGE_LABELS),
+            "사용연수구간": [int(v) for v in age5_values],
+        }
+        axis_codes = {
+            "연수구간": np.where(band < 0, len(AGE_LABELS), band),
+            "사용연수구간": np.where(np.isnan(age5), len(age5_values),
+                                   np.searchsorted(age5_values, age5)),
+        }
+
+        # ---- 가장 세밀한 그룹 (6개 키 + 두 연수 축): 전체 행 정렬은 여기서만 ----
+        axis_size = {a: len(self.axis_values[a]) + 1 for a in AXES[1:]}
+        fine = np.zeros(len(rate), dtype=np.int64)
+        for k in KEYS:
+            fine = fine * self.radix[k] + codes[k]
+        for a in AXES[1:]:
+            fine = fine * axis_size[a] + axis_codes[a]
+        by_rate = np.argsort(rate, kind="stable")
+        rate = rate[by_rate]
+        fine_ids, fine = np.unique(fine[by_rate], return_inverse=True)
+        n = np.bincount(fine, minlength=len(fine_ids)).astype(float)
+        total = np.bincount(fine, weights=rate, minlength=len(fine_ids))
+        sumsq = np.bincount(fine, weights=rate ** 2, minlength=len(fine_ids))
+
+        # 세밀한 그룹 id → 키/축별 코드
+        fine_codes, rest = {}, fine_ids
+        for a in reversed(AXES[1:]):
+            fine_codes[a] = rest % axis_size[a]
+            rest = rest // axis_size[a]
+        for k in reversed(KEYS):
+            fine_codes[k] = rest % self.radix[k]
+            rest = rest // self.radix[k]
+
+        # ---- 격자 전체 집계 (세밀한 그룹을 합쳐 올림) ----
+        self.cells = {}
+        for r in range(len(KEYS) + 1):
+            for keys in combinations(KEYS, r):
+                gid = np.zeros(len(fine_ids), dtype=np.int64)
+                for k in keys:
+                    gid = gid * self.radix[k] + fine_codes[k]
+                for axis in AXES:
+                    g = gid if axis is None else gid * axis_size[axis] + fine_codes[axis]
+                    self.cells[(keys, axis)] = _Cell.roll_up(g, fine, rate, n, total, sumsq)
+
+        self.key_importance = self._key_importance()
+
+        # 6개 키 전체 그룹 id 는 KEYS 순 혼합 진법이므로 그대로 조밀 배열의 평탄 위치가 된다
+        full = self.cells[(tuple(KEYS), None)]
+        self.count_array = np.zeros([self.radix[k] for k in KEYS], dtype=np.int64)
+        self.count_array.flat[full.ids] = full.count
+
+    # =========================
+    # 키 변환
+    # =========================
+    def _gid(self, cond, axis=None, value=None):
+        keys = tuple(k for k in KEYS if k in cond)
+        gid = 0
+        for k in keys:
+            code = self.lookup[k].get(cond[k])
+            if code is None:
+                return keys, None
+            gid = gid * self.radix[k] + code
+        if axis is not None:
+            values = self.axis_values[axis]
+            if value not in values:
+                return keys, None
+            gid = gid * (len(values) + 1) + values.index(value)
+        return keys, gid
+
+    def _key_importance(self):
+        """키별 설명력 η² — 백오프 시 낮은 키부터 제외 (6개 키 전체 그룹에서 계산)."""
+        cell = self.cells[(tuple(KEYS), None)]
+        codes, rest = {}, cell.ids
+        for k in reversed(KEYS):
+            codes[k] = rest % self.radix[k]
+            rest = rest // self.radix[k]
+        return eta_squared(codes, cell.count, cell.sum, cell.sumsq)
+
+    # =========================
+    # 조회
+    # =========================
+    def stats(self, cond, axis=None, value=None):
+        """조건(키 일부만 있어도 됨) + 연수 축 값의 통계 dict."""
+        keys, gid = self._gid(cond, axis, value)
+        if gid is None:
+            return _empty_stats()
+        cell = self.cells[(keys, axis)]
+        i = cell.find(gid)
+        return _empty_stats() if i is None else cell.stats(i)
+
+    def backoff(self, cond, axis=None, value=None, min_count=10):
+        return backoff(self, cond, axis, value, min_count)
+
+    def facets(self, cond):
+        """키별 값 → 표본수 dict. 각 키는 cond 의 나머지 키 값으로 고정했을 때의 표본수 (표본 있는 값만).
+
+        cond 에 없는 키는 전체로 합산한다. 배열 조각 6개를 읽는 것뿐이라 수십 µs.
+        """
+        index = []
+        for k in KEYS:
+            if k in cond:
+                code = self.lookup[k].get(cond[k])
+                if code is None:
+                    return {k: {} for k in KEYS}
+                index.append(code)
+            else:
+                index.append(slice(None))
+
+        out = {}
+        for i, k in enumerate(KEYS):
+            sub = self.count_array[tuple(index[:i] + [slice(None)] + index[i + 1:])]
+            # 남은 축 = 조각의 축 중 cond 에 없는 다른 키 → 합산해 k 축만 남긴다
+            free = [j for j in range(len(KEYS)) if j == i or isinstance(index[j], slice)]
+            if len(free) > 1:
+                sub = sub.sum(axis=tuple(a for a, j in enumerate(free) if j != i))
+            counts = sub[:-1]            # 마지막 칸 = 결측 라벨
+            nz = np.flatnonzero(counts)
+            out[k] = dict(zip((self.categories[k][c] for c in nz), counts[nz].tolist()))
+        return out
+
+    def breakdown(self, cond, axis):
+        """조건 고정, 연수 축 값별 [축, 평균부식률, 표본수] 표 (표본 있는 구간만)."""
+        rows = []
+        for value in self.axis_values[axis]:
+            st = self.stats(cond, axis, value)
+            if st["count"]:
+                rows.append({axis: value, "평균부식률": st["mean"], "표본수": st["count"]})
+        return pd.DataFrame(rows, columns=[axis, "평균부식률", "표본수"])
+
+    def table(self, keys, axis=None):
+        """키(및 연수 축) 전체 그룹의 [라벨..., 평균부식률, 표본수] 표 (라벨 정렬 순)."""
+        keys = tuple(k for k in KEYS if k in keys)
+        cell = self.cells[(keys, axis)]
+
+        labels, rest = {}, cell.ids.copy()
+        if axis is not None:
+            values = self.axis_values[axis] + [None]
+            size = len(values)
+            labels[axis] = [values[c] for c in rest % size]
+            rest = rest // size
+        for k in reversed(keys):
+            cats = self.categories[k] + [None]
+            labels[k] = [cats[c] for c in rest % self.radix[k]]
+            rest = rest // self.radix[k]
+
+        out = pd.DataFrame({c: labels[c] for c in list(keys) + ([axis] if axis else [])})
+        out["평균부식률"] = cell.sum / cell.count
+        out["표본수"] = cell.count
+        if axis == "연수구간":
+            out[axis] = pd.Categorical(out[axis], categories=AGE_LABELS, ordered=True)
+        return out
@@ -0,0 +1,180 @@
+# engine.py — 탱크 평가 계산 (대표부식률 / 11년 예측 / 잔여수명 / 위험지수)
+#
+# 화면의 ③ 향후 부식 예측과 분석탭의 위험지수 계산을 NumPy 배열 연산으로 옮긴 것.
+# 한 대든 10만 대든 같은 함수로 한 번에 계산한다.
+import numpy as np
+import pandas as pd
+
+from rate_index import KEYS, RATE_FLOOR, age_band
+from validate import normalize_labels
+
+ALLOWABLE = 3.2          # 허용두께(mm)
+HORIZON = 11             # 예측 기간(년)
+MIN_SAMPLES = 10         # ③ 동일 구간 최소 표본수
+
+RATE_MODES = {
+    "평균": "mean",
+    "중위수(P50)": "p50",
+    "상위 75% (보수)": "p75",
+    "상위 90% (매우 보수)": "p90",
+}
+
+INPUT_COLUMNS = KEYS + ["설계두께", "측정두께", "사용연수"]
+# assess_fleet 가 붙이는 평가 컬럼까지 (batch.py / api.py 결과의 컬럼)
+RESULT_COLUMNS = INPUT_COLUMNS + ["연수구간", "내부식률", "대표부식률", "표본수", "상위조건보정",
+                                  f"예상두께({HORIZON}년)", "판정", "잔여수명(년)", "위험지수", "위험등급"]
+INPUT_ERROR = "입력오류"  # 판정 대신: 수치 결측·0 이하, 측정두께 > 설계두께, 연수구간 밖 사용연수
+
+GRADES = [
+    (30, "A (안전)", "#0f9d58"),
+    (55, "B (주의)", "#f4b400"),
+    (80, "C (경계)", "#db4437"),
+    (np.inf, "D (위험)", "#a50e0e"),
+]
+
+
+# =========================
+# 단위 계산 (배열/스칼라 공용)
+# =========================
+def tank_rate(설계두께, 측정두께, 사용연수):
+    """내 탱크 부식률 (mm/년). 입력이 하나라도 0 이하이면 NaN."""
+    설계두께, 측정두께, 사용연수 = (np.asarray(x, dtype=float) for x in (설계두께, 측정두께, 사용연수))
+    ok = (설계두께 > 0) & (측정두께 > 0) & (사용연수 > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ok, (설계두께 - 측정두께) / 사용연수, np.nan)
+
+
+def predict(측정두께, 대표부식률, horizon=HORIZON):
+    """(예상부식량, 예상두께, 판정 적합 여부, 기대수명)."""
+    측정두께 = np.asarray(측정두께, dtype=float)
+    rate = np.maximum(np.asarray(대표부식률, dtype=float), RATE_FLOOR)
+    예상부식량 = rate * horizon
+    예상두께 = 측정두께 - 예상부식량
+    기대수명 = (측정두께 - ALLOWABLE) / rate
+    return 예상부식량, 예상두께, 예상두께 >= ALLOWABLE, 기대수명
+
+
+def risk_index(my_rate, my_thk, mean_r):
+    """분석탭 위험지수 (절대 40 + 상대 30 + 미래 30, 최대 100)."""
+    my_rate = np.asarray(my_rate, dtype=float)
+    my_thk = np.asarray(my_thk, dtype=float)
+    mean_r = np.maximum(np.asarray(mean_r, dtype=float), RATE_FLOOR)
+
+    margin = my_thk - ALLOWABLE
+    abs_score = np.minimum(40, np.maximum(0, 5 - margin) / 5 * 40)
+    rel_score = np.minimum(30, my_rate / mean_r * 15)
+
+    pred20 = my_thk - my_rate * 20
+    fut_score = np.where(pred20 <= ALLOWABLE, 30, np.maximum(0, (10 - pred20) * 3))
+
+    return np.minimum(abs_score + rel_score + fut_score, 100)
+
+
+def risk_grade(total):
+    """위험지수 → 등급 인덱스 (GRADES 순서)."""
+    bounds = np.array([b for b, _, _ in GRADES[:-1]])
+    return np.searchsorted(bounds, np.asarray(total, dtype=float), side="right")
+
+
+# =========================
+# 조건별 대표값 (집계표 조회)
+# =========================
+def representative_rate(source, cond, band, mode="평균"):
+    """③ 대표부식률: 동일 조건·연수구간 통계 (표본 부족 시 백오프).
+
+    source 는 backoff() 를 가진 통계원 (AggregationCube 또는 GroupSketches).
+    부식률 하한은 적재 시(validate.py) 행 단위로 적용되어 있으므로 통계값도 하한 이상이다.
+    (대표부식률, 사용한 통계 dict, 제외한 키 목록) 을 돌려준다.
+    연수구간이 없으면(사용연수 결측·범위 밖) ValueError — 백오프가 키를 모두 빼고 전체 통계로
+    내려가 버리므로, 호출하는 쪽에서 입력 오류로 처리한다.
+    """
+    if band is None or pd.isna(band):
+        raise ValueError("연수구간이 없습니다 (사용연수 결측 또는 범위 밖)")
+    stats, dropped = source.backoff(cond, "연수구간", band, min_count=MIN_SAMPLES)
+    return stats[RATE_MODES[mode]], stats, dropped
+
+
+def group_mean_rate(source, cond):
+    """위험지수 상대점수 기준: 동일 조건 전체 연수 평균 (없으면 백오프)."""
+    stats, _ = source.backoff(cond, min_count=1)
+    return stats["mean"]
+
+
+# =========================
+# 일괄 평가
+# =========================
+def read_tank_list(source, name=None):
+    """탱크 목록 파일(CSV/Excel) 읽기. source는 경로 또는 파일 객체."""
+    name = name or str(source)
+    if name.lower().endswith(".csv"):
+        return pd.read_csv(source, encoding="utf-8-sig")
+    return pd.read_excel(source, engine="openpyxl")
+
+
+def group_lookup(tanks, fn):
+    """동일 조건(및 연수구간) 탱크끼리 묶어 조합당 한 번만 집계표를 조회한다.
+
+    tanks 는 KEYS 와 연수구간 컬럼이 있는 DataFrame, fn(cond, band) 는 조합당 한 번 불린다.
+    (조합별 결과 목록, 행별 조합 번호) 를 돌려준다 — 행 값은 results[gid[i]].
+    """
+    cols = KEYS + ["연수구간"]
+    gid = tanks.groupby(cols, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    first = np.unique(gid, return_index=True)[1]
+    results = [fn({k: row[k] for k in KEYS}, row["연수구간"])
+               for row in tanks.iloc[first][cols].to_dict("records")]
+    return results, gid
+
+
+def input_errors(out):
+    """평가할 수 없는 행 마스크: 수치가 결측·0 이하, 측정두께 > 설계두께, 연수구간 없음."""
+    numbers = out[["설계두께", "측정두께", "사용연수"]].to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        bad = ~(np.isfinite(numbers) & (numbers > 0)).all(axis=1) | (numbers[:, 1] > numbers[:, 0])
+    return bad | out["연수구간"].isna().to_numpy()
+
+
+def assess_fleet(source, tanks, mode="평균"):
+    """탱크 목록(DataFrame) 전체를 한 번에 평가해 결과 컬럼을 붙여 돌려준다.
+
+    평가할 수 없는 행(input_errors)은 판정이 INPUT_ERROR, 계산 컬럼은 NaN 이다.
+    """
+    missing = [c for c in INPUT_COLUMNS if c not in tanks.columns]
+    if missing:
+        raise ValueError(f"필수 컬럼 누락: {', '.join(missing)}")
+    if mode not in RATE_MODES:
+        raise ValueError(f"알 수 없는 산정 방식: {mode}")
+
+    # 업로드 목록도 원본·델타와 같은 표기로 (유/무, 전각, 소문자 재질 등)
+    out, _ = normalize_labels(tanks)
+    for c in ["설계두께", "측정두께", "사용연수"]:
+        out[c] = pd.to_numeric(out[c], errors="coerce")
+    out["연수구간"] = age_band(out["사용연수"].to_numpy(dtype=float))
+
+    # ---- 조합별 대표부식률 (③과 동일한 백오프) + 동일 조건 평균 (위험지수 상대점수) ----
+    def lookup(cond, band):
+        if pd.isna(band):
+            return np.nan, 0, "", np.nan
+        rate, stats, dropped = representative_rate(source, cond, band, mode)
+        return rate, stats["count"], "·".join(dropped), group_mean_rate(source, cond)
+
+    results, gid = group_lookup(out, lookup)
+    대표, 표본, 보정, 조건평균 = (np.array(v, dtype=object)[gid] for v in zip(*results))
+
+    오류 = input_errors(out)
+    대표부식률 = 대표.astype(float)
+    내부식률 = np.where(오류, np.nan, tank_rate(out["설계두께"], out["측정두께"], out["사용연수"]))
+    예상부식량, 예상두께, 적합, 기대수명 = predict(out["측정두께"], 대표부식률)
+    예상두께, 기대수명 = np.where(오류, np.nan, 예상두께), np.where(오류, np.nan, 기대수명)
+    risk = risk_index(내부식률, out["측정두께"], 조건평균.astype(float))
+
+    out["내부식률"] = 내부식률
+    out["대표부식률"] = 대표부식률
+    out["표본수"] = 표본.astype(int)
+    out["상위조건보정"] = 보정
+    out[f"예상두께({HORIZON}년)"] = 예상두께
+    out["판정"] = np.where(오류, INPUT_ERROR, np.where(적합, "적합", "부적합"))
+    out["잔여수명(년)"] = np.maximum(기대수명, 0)
+    out["위험지수"] = risk
+    grade = np.array([g for _, g, _ in GRADES], dtype=object)[risk_grade(np.nan_to_num(risk))]
+    out["위험등급"] = np.where(np.isnan(risk), "-", grade)
+    return out
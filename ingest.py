@@ -0,0 +1,138 @@
+# ingest.py — 신규 점검자료(델타) 적재 + 그룹 스케치 증분 갱신
+#
+# 사용 예:
+#   python ingest.py 2024_4분기.xlsx 2025_1분기.csv
+#
+# 델타는 원본 옆 <이름>_deltas/ 폴더에 Parquet 로 쌓이고, 그룹 스케치 상태는
+# .cache/<이름>.sketch.npz 에 저장된다. 적재 비용은 델타 크기에만 비례한다
+# (이미 반영된 원본/델타는 다시 읽지 않음). 원본 워크북이 바뀌면 스케치를 다시 만든다.
+# 델타도 원본과 같은 검증·정규화(validate.py)를 거친 뒤 저장한다.
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from loader import (CACHE_DIR, DROP_COLUMNS, base_version, delta_dir, delta_files,
+                    load_base)
+from rate_index import KEYS
+from sketch import GroupSketches
+from validate import format_report, validate
+
+REQUIRED_COLUMNS = KEYS + ["사용연수", "부식률"]
+
+
+def _sketch_paths(data_path):
+    base_dir = os.path.join(os.path.dirname(os.path.abspath(data_path)), CACHE_DIR)
+    stem = os.path.splitext(os.path.basename(data_path))[0]
+    return (
+        base_dir,
+        os.path.join(base_dir, f"{stem}.sketch.npz"),
+        os.path.join(base_dir, f"{stem}.sketch.json"),
+    )
+
+
+def _read_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save(sk, data_path, deltas):
+    base_dir, npz_path, manifest_path = _sketch_paths(data_path)
+    try:
+        os.makedirs(base_dir, exist_ok=True)
+        sk.save(npz_path)
+        tmp = f"{manifest_path}.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"base": base_version(data_path),
+                       "deltas": [os.path.basename(d) for d in deltas]}, f, ensure_ascii=False)
+        os.replace(tmp, manifest_path)
+    except OSError:
+        pass
+
+
+def load_sketches(data_path="data.xlsx"):
+    """현재 원본 + 델타를 반영한 그룹 스케치. 새 델타만 증분 반영한다."""
+    _, npz_path, manifest_path = _sketch_paths(data_path)
+    manifest = _read_manifest(manifest_path)
+    deltas = delta_files(data_path)
+    names = [os.path.basename(d) for d in deltas]
+
+    if (manifest and manifest.get("base") == base_version(data_path)
+            and names[:len(manifest["deltas"])] == manifest["deltas"]
+            and os.path.exists(npz_path)):
+        sk = GroupSketches.load(npz_path)
+        pending = deltas[len(manifest["deltas"]):]
+        if not pending:
+            return sk
+    else:
+        # 원본이 바뀌었거나 상태가 없음: 처음부터 다시 만든다
+        sk = GroupSketches().update(load_base(data_path))
+        pending = deltas
+
+    for d in pending:
+        sk.update(pd.read_parquet(d))
+    _save(sk, data_path, deltas)
+    return sk
+
+
+def read_inspections(path):
+    """델타 파일(CSV/Excel) 읽기 + 원본과 같은 검증·정규화 → (정리된 DataFrame, 품질 보고서)."""
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path, encoding="utf-8-sig")
+    else:
+        df = pd.read_excel(path, engine="openpyxl")
+    df = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"필수 컬럼 누락: {', '.join(missing)}")
+    df, report, _ = validate(df)
+    return df, report
+
+
+def append_delta(path, data_path="data.xlsx"):
+    """점검자료 파일 하나를 델타로 적재하고 스케치를 갱신한다. 품질 보고서를 돌려준다."""
+    df, report = read_inspections(path)
+    d = delta_dir(data_path)
+    os.makedirs(d, exist_ok=True)
+
+    # 파일명 = 적재 시각 + 내용 해시 (정렬 순서 = 적재 순서)
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).values).hexdigest()[:12]
+    if any(name.endswith(f"-{digest}.parquet") for name in os.listdir(d)):
+        raise ValueError("이미 적재된 자료입니다")
+    dest = os.path.join(d, f"{time.time_ns():020d}-{digest}.parquet")
+    tmp = f"{dest}.tmp{os.getpid()}"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, dest)
+
+    load_sketches(data_path)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="신규 점검자료 적재 (델타 + 스케치 증분 갱신)")
+    parser.add_argument("files", nargs="+", help="점검자료 파일 (CSV / Excel)")
+    parser.add_argument("--data", default="data.xlsx", help="원본 데이터 (기본: data.xlsx)")
+    args = parser.parse_args(argv)
+
+    for path in args.files:
+        t0 = time.perf_counter()
+        try:
+            report = append_delta(path, args.data)
+        except ValueError as e:
+            print(f"{path}: 오류 — {e}", file=sys.stderr)
+            return 1
+        print(f"{path}: {report['rows_out']:,}행 적재 ({time.perf_counter() - t0:.2f}초)")
+        print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
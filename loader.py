@@ -0,0 +1,250 @@
+# loader.py — data.xlsx 컬럼형 스냅샷 캐시
+#
+# openpyxl로 엑셀을 파싱하는 것이 페이지에서 가장 느린 단계이므로,
+# 원본 워크북을 한 번만 Parquet 스냅샷으로 변환해 두고 이후에는 스냅샷을 읽는다.
+# 원본의 mtime/크기가 바뀌면 해시를 비교해 실제로 내용이 바뀐 경우에만 재변환한다.
+# 변환할 때 validate.validate 로 형 변환·라벨 정규화·하한 적용·오류 행 제외를 한 번 하고,
+# 품질 보고서를 스냅샷 옆(<이름>.quality.json)에 남긴다.
+# 화면은 load_shared() 로 여는 읽기 전용 메모리 맵 데이터셋을 프로세스 전체가 공유한다.
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from rate_index import KEYS
+from validate import validate, write_report
+
+CACHE_DIR = ".cache"
+SHEET_NAME = "Sheet1"
+DROP_COLUMNS = ["사용연수.1"]
+
+# 공유 데이터셋의 측정값 컬럼 (float32 로 보관)
+MEASURE_COLUMNS = ["사용연수", "설계두께", "측정두께", "부식률"]
+
+# 변환 규칙이 바뀌면 올려서 기존 스냅샷을 무효화한다 (2: 적재 시 검증·정규화)
+SNAPSHOT_VERSION = 2
+
+
+# =========================
+# 경로 / 원본 서명
+# =========================
+def _snapshot_paths(path):
+    base_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return (
+        base_dir,
+        os.path.join(base_dir, f"{stem}.parquet"),
+        os.path.join(base_dir, f"{stem}.meta.json"),
+    )
+
+
+def quality_path(path):
+    base_dir, snap_path, _ = _snapshot_paths(path)
+    return os.path.splitext(snap_path)[0] + ".quality.json"
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json_atomic(obj, dest):
+    tmp = f"{dest}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+    os.replace(tmp, dest)
+
+
+# =========================
+# 변환 / 로드
+# =========================
+def read_workbook(path):
+    """원본 엑셀을 직접 파싱한다 (느린 경로)."""
+    df = pd.read_excel(path, sheet_name=SHEET_NAME, engine="openpyxl")
+    return df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+
+
+def build_snapshot(path):
+    """워크북을 파싱·검증해 정리된 Parquet 스냅샷, 메타데이터, 품질 보고서를 새로 쓴다."""
+    df, report, _ = validate(read_workbook(path))
+    base_dir, snap_path, meta_path = _snapshot_paths(path)
+
+    try:
+        os.makedirs(base_dir, exist_ok=True)
+        tmp = f"{snap_path}.tmp{os.getpid()}"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, snap_path)
+        write_report(report, quality_path(path))
+        _write_json_atomic({
+            "version": SNAPSHOT_VERSION,
+            "source": _source_signature(path),
+            "sha256": _file_hash(path),
+        }, meta_path)
+    except OSError:
+        # 읽기 전용 배포 환경 등: 캐시 없이 파싱 결과만 사용
+        pass
+
+    return df
+
+
+def read_quality(path="data.xlsx"):
+    """마지막 스냅샷 변환 때의 품질 보고서 dict (없으면 None)."""
+    return _read_meta(quality_path(path))
+
+
+def base_version(path="data.xlsx"):
+    """원본 워크북 서명 문자열 (stat 한 번)."""
+    sig = _source_signature(path)
+    return f"{SNAPSHOT_VERSION}-{sig['mtime_ns']}-{sig['size']}"
+
+
+def dataset_version(path="data.xlsx"):
+    """원본 + 누적 델타 서명 — 색인/집계 캐시의 키로 사용한다."""
+    deltas = delta_files(path)
+    last = os.path.basename(deltas[-1]) if deltas else ""
+    return f"{base_version(path)}-{len(deltas)}-{last}"
+
+
+def load_base(path="data.xlsx"):
+    """스냅샷이 유효하면 스냅샷을, 아니면 워크북을 변환해 DataFrame을 돌려준다."""
+    _, snap_path, meta_path = _snapshot_paths(path)
+    meta = _read_meta(meta_path)
+
+    if meta and meta.get("version") == SNAPSHOT_VERSION and os.path.exists(snap_path):
+        signature = _source_signature(path)
+        if meta.get("source") == signature:
+            return pd.read_parquet(snap_path)
+
+        # mtime만 바뀐 경우(복사/체크아웃 등): 내용이 같으면 서명만 갱신
+        if meta.get("sha256") == _file_hash(path):
+            meta["source"] = signature
+            try:
+                _write_json_atomic(meta, meta_path)
+            except OSError:
+                pass
+            return pd.read_parquet(snap_path)
+
+    return build_snapshot(path)
+
+
+# =========================
+# 추가 점검자료 (델타)
+# =========================
+def delta_dir(path="data.xlsx"):
+    """델타 보관 폴더: 원본 옆 <이름>_deltas/ (캐시가 아닌 원자료이므로 .cache 밖에 둔다)."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(path)), f"{stem}_deltas")
+
+
+def delta_files(path="data.xlsx"):
+    """적재 순서(파일명 = 적재 시각)대로 정렬된 델타 Parquet 목록."""
+    d = delta_dir(path)
+    if not os.path.isdir(d):
+        return []
+    return sorted(os.path.join(d, f) for f in os.listdir(d) if f.endswith(".parquet"))
+
+
+def load_data(path="data.xlsx"):
+    """원본 스냅샷 + 누적 델타 전체."""
+    base = load_base(path)
+    deltas = [pd.read_parquet(f) for f in delta_files(path)]
+    if not deltas:
+        return base
+    return pd.concat([base] + deltas, ignore_index=True)
+
+
+# =========================
+# 프로세스 공유 데이터셋 (읽기 전용 메모리 맵)
+# =========================
+def compact(df):
+    """6개 키 → category, 측정값 → float32 인 압축 DataFrame (그 외 컬럼은 제외).
+    입력은 검증을 거친 자료(숫자형)라고 가정한다."""
+    out = {}
+    for c in KEYS:
+        out[c] = df[c].astype("category")
+    for c in MEASURE_COLUMNS:
+        if c in df.columns:
+            out[c] = df[c].to_numpy(dtype=np.float32)
+    return pd.DataFrame(out)
+
+
+def _shared_root(path):
+    base_dir, _, _ = _snapshot_paths(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(base_dir, f"{stem}.shared")
+
+
+def export_columns(df, dest):
+    """컬럼별 .npy (범주는 코드 배열) + columns.json 을 임시 폴더에 쓴 뒤 이름을 바꾼다."""
+    tmp = f"{dest}.tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    columns = []
+    for i, c in enumerate(df.columns):
+        col = df[c]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(tmp, f"{i}.npy"), col.cat.codes.to_numpy())
+            columns.append({"name": c, "categories": [str(v) for v in col.cat.categories]})
+        else:
+            np.save(os.path.join(tmp, f"{i}.npy"), col.to_numpy())
+            columns.append({"name": c})
+    _write_json_atomic(columns, os.path.join(tmp, "columns.json"))
+    try:
+        os.rename(tmp, dest)
+    except OSError:
+        # 다른 프로세스가 먼저 내보낸 경우: 그쪽을 사용
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def open_columns(dest):
+    """export_columns 로 내보낸 폴더를 메모리 맵으로 연다 (읽기 전용 DataFrame)."""
+    with open(os.path.join(dest, "columns.json"), encoding="utf-8") as f:
+        columns = json.load(f)
+    data = {}
+    for i, col in enumerate(columns):
+        arr = np.load(os.path.join(dest, f"{i}.npy"), mmap_mode="r")
+        if "categories" in col:
+            arr = pd.Categorical.from_codes(arr, dtype=pd.CategoricalDtype(col["categories"]))
+        data[col["name"]] = arr
+    # copy=False: 컬럼이 메모리 맵을 그대로 참조 (쓰기 시도는 오류)
+    return pd.DataFrame(data, copy=False)
+
+
+def load_shared(path="data.xlsx"):
+    """원본+델타의 압축 사본을 버전별로 한 번 내보내고 메모리 맵으로 연다.
+
+    같은 서버의 여러 프로세스가 같은 페이지 캐시를 공유한다. 돌려주는 DataFrame 은 읽기 전용.
+    """
+    root = _shared_root(path)
+    dest = os.path.join(root, dataset_version(path))
+    if not os.path.exists(os.path.join(dest, "columns.json")):
+        df = compact(load_data(path))
+        try:
+            os.makedirs(root, exist_ok=True)
+            export_columns(df, dest)
+        except OSError:
+            # 읽기 전용 배포 환경: 프로세스 안의 압축본만 사용
+            return df
+        # 이전 버전 정리 (이미 열어 둔 프로세스의 매핑은 유지된다)
+        for name in os.listdir(root):
+            if name != os.path.basename(dest) and ".tmp" not in name:
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return open_columns(dest)
@@ -0,0 +1,125 @@
+# montecarlo.py — 확률적 잔여수명 (Monte Carlo)
+#
+# 대표부식률 하나 대신, 같은 조건·연수구간 표본의 경험분포(그룹 스케치)에서 부식률을 n회 뽑아
+# 연도별 허용두께(3.2mm) 미달 확률과 잔여수명 분포를 구한다.
+# n회 독립 추출의 값별 횟수는 다항분포를 따르므로 rng.multinomial 한 번으로 뽑는다
+# (추출 결과의 분포는 같고, 비용은 추출 수가 아니라 분포의 값 개수에 비례).
+# 시드는 (기본 시드, 조건, 연수구간) 에서 만들어 화면과 일괄평가, 청크 분할과 무관하게 같은 결과가 나온다.
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from engine import ALLOWABLE, HORIZON, INPUT_ERROR, MIN_SAMPLES, assess_fleet, group_lookup
+from rate_index import KEYS, RATE_FLOOR
+
+N_DRAWS = 1_000_000      # 한 대 평가 시 추출 수
+FLEET_DRAWS = 100_000    # 일괄평가 시 조합당 추출 수
+YEARS = 20               # 확률 계산 기간 (분석탭 20년 예측과 동일)
+SEED = 0
+LIFE_QUANTILES = [0.1, 0.5, 0.9]
+
+
+def group_distribution(source, cond, band=None):
+    """③과 같은 백오프로 고른 경험분포 → (값, 확률, 표본수, 제외한 키 목록)."""
+    axis = None if band is None else "연수구간"
+    stats, dropped = source.backoff(cond, axis, band, min_count=MIN_SAMPLES)
+    remaining = {k: v for k, v in cond.items() if k in KEYS and k not in dropped}
+    values, probs = source.distribution(remaining, axis, band)
+    if not len(values):
+        # 연수 축까지 비어 전체 통계로 내려간 경우 (backoff 와 동일)
+        values, probs = source.distribution({})
+    return values, probs, stats["count"], dropped
+
+
+def _rng(cond, band, seed):
+    key = "|".join(str(cond.get(k)) for k in KEYS) + f"|{band}"
+    return np.random.default_rng([seed, zlib.crc32(key.encode("utf-8"))])
+
+
+def draw_counts(probs, n_draws, rng):
+    """n_draws 회 추출했을 때 값별 추출 횟수."""
+    return rng.multinomial(n_draws, probs)
+
+
+def exceed_probability(margin, values, counts, years):
+    """연도별 허용두께 미달 확률 P(부식률 × t > 여유두께) — (탱크 수, 연도 수) 배열."""
+    margin = np.atleast_1d(np.asarray(margin, dtype=float))
+    years = np.asarray(years, dtype=float)
+    cum = np.concatenate([[0], np.cumsum(counts)])
+    threshold = margin[:, None] / years[None, :]
+    below = cum[np.searchsorted(values, threshold, side="right")]
+    return 1 - below / cum[-1]
+
+
+def life_quantiles(margin, values, counts, q=LIFE_QUANTILES):
+    """잔여수명 분위수 (탱크 수, 분위 수). 수명 = 여유두께 / 부식률 은 부식률의 감소함수이므로
+    수명의 q 분위 = 여유두께 / 부식률의 (1-q) 분위."""
+    margin = np.atleast_1d(np.asarray(margin, dtype=float))
+    cum = np.cumsum(counts)
+    rank = np.ceil((1 - np.asarray(q, dtype=float)) * cum[-1])
+    rate_q = values[np.minimum(np.searchsorted(cum, np.maximum(rank, 1)), len(values) - 1)]
+    return np.maximum(margin[:, None] / np.maximum(rate_q, RATE_FLOOR)[None, :], 0)
+
+
+def life_histogram(margin, values, counts, years=YEARS):
+    """한 대의 잔여수명 분포: 0..years-1 년 구간별 확률 + 마지막 칸은 years 년 이상."""
+    edges = np.arange(years + 1, dtype=float)
+    p = exceed_probability(margin, values, counts, edges[1:])[0]
+    return np.diff(np.concatenate([[0], p, [1]]))
+
+
+def simulate(source, cond, band, 측정두께, n_draws=N_DRAWS, years=YEARS, seed=SEED):
+    """한 대의 확률적 잔여수명 dict.
+
+    years: 1..years 년, p_below: 연도별 미달 확률, life: 수명 P10/P50/P90,
+    life_hist: 연 단위 수명 분포, count/dropped: 사용한 표본수와 백오프로 제외한 키.
+    """
+    values, probs, count, dropped = group_distribution(source, cond, band)
+    counts = draw_counts(probs, n_draws, _rng(cond, band, seed))
+    margin = 측정두께 - ALLOWABLE
+    t = np.arange(1, years + 1)
+    return {
+        "years": t,
+        "p_below": exceed_probability(margin, values, counts, t)[0],
+        "life": dict(zip(["p10", "p50", "p90"], life_quantiles(margin, values, counts)[0])),
+        "life_hist": life_histogram(margin, values, counts, years),
+        "count": count,
+        "dropped": dropped,
+        "n_draws": n_draws,
+    }
+
+
+def assess_fleet_mc(source, tanks, mode="평균", n_draws=FLEET_DRAWS, years=YEARS, seed=SEED):
+    """engine.assess_fleet 결과에 확률 컬럼을 더한다 (조합당 한 번 추출, 탱크끼리 공유)."""
+    out = assess_fleet(source, tanks, mode)
+    margin = out["측정두께"].to_numpy(dtype=float) - ALLOWABLE
+    check_years = np.array([HORIZON, years])
+
+    def draw(cond, band):
+        if pd.isna(band):          # 연수구간 밖 — assess_fleet 가 입력오류로 표시한 행
+            return None
+        values, probs, _, _ = group_distribution(source, cond, band)
+        return values, draw_counts(probs, n_draws, _rng(cond, band, seed))
+
+    draws, gid = group_lookup(out, draw)
+    p_below = np.full((len(out), 2), np.nan)
+    life = np.full((len(out), len(LIFE_QUANTILES)), np.nan)
+    order = np.argsort(gid, kind="stable")
+    starts = np.searchsorted(gid[order], np.arange(len(draws) + 1))
+    for g, drawn in enumerate(draws):
+        if drawn is None:
+            continue
+        values, counts = drawn
+        rows = order[starts[g]:starts[g + 1]]
+        p_below[rows] = exceed_probability(margin[rows], values, counts, check_years)
+        life[rows] = life_quantiles(margin[rows], values, counts)
+
+    nan = np.isnan(margin) | (out["판정"] == INPUT_ERROR).to_numpy()
+    p_below[nan] = np.nan
+    life[nan] = np.nan
+    out[f"미달확률({HORIZON}년)"] = p_below[:, 0]
+    out[f"미달확률({years}년)"] = p_below[:, 1]
+    for j, q in enumerate(LIFE_QUANTILES):
+        out[f"잔여수명P{int(q * 100)}(년)"] = life[:, j]
+    return out
@@ -0,0 +1,239 @@
+# neighbors.py — 유사 탱크 최근접 색인 (조회조건 가중 불일치 + 사용연수 차이)
+#
+# 정확히 같은 6개 조건 조합의 표본이 적을 때(③ 10개 미만, ④ 30개 미만) 전체 평균 대신
+# "가장 비슷한 점검 기록 k개" 의 부식률 통계를 추정값으로 쓴다.
+#
+#   거리 = Σ(불일치한 키의 가중치) + |사용연수 차이| / AGE_SCALE
+#   키 가중치 = 키별 설명력 η² (집계표 백오프와 같은 기준) 를 합이 1 이 되게 정규화
+#   → 모든 키가 다르면 1, 사용연수 AGE_SCALE 년 차이도 1.
+#
+# 기록을 (6개 조건, 사용연수) 프로필로 묶어 그룹·연수 순으로 정렬해 둔다 (실자료 2만 행 → 프로필 수백 개).
+# 조회는 전체 기록을 훑지 않는다: 범주 거리가 같은 그룹끼리 묶은 단계(최대 64개) 중 가까운 단계에서
+# k번째 거리의 상한을 얻고, 그 상한 안에 들 수 있는 그룹의 사용연수 구간만 이분 탐색으로 모은다 (정확한 k-NN).
+# 거리가 같은 기록은 모두 포함하므로 실제 표본수는 k 이상일 수 있다.
+import numpy as np
+import pandas as pd
+
+from cube import eta_squared
+from rate_index import KEYS, encode_columns, interpolate_sorted
+from validate import normalize_labels
+
+K = 30                  # 기본 이웃 수 (④ 최소 표본수와 같게)
+AGE_SCALE = 10.0        # 사용연수 10년 차이 = 모든 키 불일치와 같은 거리
+_AGE_STRIDE = 10_000.0  # 그룹·연수 정렬 키 = 그룹 순번 × 간격 + 사용연수
+
+FLEET_COLUMNS = ["유사표본수", "유사평균", "유사P50", "유사P75", "유사P90", "유사최대거리"]
+
+
+def _ranges(lo, hi):
+    """[lo, hi) 구간들을 이어 붙인 위치 배열."""
+    lengths = np.maximum(hi - lo, 0)
+    total = lengths.sum()
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(lo - (np.cumsum(lengths) - lengths), lengths)
+    return np.arange(total) + offsets
+
+
+def _segments(seg, m):
+    """정렬된 나이 번호 배열 → 나이별 (시작, 끝) 위치."""
+    ages = np.arange(m)
+    return np.searchsorted(seg, ages), np.searchsorted(seg, ages, side="right")
+
+
+class NeighborIndex:
+    """점검 기록 최근접 색인. query() 는 한 대, query_fleet() 는 탱크 목록 전체."""
+
+    def __init__(self, df, age_scale=AGE_SCALE):
+        self.age_scale = age_scale
+        codes, self.categories = encode_columns(df)
+        self.lookup = {k: {v: i for i, v in enumerate(c)} for k, c in self.categories.items()}
+        age = df["사용연수"].to_numpy(dtype=float)
+        rate = df["부식률"].to_numpy(dtype=float)
+        valid = ~np.isnan(age) & ~np.isnan(rate)
+
+        radix = [len(self.categories[k]) + 1 for k in KEYS]
+        gid = np.ravel_multi_index([codes[k][valid] for k in KEYS], radix)
+        age, rate = age[valid], rate[valid]
+
+        # ---- 기록 정렬 (그룹, 사용연수, 부식률) → 프로필(그룹, 사용연수) 구간 ----
+        order = np.lexsort((rate, age, gid))
+        self.rows = np.flatnonzero(valid)[order]          # 원본 행 번호
+        self.rate = rate[order]
+        gid, age = gid[order], age[order]
+        new = np.r_[True, (gid[1:] != gid[:-1]) | (age[1:] != age[:-1])][:len(gid)]
+        self.p_start = np.flatnonzero(new)
+        self.p_end = np.r_[self.p_start[1:], len(gid)].astype(np.int64)
+        self.p_n = self.p_end - self.p_start
+        self.p_age = age[self.p_start]
+
+        # ---- 그룹 (6개 조건 조합) ----
+        group_ids, self.g_first, self.p_group = np.unique(gid[self.p_start], return_index=True, return_inverse=True)
+        self.g_last = np.r_[self.g_first[1:], len(self.p_start)].astype(np.int64)
+        self.g_codes = np.column_stack(np.unravel_index(group_ids, radix)).reshape(-1, len(KEYS))
+        self.g_n = np.bincount(self.p_group, weights=self.p_n, minlength=len(group_ids)).astype(np.int64)
+        self.p_key = self.p_group * _AGE_STRIDE + self.p_age
+
+        # ---- 키 가중치: 그룹 (표본수, 합, 제곱합) 으로 η² ----
+        self.weights = np.full(len(KEYS), 1 / len(KEYS))
+        if len(group_ids):
+            bounds = np.r_[self.p_start[self.g_first], len(gid)]
+            g_sum = np.diff(np.r_[0, np.cumsum(self.rate)][bounds])
+            g_sumsq = np.diff(np.r_[0, np.cumsum(self.rate ** 2)][bounds])
+            eta = eta_squared({k: self.g_codes[:, i] for i, k in enumerate(KEYS)}, self.g_n, g_sum, g_sumsq)
+            w = np.array([max(eta[k], 0.0) for k in KEYS])
+            if w.sum() > 0:
+                self.weights = w / w.sum()
+
+    # =========================
+    # 탐색
+    # =========================
+    def _codes(self, cond):
+        """조건 → 키 코드 (데이터에 없는 값은 -1: 모든 그룹과 불일치)."""
+        return np.array([self.lookup[k].get(cond.get(k), -1) for k in KEYS])
+
+    def _plan(self, codes):
+        """조건 코드 → (범주 거리 순 그룹 번호, 그 범주 거리, 단계 경계, 단계까지 누적 기록 수).
+
+        범주 거리가 같은 그룹이 한 단계이고, 단계 i 의 그룹은 order[bounds[i]:bounds[i + 1]]. 같은 조건 탱크끼리 공유.
+        """
+        dcat = (self.g_codes != codes) @ self.weights
+        order = np.argsort(dcat, kind="stable")
+        level = dcat[order]
+        bounds = np.flatnonzero(np.concatenate(([True], level[1:] != level[:-1], [True])))
+        cum = np.cumsum(self.g_n[order])[bounds[1:] - 1]
+        return order, level, bounds, cum
+
+    def _gather(self, ages, seg, g_level, lo, hi):
+        """(나이 번호, 그룹) 쌍별 [lo, hi) 프로필 → (나이 번호, 프로필 번호, 거리)."""
+        lengths = np.maximum(hi - lo, 0)
+        p = _ranges(lo, hi)
+        seg = np.repeat(seg, lengths)
+        d = np.repeat(g_level, lengths) + np.abs(self.p_age[p] - ages[seg]) / self.age_scale
+        return seg, p, d
+
+    def _kth(self, n_ages, seg, p, d, k):
+        """나이별 후보 중 누적 기록이 k 개가 되는 거리 (후보 기록이 k 개 미만이면 inf)."""
+        o = np.lexsort((d, seg))
+        seg, d = seg[o], d[o]
+        cum = np.cumsum(self.p_n[p[o]])
+        first, last = _segments(seg, n_ages)
+        at = np.searchsorted(cum, np.r_[0, cum][first] + k)   # cum 은 단조 증가 (프로필마다 기록 ≥ 1)
+        kth = np.full(n_ages, np.inf)
+        ok = at < last
+        kth[ok] = d[at[ok]]
+        return kth
+
+    def _search(self, plan, ages, k):
+        """같은 조건의 여러 사용연수 → (나이 번호, 프로필 번호, 거리, 나이별 k번째 거리). 나이·거리 순.
+
+        그룹마다 사용연수 위치 양옆 k개 프로필만 후보가 될 수 있다 (더 먼 프로필 앞에는 같은 그룹 기록이 k개 이상).
+        범주 거리 순으로 그룹을 덩어리째(첫 덩어리는 누적 기록이 k 개에 닿는 단계까지, 이후 두 배씩) 보며
+        나이별 k번째 거리 상한을 좁히고, 남은 그룹의 범주 거리가 모든 나이의 상한을 넘으면 멈춘다.
+        """
+        order, level, bounds, cum = plan
+        ages = np.asarray(ages, dtype=float)
+        m = len(ages)
+        seg = p = np.zeros(0, dtype=np.int64)
+        d = np.zeros(0)
+        kth = np.full(m, np.inf)
+        start, end = 0, (bounds[min(int(np.searchsorted(cum, k)), len(cum) - 1) + 1] if len(cum) else 0)
+        while start < len(order):
+            active = np.flatnonzero(kth >= level[start])
+            if not len(active):
+                break
+            g = order[start:end]
+            pos = np.searchsorted(self.p_key, g * _AGE_STRIDE + ages[active, None])
+            seg2, p2, d2 = self._gather(ages, np.repeat(active, len(g)),
+                                        np.broadcast_to(level[start:end], pos.shape).ravel(),
+                                        np.maximum(pos - k, self.g_first[g]).ravel(),
+                                        np.minimum(pos + k, self.g_last[g]).ravel())
+            seg, p, d = np.concatenate((seg, seg2)), np.concatenate((p, p2)), np.concatenate((d, d2))
+            keep = d <= kth[seg]
+            seg, p, d = seg[keep], p[keep], d[keep]
+            kth = self._kth(m, seg, p, d, k)
+            start, end = end, min(len(order), end + 2 * (end - start))
+
+        keep = d <= kth[seg]
+        o = np.lexsort((d[keep], seg[keep]))
+        seg, p, d = seg[keep][o], p[keep][o], d[keep][o]
+        first, last = _segments(seg, m)
+        kth = np.where(last > first, d[np.maximum(last - 1, 0)] if len(d) else np.nan, np.nan)
+        return seg, p, d, kth
+
+    def _stats(self, m, seg, profiles):
+        """나이별 선택 프로필 → 표 (표본수, 평균, P50, P75, P90) 열 배열."""
+        lengths = self.p_n[profiles]
+        rec = _ranges(self.p_start[profiles], self.p_end[profiles])
+        seg = np.repeat(seg, lengths)
+        rates = self.rate[rec]
+        o = np.lexsort((rates, seg))
+        rates = rates[o]
+        n = np.bincount(seg, minlength=m)
+        start = np.cumsum(n) - n
+        out = np.full((m, 5), np.nan)
+        out[:, 0] = n
+        ok = n > 0
+        out[ok, 1] = np.bincount(seg, weights=self.rate[rec], minlength=m)[ok] / n[ok]
+        for j, q in enumerate([0.5, 0.75, 0.9]):        # interpolate_sorted 와 같은 선형보간
+            pos = q * (n[ok] - 1)
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.minimum(lo + 1, n[ok] - 1)
+            out[ok, 2 + j] = rates[start[ok] + lo] + (rates[start[ok] + hi] - rates[start[ok] + lo]) * (pos - lo)
+        return out
+
+    # =========================
+    # 조회
+    # =========================
+    def query(self, cond, age, k=K):
+        """가장 비슷한 기록 k개(거리 동률 포함)의 부식률 통계 dict.
+
+        AggregationCube.stats 와 같은 키에 더해 k번째 거리(max_distance)와 거리 0 인 기록 수(exact).
+        """
+        age = float(age)
+        if np.isnan(age):
+            return {"count": 0, "mean": np.nan, "std": np.nan, "p50": np.nan, "p75": np.nan,
+                    "p90": np.nan, "max_distance": np.nan, "exact": 0}
+        _, profiles, dist, kth = self._search(self._plan(self._codes(cond)), [age], k)
+        rates = np.sort(self.rate[_ranges(self.p_start[profiles], self.p_end[profiles])])
+        n = len(rates)
+        p50, p75, p90 = interpolate_sorted(rates, [0.5, 0.75, 0.9])
+        return {"count": n, "mean": rates.mean() if n else np.nan,
+                "std": rates.std(ddof=1) if n > 1 else np.nan,
+                "p50": p50, "p75": p75, "p90": p90,
+                "max_distance": kth[0], "exact": int(self.p_n[profiles][dist == 0].sum())}
+
+    def neighbors(self, df, cond, age, k=K):
+        """가장 비슷한 기록 k개(거리 동률 포함)를 원본 df 에서 꺼낸 표 (+ 거리 컬럼, 가까운 순)."""
+        _, profiles, dist, _ = self._search(self._plan(self._codes(cond)), [float(age)], k)
+        out = df.iloc[self.rows[_ranges(self.p_start[profiles], self.p_end[profiles])]].copy()
+        out["거리"] = np.repeat(dist, self.p_n[profiles])
+        return out
+
+    def query_fleet(self, tanks, k=K):
+        """탱크 목록(6개 키 + 사용연수) → FLEET_COLUMNS 표 (tanks 와 같은 인덱스, 사용연수 결측은 표본수 0).
+
+        같은 (조건, 사용연수) 탱크는 한 번만 찾고, 같은 조건의 사용연수들은 한 번의 배열 연산으로 찾는다.
+        """
+        labels, _ = normalize_labels(tanks[KEYS])    # 원본과 같은 표기 (유/무, 전각, 소문자 재질 등)
+        codes = np.column_stack([
+            pd.Index(self.categories[key]).get_indexer(labels[key])
+            for key in KEYS
+        ]).reshape(-1, len(KEYS))
+        age = pd.to_numeric(tanks["사용연수"], errors="coerce").to_numpy(dtype=float)
+        uniq, inverse = np.unique(np.column_stack([codes, age]), axis=0, return_inverse=True)
+
+        table = np.full((len(uniq), len(FLEET_COLUMNS)), np.nan)
+        table[:, 0] = 0
+        usable = ~np.isnan(uniq[:, -1])
+        rows = np.flatnonzero(usable)
+        # np.unique 결과는 조건 순으로 정렬돼 있으므로 같은 조건은 연속 구간
+        change = np.flatnonzero((np.diff(uniq[rows, :-1], axis=0) != 0).any(axis=1)) + 1
+        for block in np.split(rows, change) if len(rows) else []:
+            plan = self._plan(uniq[block[0], :-1].astype(np.int64))
+            seg, profiles, _, kth = self._search(plan, uniq[block, -1], k)
+            table[block, :5] = self._stats(len(block), seg, profiles)
+            table[block, 5] = kth
+        out = pd.DataFrame(table[inverse.ravel()], columns=FLEET_COLUMNS, index=tanks.index)
+        out["유사표본수"] = out["유사표본수"].astype(np.int64)
+        return out
@@ -0,0 +1,159 @@
+# rate_index.py — 6개 조회조건 기준 부식률 색인 (범주 코드 + 그룹 연속 배치)
+#
+# 재질/품명/탱크형상/히팅코일/지역/전기방식을 정수 범주 코드로 바꾸고
+# 복합 키 순서로 행을 정렬해 두면, 한 조건 조합의 행은 연속 구간(슬라이스)이 된다.
+# 각 구간 안에서는 부식률이 미리 정렬되어 있어 분위수/백분위를 정렬 없이 구한다.
+import numpy as np
+import pandas as pd
+
+# 전기방식을 마지막에 두어 "전기방식만 제외한" 5개 조건도 연속 구간이 되게 한다
+KEYS = ["재질", "품명", "탱크형상", "히팅코일", "지역", "전기방식"]
+
+RATE_FLOOR = 0.0005      # 부식률 하한(mm/년) — 적재 시 행 단위로 적용 (validate.py)
+
+AGE_BINS = [0, 10, 20, 30, 200]
+AGE_LABELS = ["10년 미만", "10년 이상", "20년 이상", "30년 이상"]
+
+
+def age_band(years):
+    """사용연수 → 연수구간 라벨 (Categorical)."""
+    return pd.cut(years, bins=AGE_BINS, labels=AGE_LABELS, right=False)
+
+
+def encode_columns(df, keys=KEYS):
+    """키 컬럼 → (정수 코드 dict, 범주 목록 dict). 결측은 마지막 코드(범주 개수)."""
+    codes, categories = {}, {}
+    for k in keys:
+        cat = pd.Categorical(df[k])
+        categories[k] = list(cat.categories)
+        size = len(cat.categories)
+        codes[k] = np.where(cat.codes < 0, size, cat.codes).astype(np.int64)
+    return codes, categories
+
+
+def interpolate_sorted(sorted_values, q):
+    """정렬된 배열의 선형보간 분위수 (pandas quantile 기본 방식과 동일)."""
+    n = len(sorted_values)
+    if n == 0:
+        return np.full(np.shape(q), np.nan)
+    pos = np.asarray(q, dtype=float) * (n - 1)
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, n - 1)
+    frac = pos - lo
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * frac
+
+
+class RateIndex:
+    """조건 조합 → (시작, 끝) 오프셋 색인 (CSR 방식)."""
+
+    def __init__(self, df):
+        # ---- 범주 코드화 + 혼합기수 복합 키 ----
+        codes, self.categories = encode_columns(df)
+        self.lookup = {k: {v: i for i, v in enumerate(c)} for k, c in self.categories.items()}
+        self.radix = [len(self.categories[k]) + 1 for k in KEYS]
+
+        composite = np.zeros(len(df), dtype=np.int64)
+        for k, size in zip(KEYS, self.radix):
+            composite = composite * size + codes[k]
+
+        n_band = len(AGE_LABELS) + 1                # 구간 밖/결측은 마지막 코드로
+        band = age_band(df["사용연수"].to_numpy()).codes.astype(np.int64)
+        band = np.where(band < 0, n_band - 1, band)
+        self.n_band = n_band
+
+        rate = df["부식률"].to_numpy(dtype=float)
+
+        # ---- (조건, 연수구간, 부식률) 순 정렬: 행 순열과 구간별 정렬 부식률 ----
+        # 원본 DataFrame 은 복사하지 않고 참조만 한다 (공유 데이터셋을 그대로 사용)
+        order = np.lexsort((rate, band, composite))
+        self.frame = df
+        self.order = order
+        self.rates_band = rate[order]
+        self.composite = composite[order]
+
+        # ---- (조건, 부식률) 순 정렬: 조건 전체의 정렬 부식률 ----
+        self.rates_combo = rate[np.lexsort((rate, composite))]
+
+        # NaN은 정렬 시 각 구간 끝으로 가므로 유효 개수만 따로 센다
+        self._valid_band = np.concatenate([[0], np.cumsum(~np.isnan(self.rates_band))])
+        self._valid_combo = np.concatenate([[0], np.cumsum(~np.isnan(self.rates_combo))])
+
+        self.offsets = self._offsets(self.composite)
+        self.band_offsets = self._offsets(self.composite * n_band + band[order])
+
+    @staticmethod
+    def _offsets(sorted_ids):
+        ids, starts = np.unique(sorted_ids, return_index=True)
+        ends = np.append(starts[1:], len(sorted_ids))
+        return dict(zip(ids.tolist(), zip(starts.tolist(), ends.tolist())))
+
+    # =========================
+    # 키 변환
+    # =========================
+    def encode(self, cond):
+        """{키: 값} 조건 → 복합 키 정수 (알 수 없는 값이면 None)."""
+        cid = 0
+        for k, size in zip(KEYS, self.radix):
+            code = self.lookup[k].get(cond[k])
+            if code is None:
+                return None
+            cid = cid * size + code
+        return cid
+
+    def _band_code(self, band):
+        return AGE_LABELS.index(band)
+
+    def _span(self, cond, band=None):
+        cid = self.encode(cond)
+        if cid is None:
+            return 0, 0
+        if band is None:
+            return self.offsets.get(cid, (0, 0))
+        return self.band_offsets.get(cid * self.n_band + self._band_code(band), (0, 0))
+
+    # =========================
+    # 조회
+    # =========================
+    def rows(self, cond, band=None):
+        """조건(및 연수구간)에 해당하는 행 (해당 행만 꺼낸 작은 DataFrame)."""
+        start, end = self._span(cond, band)
+        return self.frame.iloc[self.order[start:end]]
+
+    def rows_except(self, cond, key="전기방식"):
+        """마지막 키(전기방식)만 제외한 동일 조건 행."""
+        assert key == KEYS[-1]
+        prefix = {k: cond[k] for k in KEYS[:-1]}
+        lo_cond = dict(prefix, **{key: self.categories[key][0]})
+        lo = self.encode(lo_cond)
+        if lo is None:
+            return self.frame.iloc[0:0]
+        hi = lo + self.radix[-1]
+        start, end = np.searchsorted(self.composite, [lo, hi])
+        return self.frame.iloc[self.order[start:end]]
+
+    def rates(self, cond, band=None):
+        """해당 조건의 정렬된 부식률 (NaN 제외)."""
+        start, end = self._span(cond, band)
+        if band is None:
+            valid = self._valid_combo[end] - self._valid_combo[start]
+            return self.rates_combo[start:start + valid]
+        valid = self._valid_band[end] - self._valid_band[start]
+        return self.rates_band[start:start + valid]
+
+    def count(self, cond, band=None):
+        start, end = self._span(cond, band)
+        return end - start
+
+    def quantile(self, cond, q, band=None):
+        return interpolate_sorted(self.rates(cond, band), q)
+
+    def histogram(self, cond, bins=20, band=None):
+        """해당 조건 부식률의 (구간별 개수, 구간 경계) — 그래프에는 구간만 보낸다."""
+        return np.histogram(self.rates(cond, band), bins=bins)
+
+    def percentile_rank(self, cond, value, band=None):
+        """값 이하인 표본의 비율(%) — "내 탱크"의 위치."""
+        r = self.rates(cond, band)
+        if len(r) == 0:
+            return np.nan
+        return np.searchsorted(r, value, side="right") / len(r) * 100
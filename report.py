@@ -0,0 +1,362 @@
+# report.py — 탱크별 PDF 점검 보고서 (③ 결과표 + 위험등급 + 두께 예측 + 전기방식 비교)
+#
+# 사용 예:
+#   python report.py tanks.csv -o reports/
+#   python report.py tanks.xlsx -o reports/ --mode "상위 75% (보수)" --workers 8 --id-column 탱크번호
+#
+# 계산(assess_fleet, 분위수, 전기방식 추세표)은 부모 프로세스에서 조건 조합당 한 번만 하고,
+# 워커는 그리기만 한다. 워커는 시작 시 글꼴(NanumGothic)과 로고를 한 번 읽고,
+# 그래프는 matplotlib(Agg)로 브라우저 없이 PDF 에 바로 그린다.
+# PDF 마다 2MB 한글 글꼴 전체를 다시 읽어 부분 추출하면 한 장에 1초가 넘게 걸리므로,
+# 부모가 이번 실행에 쓰일 글자만 담은 작은 글꼴을 한 번 만들어 워커에 넘긴다.
+import argparse
+import os
+import re
+import string
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from matplotlib import colors, font_manager, image as mpimage, patches  # noqa: E402
+from fontTools import subset  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+from cube import AggregationCube  # noqa: E402
+from engine import (ALLOWABLE, GRADES, HORIZON, INPUT_ERROR, RATE_MODES,  # noqa: E402
+                    assess_fleet, read_tank_list)
+from ingest import load_sketches  # noqa: E402
+from loader import load_shared  # noqa: E402
+from rate_index import KEYS  # noqa: E402
+from trend import TrendTable  # noqa: E402
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FONT_FAMILY = "NanumGothic"
+FONT_FILES = ["NanumGothic-Regular.ttf", "NanumGothic-Bold.ttf", "NanumGothic-ExtraBold.ttf"]
+LOGO_FILE = "logo_kor.jpg"
+PAGE_SIZE = (8.27, 11.69)    # A4 세로 (인치)
+PREDICT_YEARS = [0, 5, 10, 20]
+CHUNK_SIZE = 100             # 워커에 한 번에 넘기는 보고서 수
+_VERDICT = {"적합": "적합(합격)", "부적합": "부적합(불합격)", INPUT_ERROR: "입력오류 (평가 불가)"}
+
+_logo = None
+
+
+# =========================
+# 글꼴 준비 (부모에서 실행당 한 번) / 워커 초기화 (프로세스당 한 번)
+# =========================
+def _charset(result, mode):
+    """보고서에 나올 수 있는 글자: 이 파일의 고정 문구 + 결과표 문자열 값 + ASCII."""
+    with open(__file__, encoding="utf-8") as f:
+        parts = [f.read(), string.printable, mode, "".join(KEYS), "".join(RATE_MODES)]
+    parts += [text for _, text, _ in GRADES]
+    for col in result.columns:
+        if not pd.api.types.is_numeric_dtype(result[col]):
+            parts += [str(col)] + [str(v) for v in result[col].unique()]
+    return "".join(sorted(set("".join(parts))))
+
+
+def subset_fonts(text, dest):
+    """FONT_FILES 를 text 의 글자만 남긴 작은 글꼴로 dest 에 저장하고 경로 목록을 돌려준다.
+    PDF 에는 어차피 쓰인 글자만 임베딩되므로 결과는 같고, 페이지마다 읽는 글꼴이 작아진다."""
+    options = subset.Options()
+    options.name_IDs = ["*"]        # 글꼴 이름(NanumGothic)·굵기 정보 유지
+    options.notdef_outline = True
+    options.hinting = False         # 화면 힌팅은 PDF 에 필요 없음 (파일도 작아짐)
+    paths = []
+    for name in FONT_FILES:
+        font = subset.load_font(os.path.join(ROOT, name), options)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(text=text)
+        subsetter.subset(font)
+        path = os.path.join(dest, name)
+        subset.save_font(font, path, options)
+        font.close()
+        paths.append(path)
+    return paths
+
+
+def _init_worker(font_paths=None):
+    global _logo
+    # 같은 프로세스에서 다시 초기화할 때 이전 실행의 글꼴 항목을 지운다
+    manager = font_manager.fontManager
+    manager.ttflist = [f for f in manager.ttflist if not f.name.startswith(FONT_FAMILY)]
+    for path in font_paths or [os.path.join(ROOT, name) for name in FONT_FILES]:
+        manager.addfont(path)
+    matplotlib.rcParams.update({
+        "font.family": FONT_FAMILY,
+        "axes.unicode_minus": False,   # NanumGothic 에 유니코드 마이너스 글리프가 없음
+        "pdf.fonttype": 42,            # TrueType 부분 임베딩 (글자 검색 가능)
+    })
+    _logo = mpimage.imread(os.path.join(ROOT, LOGO_FILE))
+
+
+# =========================
+# 조건별 참고값 (부모 프로세스에서 조합당 한 번)
+# =========================
+def condition_context(trends, sketches, cond):
+    """보고서 그래프용 조건 참고값 dict (분석탭 risk_summary / comparison 과 같은 값)."""
+    stats = sketches.stats(cond)
+    return {
+        "p50": stats["p50"],
+        "p75": stats["p75"],
+        "p90": stats["p90"],
+        "comp_O": trends.curve(dict(cond, 전기방식="O")),
+        "comp_X": trends.curve(dict(cond, 전기방식="X")),
+        "diff": trends.effect(cond),
+    }
+
+
+def prepare(tanks, data_path="data.xlsx", mode="평균"):
+    """(평가 결과 DataFrame, 조건 키 배열, {조건 키: 참고값}) — 렌더링 전 계산 전부."""
+    sketches = load_sketches(data_path)
+    trends = TrendTable(AggregationCube(load_shared(data_path)))
+    result = assess_fleet(sketches, tanks, mode)
+
+    keys = list(zip(*(result[k] for k in KEYS)))
+    contexts = {key: condition_context(trends, sketches, dict(zip(KEYS, key))) for key in set(keys)}
+    return result, keys, contexts
+
+
+# =========================
+# 그리기
+# =========================
+def _fmt(value, spec, unit=""):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return "-"
+    return "-" if np.isnan(value) else f"{value:{spec}}{unit}"
+
+
+def _life_text(기대수명):
+    # ③과 같은 문구
+    if np.isnan(기대수명):
+        return "-"
+    if 기대수명 > 100:
+        return f"{HORIZON}년 이상"
+    if 기대수명 > 0:
+        return f"{기대수명:.1f} 년 남음"
+    return "3.2mm 이하 상태 가능"
+
+
+def _result_rows(row, mode):
+    대표부식률 = float(row["대표부식률"])
+    표본수 = f"{int(row['표본수']):,}"
+    if row["상위조건보정"]:
+        표본수 += f" (상위조건 보정: {row['상위조건보정']} 제외)"
+    return [
+        ("조회 조건", " / ".join(f"{k} {row[k]}" for k in KEYS)),
+        ("설계두께 / 측정두께", f"{_fmt(row['설계두께'], '.2f', ' mm')} / {_fmt(row['측정두께'], '.2f', ' mm')}"),
+        ("사용연수", _fmt(row["사용연수"], ".0f", " 년")),
+        ("사용연수 구간", str(row["연수구간"]) if pd.notna(row["연수구간"]) else "-"),
+        ("표본수", 표본수),
+        ("부식률 산정 방식", mode),
+        ("대표 부식률", _fmt(대표부식률, ".5f", " mm/년")),
+        (f"예상 부식량 ({HORIZON}년)", _fmt(대표부식률 * HORIZON, ".3f", " mm")),
+        (f"예상 두께 ({HORIZON}년 후)", _fmt(row[f"예상두께({HORIZON}년)"], ".3f", " mm")),
+        ("판정 결과", _VERDICT.get(row["판정"], row["판정"])),
+        ("예상 잔여 수명", _life_text(float(row["잔여수명(년)"]))),
+    ]
+
+
+def _draw_table(ax, row, mode):
+    ax.axis("off")
+    rows = _result_rows(row, mode)
+    table = ax.table(cellText=[[k, v] for k, v in rows], colLabels=["항목", "값"],
+                     colWidths=[0.28, 0.72], loc="upper center", cellLoc="left")
+    table.auto_set_font_size(False)
+    table.set_fontsize(8.5)
+    table.scale(1, 1.45)
+    for (r, c), cell in table.get_celld().items():
+        cell.set_edgecolor("#d1d5db")
+        if r == 0:
+            cell.set_facecolor("#1f2937")
+            cell.get_text().set_color("white")
+            cell.get_text().set_fontweight("bold")
+        elif rows[r - 1][0] == "판정 결과":
+            ok = row["판정"] == "적합"
+            cell.set_facecolor("#d1fae5" if ok else "#fee2e2")
+            cell.get_text().set_color("#065f46" if ok else "#7f1d1d")
+            cell.get_text().set_fontweight("bold")
+        elif c == 0:
+            cell.set_facecolor("#f3f4f6")
+
+
+def _draw_risk(fig, rect, row):
+    risk = float(row["위험지수"])
+    grade_text, color = "-", "#6b7280"
+    for _, text, c in GRADES:
+        if text == row["위험등급"]:
+            grade_text, color = text, c
+    x, y, w, h = rect
+    for i, (title, value, c) in enumerate([("Risk Index", _fmt(risk, ".1f"), "#1d4ed8"),
+                                           ("위험등급", grade_text, color)]):
+        ax = fig.add_axes([x + i * (w / 2 + 0.01), y, w / 2 - 0.01, h])
+        ax.set_xticks([])
+        ax.set_yticks([])
+        ax.set_facecolor(colors.to_rgba(c, 0.08))
+        for spine in ax.spines.values():
+            spine.set_edgecolor(c)
+            spine.set_linewidth(2)
+        ax.text(0.5, 0.72, title, ha="center", va="center", fontsize=11, fontweight="bold")
+        ax.text(0.5, 0.32, value, ha="center", va="center", fontsize=22, fontweight="heavy", color=c)
+
+
+def _draw_prediction(ax, 측정두께, ctx):
+    ax.set_title("향후 20년 두께 예측", fontsize=10, fontweight="bold")
+    years = np.array(PREDICT_YEARS)
+    if np.isnan(측정두께) or np.isnan(ctx["p50"]):
+        ax.text(0.5, 0.5, "예측에 필요한 자료가 없습니다", ha="center", va="center", transform=ax.transAxes)
+    else:
+        for key, label in [("p50", "평균(P50)"), ("p75", "보수(P75)"), ("p90", "매우보수(P90)")]:
+            ax.plot(years, 측정두께 - ctx[key] * years, marker="o", label=label)
+        ax.legend(fontsize=7)
+    ax.axhline(ALLOWABLE, linestyle=":", color="#6b7280")
+    ax.annotate("허용두께 3.2mm", (years[-1], ALLOWABLE), fontsize=7, ha="right", va="bottom", color="#6b7280")
+    ax.set_xlabel("경과년수(년)", fontsize=8)
+    ax.set_ylabel("예상두께(mm)", fontsize=8)
+    ax.tick_params(labelsize=7)
+    ax.grid(alpha=0.3)
+
+
+def _draw_comparison(ax, ctx):
+    ax.set_title("전기방식설비 유무에 따른 부식률 경향", fontsize=10, fontweight="bold")
+    comp_O, comp_X = ctx["comp_O"], ctx["comp_X"]
+    if comp_O.empty and comp_X.empty:
+        ax.text(0.5, 0.5, "전기방식 O/X 비교 가능한 표본이 없습니다",
+                ha="center", va="center", transform=ax.transAxes, fontsize=8)
+    for comp, label, color in [(comp_O, "전기방식설비 설치", "green"), (comp_X, "전기방식설비 미설치", "red")]:
+        if comp.empty:
+            continue
+        # 선형 추세 95% 신뢰구간 음영 + 이동평균 선 (분석탭 그래프와 동일)
+        ax.fill_between(comp["사용연수구간"], comp["하한"], comp["상한"], color=color, alpha=0.12, linewidth=0)
+        ax.plot(comp["사용연수구간"], comp["이동평균"], marker="o", color=color, linewidth=2, label=label)
+    if len(comp_O) or len(comp_X):
+        ax.legend(fontsize=7)
+    ax.set_xlabel("사용연수", fontsize=8)
+    ax.set_ylabel("평균 부식률(mm/년)", fontsize=8)
+    ax.tick_params(labelsize=7)
+    ax.grid(alpha=0.3)
+
+
+def render_page(path, row, ctx, mode, tank_id=None):
+    """탱크 한 대의 보고서를 PDF 한 장으로 저장한다 (워커 초기화 후 호출)."""
+    fig = Figure(figsize=PAGE_SIZE)
+
+    # ---- 머리글 ----
+    header = fig.add_axes([0, 0.93, 1, 0.07])
+    header.axis("off")
+    header.add_patch(patches.Rectangle((0, 0), 1, 1, color="black", transform=header.transAxes))
+    logo = fig.add_axes([0.03, 0.935, 0.22, 0.06])
+    logo.imshow(_logo)
+    logo.axis("off")
+    fig.text(0.95, 0.972, "위험물탱크 부식 점검 보고서", ha="right", va="center",
+             fontsize=16, fontweight="heavy", color="white")
+    subtitle = f"작성일 {date.today():%Y-%m-%d}"
+    if tank_id is not None:
+        subtitle = f"탱크 {tank_id}  ·  {subtitle}"
+    fig.text(0.95, 0.945, subtitle, ha="right", va="center", fontsize=8, color="#d1d5db")
+
+    # ---- 1) ③ 향후 부식 예측 결과표 ----
+    fig.text(0.06, 0.905, f"1. 향후 부식 예측 ({HORIZON}년)", fontsize=12, fontweight="bold")
+    _draw_table(fig.add_axes([0.06, 0.62, 0.88, 0.275]), row, mode)
+
+    # ---- 2) 위험등급 ----
+    fig.text(0.06, 0.59, "2. 위험등급 평가 (Risk Index)", fontsize=12, fontweight="bold")
+    _draw_risk(fig, (0.06, 0.495, 0.88, 0.08), row)
+    fig.text(0.06, 0.47, "절대 위험도(40) + 상대 위험도(30) + 미래 위험도(30) · "
+             "A 0~29 안전 / B 30~54 주의 / C 55~79 경계 / D 80~100 위험", fontsize=7.5, color="#4b5563")
+
+    # ---- 3) 두께 예측 + 전기방식 비교 ----
+    fig.text(0.06, 0.43, "3. 두께 예측 및 전기방식설비 비교", fontsize=12, fontweight="bold")
+    _draw_prediction(fig.add_axes([0.08, 0.12, 0.38, 0.28]), float(row["측정두께"]), ctx)
+    _draw_comparison(fig.add_axes([0.57, 0.12, 0.38, 0.28]), ctx)
+    if ctx["diff"] is not None:
+        fig.text(0.57, 0.075, f"전기방식 설치 시 평균 {ctx['diff']:.1f}% 부식률 감소 효과",
+                 fontsize=8.5, color="#065f46", fontweight="bold")
+
+    # ---- 바닥글 ----
+    fig.text(0.5, 0.025, "※ 본 분석은 참고자료이며, 최종 안전판정은 관련 법령·기준에 따릅니다.",
+             ha="center", fontsize=7.5, color="#6b7280")
+    fig.savefig(path, format="pdf")
+
+
+def _render_chunk(args):
+    jobs, contexts, mode = args
+    for path, row, key, tank_id in jobs:
+        render_page(path, row, contexts[key], mode, tank_id)
+    return len(jobs)
+
+
+# =========================
+# 일괄 생성
+# =========================
+def _file_name(i, tank_id):
+    if tank_id is None:
+        return f"{i:05d}.pdf"
+    safe = re.sub(r"[^\w.-]+", "_", str(tank_id)).strip("._")
+    return f"{i:05d}_{safe}.pdf" if safe else f"{i:05d}.pdf"
+
+
+def run(tanks, out_dir, data_path="data.xlsx", mode="평균", workers=None,
+        id_column=None, chunk_size=CHUNK_SIZE):
+    """탱크 목록 전체의 보고서를 out_dir 에 쓰고 파일 경로 목록을 돌려준다.
+    workers=1 이면 현재 프로세스에서 그린다."""
+    if id_column is not None and id_column not in tanks.columns:
+        raise ValueError(f"식별 컬럼 없음: {id_column}")
+    result, keys, contexts = prepare(tanks, data_path, mode)
+    os.makedirs(out_dir, exist_ok=True)
+
+    ids = [None] * len(result) if id_column is None else result[id_column].tolist()
+    paths = [os.path.join(out_dir, _file_name(i, t)) for i, t in enumerate(ids)]
+    jobs = list(zip(paths, result.to_dict("records"), keys, ids))
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+
+    # 청크마다 그 청크가 쓰는 조건 참고값만 넘긴다
+    tasks = [(c, {key: contexts[key] for _, _, key, _ in c}, mode) for c in chunks]
+    workers = workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as font_dir:
+        font_paths = subset_fonts(_charset(result, mode), font_dir)
+        if workers == 1 or len(chunks) <= 1:
+            _init_worker(font_paths)
+            for task in tasks:
+                _render_chunk(task)
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                                     initializer=_init_worker, initargs=(font_paths,)) as pool:
+                list(pool.map(_render_chunk, tasks))
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="위험물탱크 부식 점검 보고서(PDF) 일괄 생성")
+    parser.add_argument("tanks", help="탱크 목록 (CSV / Excel)")
+    parser.add_argument("-o", "--output", required=True, help="보고서를 쓸 폴더")
+    parser.add_argument("--data", default="data.xlsx", help="부식률 원본 데이터 (기본: data.xlsx)")
+    parser.add_argument("--mode", default="평균", choices=list(RATE_MODES), help="부식률 산정 방식")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--id-column", default=None, help="파일명·머리글에 쓸 탱크 식별 컬럼")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="워커 작업당 보고서 수")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    tanks = read_tank_list(args.tanks)
+    try:
+        paths = run(tanks, args.output, args.data, args.mode, args.workers, args.id_column, args.chunk_size)
+    except ValueError as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 1
+    print(f"보고서 {len(paths):,}개 생성 — {time.perf_counter() - t0:.2f}초 → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+# resources.py — 프로세스 공유 캐시 자원 (데이터셋 / 선택 목록 / 색인 / 집계표 / 추세 / 스케치 / 유사 탱크 /
+#                신뢰구간 / ⑥ 요약)
+#
+# 모든 세션이 같은 객체를 읽기 전용으로 참조한다 (st.cache_resource, 데이터 버전당 한 번).
+# serve.py 로 서버를 띄우면 start_warmup() 이 서버 시작과 동시에 백그라운드 스레드에서
+# 이 캐시들을 채워 두므로 첫 접속자도 데운 캐시에서 화면을 받는다.
+# 같은 값을 세션 스레드와 예열 스레드가 동시에 요청하면 Streamlit 이 값 단위로 잠가
+# 한 번만 계산한다 (늦게 온 쪽은 기다렸다가 같은 객체를 받음).
+import sys
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+import bootstrap
+from cube import AggregationCube
+from ingest import load_sketches
+from loader import dataset_version, load_shared
+from neighbors import NeighborIndex
+from rate_index import RateIndex
+from trend import TrendTable
+
+DATA_PATH = "data.xlsx"
+
+
+@st.cache_resource(show_spinner=False)
+def get_dataset(version):
+    # 프로세스 전체가 공유하는 읽기 전용 데이터셋 (범주형 키 + float32, 메모리 맵)
+    return load_shared(DATA_PATH)
+
+
+@st.cache_resource(show_spinner=False)
+def get_options(version):
+    # 선택 목록 (재질은 표본 많은 순, 나머지는 가나다순)
+    df = get_dataset(version)
+    return {
+        "재질": pd.Series(df["재질"].to_numpy(dtype=object)).value_counts().index.tolist(),
+        **{k: sorted(df[k].cat.categories) for k in ["품명", "탱크형상", "지역"]},
+        "전기방식": ["O", "X"],
+        "히팅코일": ["O", "X"],
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def get_rate_index(version):
+    # 데이터 버전마다 한 번만 색인 생성 (모든 세션이 공유)
+    return RateIndex(get_dataset(version))
+
+
+@st.cache_resource(show_spinner=False)
+def get_cube(version):
+    # 키 부분집합 × 연수 축 사전 집계 (데이터 버전당 한 번)
+    return AggregationCube(get_dataset(version))
+
+
+@st.cache_resource(show_spinner=False)
+def get_trends(version):
+    # 전체 그룹 사용연수 추세 (집계표에서 한 번에 적합)
+    return TrendTable(get_cube(version))
+
+
+@st.cache_resource(show_spinner=False)
+def get_sketches(version):
+    # 그룹별 분위수 스케치 (새 델타만 증분 반영)
+    return load_sketches(DATA_PATH)
+
+
+@st.cache_resource(show_spinner=False)
+def get_neighbors(version):
+    # 유사 탱크 최근접 색인 (표본 부족 조건의 ③/④ 보조 통계)
+    return NeighborIndex(get_dataset(version))
+
+
+# 그룹별 부트스트랩 신뢰구간은 st.cache_resource 를 거치지 않는다: 계산(한 코어 수 초)을 화면 밖
+# 스레드에서 하므로 스크립트 실행 문맥 없이 부르는 일반 함수로 두고, 결과는 _ready_intervals 에 둔다.
+INTERVALS_RETRY = 60.0    # 신뢰구간 계산 실패 후 다시 시도하기까지 (초)
+
+_ready_intervals = {}
+_intervals_running = set()
+_intervals_failed = {}    # 버전 → 마지막 실패 시각
+_intervals_seen = {}      # 버전 → 마지막으로 읽어 본 디스크 표의 수정 시각
+_intervals_lock = threading.Lock()
+
+
+def _claim_intervals(version):
+    """이 버전의 계산을 맡는다 — 이미 계산 중이거나 최근에 실패했으면 False."""
+    with _intervals_lock:
+        if version in _ready_intervals or version in _intervals_running:
+            return False
+        failed = _intervals_failed.get(version)
+        if failed is not None and time.monotonic() - failed < INTERVALS_RETRY:
+            return False
+        _intervals_running.add(version)
+        return True
+
+
+def _build_intervals(version):
+    try:
+        # 웹 서버 안에서는 프로세스 풀을 띄우지 않는다 (다중 스레드 프로세스의 fork 는 교착 위험)
+        _ready_intervals[version] = bootstrap.load_intervals(DATA_PATH, workers=1)
+    except Exception as e:  # 화면은 구간 없이 계속 그린다 — 기록하고 INTERVALS_RETRY 뒤 다시 시도
+        print(f"신뢰구간 계산 실패 ({version}): {e!r}", file=sys.stderr)
+        _intervals_failed[version] = time.monotonic()
+    finally:
+        with _intervals_lock:
+            _intervals_running.discard(version)
+
+
+def warm_intervals(version):
+    """예열 단계: 이 스레드에서 신뢰구간을 준비한다 (다른 스레드가 계산 중이면 기다리지 않는다)."""
+    if _claim_intervals(version):
+        _build_intervals(version)
+    return _ready_intervals.get(version)
+
+
+def ready_intervals(version):
+    """화면용 신뢰구간 표 — 계산이 끝났으면 표, 아니면 None (그리는 쪽은 기다리지 않는다).
+
+    디스크의 표는 파일이 바뀌었을 때만 다시 읽고, 현재 버전 표가 없으면 백그라운드 스레드에서
+    계산을 한 번 시작한다. 계산이 실패하면 stderr 에 남기고 INTERVALS_RETRY 초 뒤 다음 호출에서 다시 시작한다.
+    """
+    if version in _ready_intervals:
+        return _ready_intervals[version]
+    mtime = bootstrap.cache_mtime(DATA_PATH)
+    if mtime is not None and _intervals_seen.get(version) != mtime:
+        _intervals_seen[version] = mtime
+        table = bootstrap.cached_intervals(DATA_PATH)
+        if table is not None:
+            _ready_intervals[version] = table
+            return table
+    if _claim_intervals(version):
+        threading.Thread(target=_build_intervals, args=(version,), name="bootstrap-intervals",
+                         daemon=True).start()
+    return None
+
+
+@st.cache_resource(show_spinner=False)
+def summary_views(version):
+    # ⑥ 전체 데이터 요약: 입력과 무관하므로 데이터 버전당 한 번 (표 3개 + 그래프 3개, 읽기 전용 공유)
+    import plotly.express as px  # 그래프를 처음 만들 때만 불러온다
+
+    cube = get_cube(version)
+
+    mat_avg = cube.table(["재질"])
+    mat_avg = mat_avg[mat_avg["표본수"] >= 300].sort_values("평균부식률")
+
+    year_avg = cube.table([], "연수구간")[["연수구간", "평균부식률"]].rename(columns={"평균부식률": "부식률"})
+    region_avg = cube.table(["지역"])[["지역", "평균부식률"]].rename(columns={"평균부식률": "부식률"}).sort_values("부식률")
+
+    fig3 = px.bar(
+        mat_avg, x="재질", y="평균부식률", color="평균부식률",
+        color_continuous_scale=px.colors.sequential.Viridis,
+        title="재질별 평균 부식률 (표본≥300)", template="plotly_white"
+    )
+    fig4 = px.bar(
+        year_avg, x="연수구간", y="부식률", color="부식률",
+        color_continuous_scale=px.colors.sequential.Viridis,
+        title="사용연수 구간별 평균 부식률", template="plotly_white"
+    )
+    ymax_all = year_avg["부식률"].max() * 2
+    fig4.update_yaxes(range=[0, ymax_all])
+    fig5 = px.bar(
+        region_avg, x="지역", y="부식률", color="부식률",
+        color_continuous_scale=px.colors.sequential.Viridis,
+        title="지역별 평균 부식률", template="plotly_white"
+    )
+    return (mat_avg, fig3), (year_avg, fig4), (region_avg, fig5)
+
+
+# =========================
+# 예열 (서버 시작 시 백그라운드)
+# =========================
+WARM_STEPS = [
+    ("데이터셋", get_dataset),
+    ("선택 목록", get_options),
+    ("색인", get_rate_index),
+    ("집계표", get_cube),
+    ("추세", get_trends),
+    ("스케치", get_sketches),
+    ("유사 탱크 색인", get_neighbors),
+    ("⑥ 전체 요약", summary_views),
+    # 부트스트랩은 수 초 걸리고 ready_intervals 는 기다리지 않으므로 맨 끝 (⑥ 요약을 늦추지 않게)
+    ("신뢰구간", warm_intervals),
+]
+
+_warm = {"state": "대기", "version": None, "steps": {}, "error": None}
+_warm_lock = threading.Lock()
+
+
+def warm_up():
+    """현재 데이터 버전의 공유 자원을 순서대로 채운다 → {단계: ms}."""
+    version = dataset_version(DATA_PATH)
+    _warm["version"] = version
+    for name, fn in WARM_STEPS:
+        t0 = time.perf_counter()
+        fn(version)
+        _warm["steps"][name] = (time.perf_counter() - t0) * 1000
+    return _warm["steps"]
+
+
+def _run_warmup():
+    try:
+        warm_up()
+        _warm["state"] = "완료"
+    except Exception as e:  # 예열 실패는 화면에서 평소처럼 다시 계산하면 되므로 기록만 한다
+        _warm["state"], _warm["error"] = "실패", repr(e)
+
+
+def start_warmup():
+    """예열 스레드를 한 번만 시작한다 (이미 시작했으면 아무것도 하지 않음)."""
+    with _warm_lock:
+        if _warm["state"] != "대기":
+            return False
+        _warm["state"] = "진행 중"
+    threading.Thread(target=_run_warmup, name="cache-warmup", daemon=True).start()
+    return True
+
+
+def warmup_status():
+    """{"state", "version", "steps": {단계: ms}, "error"} (성능 패널 표시용)."""
+    return dict(_warm, steps=dict(_warm["steps"]))
@@ -0,0 +1,52 @@
+# sensitivity.py — 측정두께 × 사용연수 × 산정방식 민감도 격자 (What-if)
+#
+# 조건(6개 키)과 설계두께가 정해지면, 두께·연수 격자 전체의 판정(4개 산정방식)과 위험지수를
+# 한 번의 배열 연산으로 계산한다. 대표부식률 조회는 연수구간 × 산정방식 조합(최대 16회)뿐이다.
+import numpy as np
+
+from engine import (ALLOWABLE, RATE_MODES, group_mean_rate, predict, representative_rate,
+                    risk_grade, risk_index, tank_rate)
+from rate_index import AGE_LABELS, age_band
+
+N_THICKNESS = 200
+N_AGES = 100
+
+
+def grid_axes(설계두께, n_thickness=N_THICKNESS, n_ages=N_AGES):
+    """(두께 축: 허용두께~설계두께, 연수 축: 1~n_ages 년)."""
+    thickness = np.linspace(ALLOWABLE, 설계두께, n_thickness)
+    ages = np.arange(1, n_ages + 1, dtype=float)
+    return thickness, ages
+
+
+def sweep(source, cond, 설계두께, thickness, ages):
+    """격자 전체 평가 dict.
+
+    rates: (방식, 연수) 대표부식률, passed: (방식, 연수, 두께) 판정 적합 여부,
+    boundary: (방식, 연수) 적합이 되는 최소 두께 (없으면 NaN),
+    risk / grade: (연수, 두께) 위험지수와 등급 인덱스 (산정방식과 무관).
+    """
+    modes = list(RATE_MODES)
+    band = age_band(ages).codes
+    table = np.full((len(modes), len(AGE_LABELS)), np.nan)
+    for b in np.unique(band[band >= 0]):
+        for m, mode in enumerate(modes):
+            table[m, b], _, _ = representative_rate(source, cond, AGE_LABELS[b], mode)
+    rates = np.where(band >= 0, table[:, np.maximum(band, 0)], np.nan)
+
+    _, _, passed, _ = predict(thickness[None, None, :], rates[:, :, None])
+    first = passed.argmax(axis=2)
+    boundary = np.where(passed.any(axis=2), thickness[first], np.nan)
+
+    my_rate = tank_rate(설계두께, thickness[None, :], ages[:, None])
+    risk = risk_index(my_rate, thickness[None, :], group_mean_rate(source, cond))
+    return {
+        "modes": modes,
+        "thickness": thickness,
+        "ages": ages,
+        "rates": rates,
+        "passed": passed,
+        "boundary": boundary,
+        "risk": risk,
+        "grade": risk_grade(risk),
+    }
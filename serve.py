@@ -0,0 +1,27 @@
+# serve.py — 앱 서버 시작 + 공유 캐시 예열
+#
+# 사용 예:
+#   python serve.py                                        # streamlit run test.py 와 같음 (+ 예열)
+#   python serve.py --server.port 8501 --server.headless true
+#
+# Streamlit 서버와 같은 프로세스에서 resources.start_warmup() 을 먼저 띄운다. 서버가 뜨는 동안
+# 예열 스레드가 데이터셋/선택 목록/색인/집계표/추세/스케치/⑥ 요약을 채우므로 배포·재시작 직후의
+# 첫 접속도 데운 캐시에서 화면을 받는다. 첫 화면까지 시간은 성능 패널과 timing 로그
+# (first_render_ms) 에 남고, benchmarks/cold_start.py 로 예열 전후를 비교할 수 있다.
+import os
+import sys
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.py")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    import resources
+    resources.start_warmup()
+
+    from streamlit.web import cli
+    return cli.main(["run", APP_SCRIPT, *argv], prog_name="streamlit")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
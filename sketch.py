@@ -0,0 +1,216 @@
+# sketch.py — 그룹별 병합 가능한 부식률 요약 (표본수/합/제곱합 + 분위수 스케치)
+#
+# 분위수 스케치는 로그 버킷 히스토그램(DDSketch 방식)이다. 버킷 경계가 고정되어 있어
+# 두 스케치의 병합은 버킷 개수의 덧셈이고, 분위수의 상대오차는 ALPHA 이하로 보장된다.
+# 그룹 단위는 (6개 조회조건, 연수구간) 이며, 상위 조건 통계는 해당 그룹들을 합쳐 구한다.
+import math
+import os
+
+import numpy as np
+
+from cube import QUANTILES, backoff, eta_squared
+from rate_index import KEYS, RATE_FLOOR, age_band
+
+ALPHA = 0.005            # 분위수 상대오차 한계 (0.5%)
+MAX_RATE = 10.0          # 이보다 큰 값은 마지막 버킷에 넣는다 (mm/년)
+MEMO_LIMIT = 100_000     # 라벨 마스크 / 통계 메모 최대 항목 수 (넘으면 비우고 다시 채움)
+UPDATE_CHUNK = 1_000_000  # update 가 한 번에 그룹 라벨을 만드는 행 수 (행별 라벨·튜플 메모리 상한)
+
+_GAMMA = (1 + ALPHA) / (1 - ALPHA)
+_LOG_GAMMA = math.log(_GAMMA)
+_OFFSET = math.ceil(math.log(RATE_FLOOR) / _LOG_GAMMA)
+N_BUCKETS = math.ceil(math.log(MAX_RATE) / _LOG_GAMMA) - _OFFSET + 1
+
+GROUP_COLUMNS = KEYS + ["연수구간"]
+
+
+def bucket_index(rates):
+    """부식률 → 버킷 번호. 0번 버킷은 하한(RATE_FLOOR) 이하 값 전체."""
+    rates = np.asarray(rates, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        idx = np.ceil(np.log(rates) / _LOG_GAMMA) - _OFFSET
+    idx = np.where(rates <= RATE_FLOOR, 0, idx)
+    return np.clip(idx, 0, N_BUCKETS - 1).astype(np.int64)
+
+
+def bucket_value(idx):
+    """버킷 대표값 — 버킷 안 모든 값에 대해 상대오차 ALPHA 이하."""
+    idx = np.asarray(idx)
+    value = 2 * _GAMMA ** (idx + _OFFSET) / (_GAMMA + 1)
+    return np.where(idx == 0, RATE_FLOOR, value)
+
+
+def _group_labels(df):
+    labels = {k: df[k].astype(str).to_numpy() for k in KEYS}
+    band = age_band(df["사용연수"].to_numpy(dtype=float))
+    labels["연수구간"] = np.where(band.codes < 0, "", np.asarray(band.categories, dtype=str)[band.codes])
+    return labels
+
+
+class GroupSketches:
+    """(조건, 연수구간) 그룹별 스케치 모음. stats/backoff 는 AggregationCube 와 같은 형태."""
+
+    def __init__(self):
+        self.labels = {c: np.array([], dtype=str) for c in GROUP_COLUMNS}
+        self.counts = np.zeros((0, N_BUCKETS), dtype=np.int64)
+        self.n = np.zeros(0, dtype=np.int64)
+        self.total = np.zeros(0)
+        self.sumsq = np.zeros(0)
+        self._rows = {}
+        self.clear_memo()
+
+    def clear_memo(self):
+        """조회 메모(중요도·라벨 마스크·stats)를 비운다. 자료가 바뀌면 update/merge 가 부른다."""
+        self._importance = None
+        self._masks = {}          # (컬럼, 값) → 그룹 행 마스크
+        self._stats = {}          # (조건, 축, 값) → stats dict
+
+    # =========================
+    # 적재 / 병합 (비용은 추가분 크기에 비례)
+    # =========================
+    def _row_ids(self, labels):
+        """그룹 라벨 배열 → 행 번호 (처음 보는 그룹은 행을 추가)."""
+        keys = list(zip(*(labels[c] for c in GROUP_COLUMNS)))
+        uniq = dict.fromkeys(keys)
+        new = [k for k in uniq if k not in self._rows]
+        if new:
+            start = len(self.n)
+            for i, k in enumerate(new):
+                self._rows[k] = start + i
+            for j, c in enumerate(GROUP_COLUMNS):
+                self.labels[c] = np.concatenate([self.labels[c], [k[j] for k in new]])
+            pad = len(new)
+            self.counts = np.vstack([self.counts, np.zeros((pad, N_BUCKETS), dtype=np.int64)])
+            self.n = np.concatenate([self.n, np.zeros(pad, dtype=np.int64)])
+            self.total = np.concatenate([self.total, np.zeros(pad)])
+            self.sumsq = np.concatenate([self.sumsq, np.zeros(pad)])
+            self._masks = {}
+        return np.array([self._rows[k] for k in keys], dtype=np.int64)
+
+    def update(self, df):
+        """점검자료(DataFrame)를 요약에 더한다 (UPDATE_CHUNK 행씩 — 결과는 한 번에 더한 것과 같다)."""
+        for start in range(0, len(df), UPDATE_CHUNK):
+            self._add(df.iloc[start:start + UPDATE_CHUNK])
+        self.clear_memo()
+        return self
+
+    def _add(self, df):
+        rate = df["부식률"].to_numpy(dtype=float)
+        valid = ~np.isnan(rate)
+        df, rate = df[valid], rate[valid]
+        if not len(rate):
+            return
+
+        rows = self._row_ids(_group_labels(df))
+        size = len(self.n)
+        np.add.at(self.counts, (rows, bucket_index(rate)), 1)
+        self.n += np.bincount(rows, minlength=size)
+        self.total += np.bincount(rows, weights=rate, minlength=size)
+        self.sumsq += np.bincount(rows, weights=rate ** 2, minlength=size)
+
+    def merge(self, other):
+        """다른 스케치 모음을 더한다 (버킷 개수의 덧셈)."""
+        rows = self._row_ids(other.labels)
+        np.add.at(self.counts, rows, other.counts)
+        np.add.at(self.n, rows, other.n)
+        np.add.at(self.total, rows, other.total)
+        np.add.at(self.sumsq, rows, other.sumsq)
+        self.clear_memo()
+        return self
+
+    # =========================
+    # 조회
+    # =========================
+    def _label_mask(self, column, value):
+        key = (column, str(value))
+        if key not in self._masks:
+            if len(self._masks) >= MEMO_LIMIT:   # 업로드 목록의 낯선 라벨 등으로 끝없이 커지지 않게
+                self._masks = {}
+            self._masks[key] = self.labels[column] == key[1]
+        return self._masks[key]
+
+    def _mask(self, cond, axis=None, value=None):
+        mask = np.ones(len(self.n), dtype=bool)
+        for k in KEYS:
+            if k in cond:
+                mask &= self._label_mask(k, cond[k])
+        if axis is not None:
+            if axis != "연수구간":
+                raise ValueError(f"스케치는 연수구간 축만 지원합니다: {axis}")
+            mask &= self._label_mask("연수구간", value)
+        return mask
+
+    def quantile(self, cond, q, axis=None, value=None):
+        mask = self._mask(cond, axis, value)
+        return self._quantile(self.counts[mask].sum(axis=0), q)
+
+    def distribution(self, cond, axis=None, value=None):
+        """경험분포 (버킷 대표값 오름차순, 확률) — 표본이 없으면 빈 배열."""
+        hist = self.counts[self._mask(cond, axis, value)].sum(axis=0)
+        nz = np.flatnonzero(hist)
+        if not len(nz):
+            return np.zeros(0), np.zeros(0)
+        return bucket_value(nz), hist[nz] / hist.sum()
+
+    @staticmethod
+    def _quantile(hist, q):
+        n = hist.sum()
+        if n == 0:
+            return np.full(np.shape(q), np.nan)
+        # pandas 선형보간과 같은 위치: 인접한 두 순위 표본의 버킷 대표값 사이를 보간
+        pos = np.asarray(q, dtype=float) * (n - 1)
+        lo = np.floor(pos)
+        cum = np.cumsum(hist)
+        v_lo = bucket_value(np.searchsorted(cum, lo, side="right"))
+        v_hi = bucket_value(np.searchsorted(cum, np.minimum(lo + 1, n - 1), side="right"))
+        return v_lo + (v_hi - v_lo) * (pos - lo)
+
+    def stats(self, cond, axis=None, value=None):
+        """AggregationCube.stats 와 같은 dict (평균/표준편차는 정확값, 분위수는 근사값)."""
+        key = (tuple((k, str(cond[k])) for k in KEYS if k in cond), axis, value)
+        if key not in self._stats:
+            if len(self._stats) >= MEMO_LIMIT:
+                self._stats = {}
+            self._stats[key] = self._compute_stats(cond, axis, value)
+        return self._stats[key]
+
+    def _compute_stats(self, cond, axis, value):
+        mask = self._mask(cond, axis, value)
+        n = int(self.n[mask].sum())
+        if n == 0:
+            return {"count": 0, "mean": np.nan, "std": np.nan,
+                    "p50": np.nan, "p75": np.nan, "p90": np.nan}
+        s, ss = self.total[mask].sum(), self.sumsq[mask].sum()
+        mean = s / n
+        var = (ss - n * mean ** 2) / (n - 1) if n > 1 else np.nan
+        p50, p75, p90 = self._quantile(self.counts[mask].sum(axis=0), QUANTILES)
+        return {"count": n, "mean": mean, "std": np.sqrt(max(var, 0.0)),
+                "p50": p50, "p75": p75, "p90": p90}
+
+    @property
+    def key_importance(self):
+        if self._importance is None:
+            self._importance = eta_squared(self.labels, self.n, self.total, self.sumsq)
+        return self._importance
+
+    def backoff(self, cond, axis=None, value=None, min_count=10):
+        return backoff(self, cond, axis, value, min_count)
+
+    # =========================
+    # 저장 / 읽기
+    # =========================
+    def save(self, path):
+        arrays = {f"label_{i}": self.labels[c] for i, c in enumerate(GROUP_COLUMNS)}
+        tmp = f"{path}.tmp{os.getpid()}.npz"   # 워커들이 동시에 저장해도 서로의 임시 파일을 덮지 않게
+        np.savez(tmp, counts=self.counts, n=self.n, total=self.total, sumsq=self.sumsq, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        sk = cls()
+        with np.load(path) as z:
+            sk.labels = {c: z[f"label_{i}"] for i, c in enumerate(GROUP_COLUMNS)}
+            sk.counts, sk.n, sk.total, sk.sumsq = z["counts"], z["n"], z["total"], z["sumsq"]
+        sk._rows = {k: i for i, k in enumerate(zip(*(sk.labels[c] for c in GROUP_COLUMNS)))}
+        sk.clear_memo()
+        return sk
@@ -1,122 +1,127 @@
-import streamlit as st
-import pandas as pd
-import plotly.express as px
+import io
 
-# -----------------------------
-# 데이터 불러오기
-# -----------------------------
-df = pd.read_excel("data.xlsx", sheet_name="Sheet1", engine="openpyxl")
-if "사용연수.1" in df.columns:
-    df = df.drop(columns=["사용연수.1"])
+import numpy as np
+import streamlit as st
 
-# -----------------------------
-# 페이지 설정
-# -----------------------------
-st.set_page_config(page_title="위험물탱크 부식률 조회", layout="wide")
-st.title("⚡ 위험물탱크 평균 부식률 조회 시스템")
-st.markdown("---")
+from loader import dataset_version
+from rate_index import age_band
+from resources import (DATA_PATH, get_cube, get_neighbors, get_options, get_rate_index, get_sketches,
+                       get_trends, ready_intervals, summary_views, warmup_status)
+import montecarlo
+import timing
+from engine import (HORIZON, INPUT_COLUMNS, INPUT_ERROR, RATE_MODES, assess_fleet, predict,
+                    read_tank_list, representative_rate)
+
+# plotly / analyze 는 해당 화면을 그릴 때만 불러온다 (첫 화면 전 import 비용 절감).
+# 공유 캐시 자원(데이터셋·색인·집계표·스케치·⑥ 요약)은 resources.py — serve.py 로 띄우면 서버 시작 시 예열된다.
+
+
+# ① 선택 상자 라벨 (화면 순서) 과 처음 접속 시 기본값 (없는 키는 목록 첫 값)
+FACET_LABELS = {
+    "재질": "재질 선택", "품명": "품명 선택", "탱크형상": "탱크형상 선택",
+    "전기방식": "전기방식", "히팅코일": "히팅코일", "지역": "지역 선택",
+}
+FACET_DEFAULTS = {"탱크형상": "고정지붕", "전기방식": "X", "히팅코일": "X", "지역": "울산"}
+
+
+def facet_selection(cube, options):
+    # 이번 재실행의 ① 선택 (위젯 key = facet_<키>, 방금 바꾼 값 포함).
+    # 목록에는 표본 있는 값만 있으므로 한 번에 하나씩 바꾸면 조합은 항상 표본이 있다.
+    # 처음 접속했거나 데이터가 바뀌어 표본이 없으면, 화면 순서대로 앞 선택과 겹치는 값으로 맞춘다.
+    선택 = {k: st.session_state.get(f"facet_{k}") for k in FACET_LABELS}
+    if None not in 선택.values() and cube.stats(선택)["count"] > 0:
+        return 선택
+    fixed = {}
+    for k in FACET_LABELS:
+        counts = cube.facets(fixed)[k]
+        wanted = [선택[k], FACET_DEFAULTS.get(k), options[k][0]]
+        fixed[k] = next((v for v in wanted if counts.get(v)), max(counts, key=counts.get, default=None))
+        st.session_state[f"facet_{k}"] = fixed[k]
+    return fixed
+
+
+def facet_select(key, ordered, counts):
+    # 표본 있는 값만 원래 순서대로, 라벨에 표본수 표시
+    return st.selectbox(
+        FACET_LABELS[key],
+        [v for v in ordered if counts.get(v)],
+        key=f"facet_{key}",
+        format_func=lambda v: f"{v} ({counts.get(v, 0):,})",
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def run_fleet(version, file_bytes, file_name, mode):
+    # 같은 파일·방식이면 다른 위젯 변경 시 재계산하지 않음
+    tanks = read_tank_list(io.BytesIO(file_bytes), file_name)
+    return assess_fleet(get_sketches(version), tanks, mode)
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def condition_views(version, cond_items):
+    # ④/⑤ 조건별 연수구간 표·그래프와 표본 분포: 6개 조건이 바뀔 때만 다시 계산 (읽기 전용 공유)
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    조건 = dict(cond_items)
+    grouped = get_cube(version).breakdown(조건, "연수구간")
+    if grouped.empty:
+        return grouped, None, None
+
+    fig1 = px.bar(
+        grouped,
+        x="연수구간",
+        y="평균부식률",
+        text="평균부식률",
+        color="평균부식률",
+        color_continuous_scale=px.colors.sequential.Viridis,
+        title="조건별 사용연수 구간 평균 부식률",
+        template="plotly_white"
+    )
+    ymax = grouped["평균부식률"].max() * 2
+    fig1.update_yaxes(range=[0, ymax])
+    fig1.update_traces(
+        texttemplate="%{text:.4f}<br>(n=%{customdata[0]})",
+        textposition="outside",
+        customdata=grouped[["표본수"]].values
+    )
+
+    # 분포: 서버에서 20개 구간으로 집계해 막대만 전송 (표본 수와 무관한 크기)
+    counts, edges = get_rate_index(version).histogram(조건, bins=20)
+    fig2 = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+        marker_color="#ff7f0e", name="표본수",
+    ))
+    fig2.update_layout(
+        title="같은 조건 표본 분포와 내 탱크 위치", template="plotly_white",
+        xaxis_title="부식률", yaxis_title="count", bargap=0,
+    )
+    return grouped, fig1, fig2
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def distribution_figure(version, cond_items, 내부식률):
+    # ⑤ 분포 그래프 + 내 탱크 위치: 같은 조건·부식률이면 그래프 사양을 다시 만들지 않음
+    import plotly.graph_objects as go
+
+    fig = go.Figure(condition_views(version, cond_items)[2])
+    fig.add_vline(x=내부식률, line_dash="dash", line_color="red",
+                  annotation_text="내 탱크", annotation_position="top left")
+    return fig
 
-# =============================
-# 탭 생성
-# =============================
-tab_query, tab_analysis = st.tabs(["🔎 조회", "📊 결과분석"])
 
 # =============================
-# 🔎 조회탭 (지금까지 만든 화면 전부)
+# 부분 재실행 구간 (st.fragment: 안의 위젯이 바뀌면 해당 구간만 다시 실행)
 # =============================
-with tab_query:
-
-    # =============================
-    # 상단: ① / ② 나란히 배치
-    # =============================
-    col_top_left, col_top_right = st.columns(2)
-
-    with col_top_left:
-        # -----------------------------
-        # ① 조건별 조회
-        # -----------------------------
-        st.subheader("① 조건별 조회")
-
-        mat_order = df["재질"].value_counts().index.tolist()
-
-        재질 = st.selectbox("재질 선택", mat_order)
-        품명 = st.selectbox("품명 선택", sorted(df["품명"].unique()))
-        탱크형상 = st.selectbox(
-            "탱크형상 선택",
-            sorted(df["탱크형상"].unique()),
-            index=sorted(df["탱크형상"].unique()).index("고정지붕")
-        )
-        전기방식 = st.selectbox("전기방식", ["O", "X"], index=1)
-        히팅코일 = st.selectbox("히팅코일", ["O", "X"], index=1)
-        지역 = st.selectbox(
-            "지역 선택",
-            sorted(df["지역"].unique()),
-            index=sorted(df["지역"].unique()).index("울산")
-        )
-
-        # 조건 필터
-        cond = (
-            (df["재질"] == 재질) &
-            (df["품명"] == 품명) &
-            (df["탱크형상"] == 탱크형상) &
-            (df["전기방식"] == 전기방식) &
-            (df["히팅코일"] == 히팅코일) &
-            (df["지역"] == 지역)
-        )
-        filtered = df[cond]
-
-        # 👉 추후 분석탭에서 재사용할 수 있게 저장(선택)
-        st.session_state["filtered"] = filtered
-
-        # 분석탭에서 동일조건 비교에 필요한 값 저장
-        st.session_state["재질"] = 재질
-        st.session_state["품명"] = 품명
-        st.session_state["탱크형상"] = 탱크형상
-        st.session_state["히팅코일"] = 히팅코일
-        st.session_state["지역"] = 지역
-        st.session_state["전기방식"] = 전기방식
-
-        # 전체 데이터 저장 (전기방식 비교에 필요)
-        st.session_state["full_df"] = df
-
-
-    with col_top_right:
-        # -----------------------------
-        # ② 내 탱크 데이터 입력
-        # -----------------------------
-        st.subheader("② 내 탱크 데이터 입력")
-
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            설계두께 = st.number_input("설계두께(mm)", min_value=0.0, format="%.2f")
-        with col2:
-            측정두께 = st.number_input("측정두께(mm)", min_value=0.0, format="%.2f")
-        with col3:
-            사용연수_내탱크 = st.number_input("내 탱크 사용연수 (년)", min_value=0.0, max_value=100.0, value=10.0)
-
-        내부식률 = None
-        if 설계두께 > 0 and 측정두께 > 0 and 사용연수_내탱크 > 0:
-            # mm/년
-            내부식률 = (설계두께 - 측정두께) / (사용연수_내탱크)
-            st.info(f"🧮 내 탱크 계산된 부식률: **{내부식률:.5f} mm/년**")
-
-        # 👉 추후 분석탭에서 재사용할 수 있게 저장(선택)
-        st.session_state["내부식률"] = 내부식률
-        st.session_state["설계두께"] = 설계두께
-        st.session_state["측정두께"] = 측정두께
-        st.session_state["사용연수_내탱크"] = 사용연수_내탱크
-
-    st.markdown("---")
-
-    # =============================
-    # 중단: ③ / ④ 나란히 배치
-    # =============================
-    col_mid_left, col_mid_right = st.columns(2)
-
-    # ===============================================================
-    # ✅ 수정된 ③ 향후 부식 예측 및 기대수명 (남은기간 제거 + 11년 고정)
-    # ===============================================================
-    with col_mid_left:
+@st.fragment
+def section3(version, 조건, 설계두께, 측정두께, 사용연수_내탱크):
+    # ③ 향후 부식 예측 — 산정 방식을 바꿔도 페이지 전체가 아닌 이 구간만 재실행
+    # 공유 자원은 전역이 아니라 version 으로 여기서 읽는다 (구간만 재실행될 때도 지금 자원을 쓰도록)
+    cube = get_cube(version)
+    sketches = get_sketches(version)
+    neighbor_index = get_neighbors(version)
+    intervals = ready_intervals(version)
+    with timing.fragment("③ 부식 예측"):
         st.subheader("③ 향후 부식 예측 및 기대수명")
 
         # 다크 테이블 스타일
@@ -133,76 +138,64 @@ with tab_query:
         if 설계두께 > 0 and 측정두께 > 0 and 사용연수_내탱크 > 0:
 
             # 연수구간
-            bins = [0, 10, 20, 30, 200]
-            labels = ["10년 미만", "10년 이상", "20년 이상", "30년 이상"]
-            내연수_라벨 = pd.cut([사용연수_내탱크], bins=bins, labels=labels, right=False)[0]
-
-            # df에 연수구간 생성
-            if "연수구간" not in df.columns:
-                df["연수구간"] = pd.cut(df["사용연수"], bins=bins, labels=labels, right=False)
-
-            # 동일 조건 필터
-            cond_base = (
-                (df["재질"] == 재질) &
-                (df["품명"] == 품명) &
-                (df["탱크형상"] == 탱크형상) &
-                (df["전기방식"] == 전기방식) &
-                (df["히팅코일"] == 히팅코일) &
-                (df["지역"] == 지역)
-            )
-            cond_year = (df["연수구간"] == 내연수_라벨)
-            filtered_pred = df[cond_base & cond_year]
-
-            # 평균 부식률
-            if len(filtered_pred) >= 10:
-                평균부식률_조건 = filtered_pred["부식률"].mean()
-                표본수 = len(filtered_pred)
-            else:
-                평균부식률_조건 = df["부식률"].mean()
-                표본수 = len(filtered_pred)
-                st.warning(f"⚠️ 같은 구간 표본이 {표본수}개로 적어 전체 평균 사용")
+            내연수_라벨 = age_band([사용연수_내탱크])[0]
 
             # 산정 방식 선택
             산정방식 = st.selectbox(
                 "부식률 산정 방식",
-                ["평균", "중위수(P50)", "상위 75% (보수)", "상위 90% (매우 보수)"],
+                list(RATE_MODES),
                 key="rate_mode_fixed11"
             )
 
-            # 산정 방식에 따른 대표부식률 계산
-            if 산정방식 == "평균":
-                대표부식률 = 평균부식률_조건
-            elif 산정방식 == "중위수(P50)":
-                대표부식률 = filtered_pred["부식률"].median() if len(filtered_pred) >= 1 else 평균부식률_조건
-            elif 산정방식 == "상위 75% (보수)":
-                대표부식률 = filtered_pred["부식률"].quantile(0.75) if len(filtered_pred) >= 1 else 평균부식률_조건
-            else:
-                대표부식률 = filtered_pred["부식률"].quantile(0.9) if len(filtered_pred) >= 1 else 평균부식률_조건
-
-            # 하한값 보정
-            if 대표부식률 < 0.0005:
-                대표부식률 = 0.0005
+            # 동일 조건 + 동일 연수구간 대표부식률 (표본 부족 시 설명력 낮은 조건부터 제외, 하한 보정)
+            표본수 = cube.stats(조건, "연수구간", 내연수_라벨)["count"]
+            대표부식률, 통계, 제외조건 = representative_rate(sketches, 조건, 내연수_라벨, 산정방식)
+
+            # 백오프는 연수구간을 유지한 채 키만 뺀다 — 연수구간 자체가 비었을 때만 전체(전 연수) 통계
+            if len(제외조건) == len(조건) and not cube.stats({}, "연수구간", 내연수_라벨)["count"]:
+                보정_text = f"전체보정, n={통계['count']}"
+                st.warning(f"⚠️ {내연수_라벨} 구간 표본이 없어 전체 평균(전 연수) 사용")
+            elif 제외조건:
+                보정_text = f"상위조건 보정: {'·'.join(제외조건)} 제외, n={통계['count']}"
+                남은조건 = "·".join(k for k in 조건 if k not in 제외조건) or "조건 없음"
+                st.warning(f"⚠️ 같은 구간 표본이 {표본수}개로 적어 상위 조건({남은조건}, {내연수_라벨}) "
+                           f"통계 사용 — {'·'.join(제외조건)} 제외, 표본 {통계['count']}개")
+
+            # 보정 시 참고: 조건·사용연수가 가장 비슷한 점검 기록의 부식률 (유사 탱크 색인)
+            유사행 = ""
+            if 제외조건:
+                유사 = neighbor_index.query(조건, 사용연수_내탱크)
+                if 유사["count"]:
+                    유사행 = (f"<tr><td>유사 탱크 {유사['count']}개 평균 (참고)</td>"
+                            f"<td>{유사['mean']:.5f} mm/년 (P90 {유사['p90']:.5f}, 거리 ≤ {유사['max_distance']:.2f})</td></tr>")
+
+            # 대표부식률 95% 신뢰구간 (대표부식률과 같은 그룹, 같은 산정방식)
+            구간_text = ""
+            if intervals is not None:
+                구간 = intervals.backoff_interval(조건, 제외조건, 내연수_라벨)
+                if 구간 is not None:
+                    lo, hi = 구간[RATE_MODES[산정방식]]
+                    구간_text = f" (95% CI {lo:.5f}–{hi:.5f})"
 
             # -------------------------
-            # 🔥 남은기간 = 11년으로 고정
+            # 🔥 남은기간 = 11년으로 고정 (HORIZON)
             # -------------------------
-            남은기간 = 11
+            예상부식량, 예상두께, 적합, 기대수명 = (float(v) for v in predict(측정두께, 대표부식률))
 
-            # 예측 계산
-            예상부식량 = 대표부식률 * 남은기간
-            예상두께 = 측정두께 - 예상부식량
+            # 확률 모드: 같은 표본의 경험분포에서 부식률을 추출해 11년 내 미달 확률 (Monte Carlo)
+            몬테카를로 = montecarlo.simulate(sketches, 조건, 내연수_라벨, 측정두께)
+            미달확률 = 몬테카를로["p_below"][HORIZON - 1]
 
-            # 기대수명 계산
-            기대수명 = (측정두께 - 3.2) / 대표부식률 if 대표부식률 > 0 else None
-            if 기대수명 and 기대수명 > 100:
+            # 기대수명 표시
+            if 기대수명 > 100:
                 기대수명_text = "11년 이상"
-            elif 기대수명 and 기대수명 > 0:
+            elif 기대수명 > 0:
                 기대수명_text = f"{기대수명:.1f} 년 남음"
             else:
                 기대수명_text = "3.2mm 이하 상태 가능"
 
             # 판정
-            if 예상두께 >= 3.2:
+            if 적합:
                 판정 = "✅ 적합(합격)"
                 판정색 = "#065f46"
                 판정글 = "#d1fae5"
@@ -216,137 +209,260 @@ with tab_query:
                 <table class="tbl-dark">
                     <tr><th>항목</th><th>값</th></tr>
                     <tr><td>사용연수 구간</td><td>{내연수_라벨}</td></tr>
-                    <tr><td>표본수</td><td>{표본수 if 표본수>=10 else f"{표본수} (전체보정)"} </td></tr>
+                    <tr><td>표본수</td><td>{표본수 if not 제외조건 else f"{표본수} ({보정_text})"} </td></tr>
                     <tr><td>부식률 산정 방식</td><td>{산정방식}</td></tr>
-                    <tr><td>대표 부식률</td><td>{대표부식률:.5f} mm/년</td></tr>
+                    <tr><td>대표 부식률</td><td>{대표부식률:.5f} mm/년{구간_text}</td></tr>
+                    {유사행}
                     <tr><td>예상 부식량 (11년)</td><td>{예상부식량:.3f} mm</td></tr>
                     <tr><td>예상 두께 (11년 후)</td><td>{예상두께:.3f} mm</td></tr>
                     <tr class="result-row" style="background-color:{판정색};color:{판정글};">
                         <td>판정 결과</td><td>{판정}</td>
                     </tr>
                     <tr><td>예상 잔여 수명</td><td>{기대수명_text}</td></tr>
+                    <tr><td>11년 내 미달 확률 (MC)</td><td>{미달확률:.1%}</td></tr>
                 </table>
             """, unsafe_allow_html=True)
+            timing.lap("③ 부식 예측", rows=통계["count"])
+
+
+@st.fragment
+def fleet_section(version):
+    # 🏭 일괄평가 — 업로드/산정 방식을 바꿔도 조회탭은 다시 그리지 않음
+    with timing.fragment("🏭 일괄평가"):
+        st.subheader("🏭 탱크 목록 일괄 평가")
+        st.caption("필수 컬럼: " + ", ".join(INPUT_COLUMNS) + " (그 외 컬럼은 그대로 유지)")
+
+        col_f1, col_f2 = st.columns([2, 1])
+        with col_f1:
+            업로드 = st.file_uploader("탱크 목록 (CSV / Excel)", type=["csv", "xlsx"])
+        with col_f2:
+            일괄방식 = st.selectbox("부식률 산정 방식", list(RATE_MODES), key="rate_mode_fleet")
+
+        result = None
+        if 업로드 is not None:
+            try:
+                result = run_fleet(version, 업로드.getvalue(), 업로드.name, 일괄방식)
+            except ValueError as e:
+                st.error(f"⚠️ {e}")
+            else:
+                부적합수 = int((result["판정"] == "부적합").sum())
+                st.success(f"평가 탱크 수: {len(result):,}개 / 부적합: {부적합수:,}개")
+                오류수 = int((result["판정"] == INPUT_ERROR).sum())
+                if 오류수:
+                    st.warning(f"⚠️ 입력오류 {오류수:,}개 — 두께·사용연수가 없거나 0 이하, 측정두께 > 설계두께, "
+                               f"또는 사용연수가 연수구간 범위 밖인 행은 평가하지 않았습니다")
+                st.dataframe(result, use_container_width=True, height=500)
+                st.download_button(
+                    "📥 결과 다운로드 (CSV)",
+                    result.to_csv(index=False).encode("utf-8-sig"),
+                    file_name="일괄평가_결과.csv",
+                    mime="text/csv",
+                )
+        timing.lap("🏭 일괄평가", rows=None if result is None else len(result))
+
+
+# -----------------------------
+# 페이지 설정 (데이터 준비 전에 먼저 보낸다)
+# -----------------------------
+로그경로 = timing.log_path(DATA_PATH)
+# 스크립트 본문 전체가 한 번의 재실행 기록 (st.rerun/st.stop 등으로 중간에 끝나도 기록 상태가 남지 않음)
+with timing.recording(log_path=로그경로) as 재실행:
+    st.set_page_config(page_title="위험물탱크 부식률 조회", layout="wide")
+    st.title("⚡ 위험물탱크 평균 부식률 조회 시스템")
+    st.markdown("---")
 
     # -----------------------------
-    # ④ 조건에 맞는 표본 수 및 연수구간별 부식률표
+    # 데이터 불러오기 (세션마다 복사하지 않고 공유 자원만 참조)
     # -----------------------------
-    with col_mid_right:
-        st.subheader("④ 조건에 맞는 표본 수 및 연수구간별 부식률표")
+    version = dataset_version(DATA_PATH)
+    options = get_options(version)
+    idx = get_rate_index(version)
+    cube = get_cube(version)
+    trends = get_trends(version)
+    sketches = get_sketches(version)
+    neighbor_index = get_neighbors(version)
+    intervals = ready_intervals(version)  # 부트스트랩 신뢰구간 (준비 전이면 None — 구간 표시만 생략)
+    timing.lap("데이터 준비", rows=len(idx.frame))
+
+    # 성능 패널 (선택 시 사이드바에 구간별 소요시간 표시)
+    성능패널 = st.sidebar.toggle("⏱ 성능 패널", key="perf_panel")
 
-        if len(filtered) < 30:
-            st.warning(f"⚠️ 표본 수가 {len(filtered)}개로 너무 적습니다. (최소 30개 이상 필요)")
-        else:
-            st.success(f"조건에 맞는 표본 수: {len(filtered)}개")
+    # =============================
+    # 탭 생성
+    # =============================
+    # 분석탭은 열려 있을 때만 계산/렌더링 (탭 전환 시 rerun)
+    tab_query, tab_analysis, tab_fleet = st.tabs(
+        ["🔎 조회", "📊 결과분석", "🏭 일괄평가"], key="main_tab", on_change="rerun"
+    )
 
-            bins = [0, 10, 20, 30, 200]
-            labels = ["10년 미만", "10년 이상", "20년 이상", "30년 이상"]
-            filtered["연수구간"] = pd.cut(filtered["사용연수"], bins=bins, labels=labels, right=False)
+    # =============================
+    # 🔎 조회탭 (지금까지 만든 화면 전부)
+    # =============================
+    with tab_query:
+
+        # =============================
+        # 상단: ① / ② 나란히 배치
+        # =============================
+        col_top_left, col_top_right = st.columns(2)
+
+        with col_top_left:
+            # -----------------------------
+            # ① 조건별 조회
+            # -----------------------------
+            st.subheader("① 조건별 조회")
+
+            # 캐스케이드 선택: 각 목록은 나머지 5개 선택을 유지했을 때 표본이 있는 값만 (괄호 = 표본수)
+            선택 = facet_selection(cube, options)
+            facets = cube.facets(선택)
+            재질 = facet_select("재질", options["재질"], facets["재질"])
+            품명 = facet_select("품명", options["품명"], facets["품명"])
+            탱크형상 = facet_select("탱크형상", options["탱크형상"], facets["탱크형상"])
+            전기방식 = facet_select("전기방식", options["전기방식"], facets["전기방식"])
+            히팅코일 = facet_select("히팅코일", options["히팅코일"], facets["히팅코일"])
+            지역 = facet_select("지역", options["지역"], facets["지역"])
+            st.caption("괄호 안 숫자: 다른 조건을 그대로 둘 때의 표본 수")
+
+            # 조건 (표본 행은 꺼내지 않고 색인의 개수만 조회)
+            조건 = {
+                "재질": 재질, "품명": 품명, "탱크형상": 탱크형상,
+                "전기방식": 전기방식, "히팅코일": 히팅코일, "지역": 지역,
+            }
+            cond_items = tuple(sorted(조건.items()))
+            표본수_조건 = idx.count(조건)
+            timing.lap("① 조건별 조회", rows=표본수_조건)
+
+        with col_top_right:
+            # -----------------------------
+            # ② 내 탱크 데이터 입력
+            # -----------------------------
+            st.subheader("② 내 탱크 데이터 입력")
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                설계두께 = st.number_input("설계두께(mm)", min_value=0.0, format="%.2f")
+            with col2:
+                측정두께 = st.number_input("측정두께(mm)", min_value=0.0, format="%.2f")
+            with col3:
+                사용연수_내탱크 = st.number_input("내 탱크 사용연수 (년)", min_value=0.0, max_value=100.0, value=10.0)
+
+            내부식률 = None
+            if 설계두께 > 0 and 측정두께 > 0 and 사용연수_내탱크 > 0:
+                # mm/년
+                내부식률 = (설계두께 - 측정두께) / (사용연수_내탱크)
+                st.info(f"🧮 내 탱크 계산된 부식률: **{내부식률:.5f} mm/년**")
+                if 표본수_조건:
+                    백분위 = idx.percentile_rank(조건, 내부식률)
+                    st.caption(f"동일 조건 표본 {표본수_조건}개 중 하위 {백분위:.1f}% 위치")
+            timing.lap("② 내 탱크 입력")
+
+        st.markdown("---")
+
+        # =============================
+        # 중단: ③ / ④ 나란히 배치
+        # =============================
+        col_mid_left, col_mid_right = st.columns(2)
+
+        # ===============================================================
+        # ✅ 수정된 ③ 향후 부식 예측 및 기대수명 (남은기간 제거 + 11년 고정)
+        # ===============================================================
+        with col_mid_left:
+            section3(version, 조건, 설계두께, 측정두께, 사용연수_내탱크)
 
-            grouped = filtered.groupby("연수구간").agg(
-                평균부식률=("부식률", "mean"),
-                표본수=("부식률", "count")
-            ).reset_index()
+        # -----------------------------
+        # ④ 조건에 맞는 표본 수 및 연수구간별 부식률표
+        # -----------------------------
+        with col_mid_right:
+            st.subheader("④ 조건에 맞는 표본 수 및 연수구간별 부식률표")
+
+            # 사전 집계표 조회 (표본 있는 구간만) + 그래프 — 조건별 캐시
+            grouped, fig1, _ = condition_views(version, cond_items)
+
+            if 표본수_조건 < 30:
+                st.warning(f"⚠️ 표본 수가 {표본수_조건}개로 너무 적습니다. (최소 30개 이상 필요)")
+                if 사용연수_내탱크 > 0:
+                    # 같은 조합 대신 조건·사용연수가 가장 비슷한 점검 기록으로 참고 통계
+                    유사 = neighbor_index.query(조건, 사용연수_내탱크)
+                    if 유사["count"]:
+                        st.info(
+                            f"참고: 조건·사용연수({사용연수_내탱크:g}년)가 가장 비슷한 점검 기록 {유사['count']}개 "
+                            f"(거리 ≤ {유사['max_distance']:.2f}) — 평균 {유사['mean']:.5f} / "
+                            f"P50 {유사['p50']:.5f} / P90 {유사['p90']:.5f} mm/년"
+                        )
+            else:
+                st.success(f"조건에 맞는 표본 수: {표본수_조건}개")
+                st.dataframe(grouped, use_container_width=True, height=200)
+            timing.lap("④ 연수구간별 표", rows=표본수_조건)
 
-            st.dataframe(grouped, use_container_width=True, height=200)
+        st.markdown("---")
 
-    st.markdown("---")
+        # =============================
+        # 하단: ⑤ 그래프 비교 (전체 폭)
+        # =============================
+        st.subheader("⑤ 그래프 비교")
+
+        col_g1, col_g2 = st.columns(2)
+
+        if 표본수_조건 >= 30:
+            with col_g1:
+                st.plotly_chart(fig1, use_container_width=True)
+
+            with col_g2:
+                if 내부식률 is not None:
+                    st.plotly_chart(distribution_figure(version, cond_items, 내부식률), use_container_width=True)
+        timing.lap("⑤ 그래프 비교", rows=표본수_조건)
+
+        st.markdown("---")
+
+        # -----------------------------
+        # ⑥ 전체 데이터 요약
+        # -----------------------------
+        st.subheader("⑥ 전체 데이터 요약")
+
+        (mat_avg, fig3), (year_avg, fig4), (region_avg, fig5) = summary_views(version)
+
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.dataframe(mat_avg, use_container_width=True, height=200)
+            st.plotly_chart(fig3, use_container_width=True)
+
+        with col2:
+            st.dataframe(year_avg, use_container_width=True, height=200)
+            st.plotly_chart(fig4, use_container_width=True)
+
+        with col3:
+            st.dataframe(region_avg, use_container_width=True, height=200)
+            st.plotly_chart(fig5, use_container_width=True)
+        timing.lap("⑥ 전체 데이터 요약", rows=len(idx.frame))
 
     # =============================
-    # 하단: ⑤ 그래프 비교 (전체 폭)
+    # 📊 분석탭 (조회탭의 조건/입력값을 인자로 전달)
     # =============================
-    st.subheader("⑤ 그래프 비교")
-
-    col_g1, col_g2 = st.columns(2)
-
-    if len(filtered) >= 30:
-        with col_g1:
-            fig1 = px.bar(
-                grouped,
-                x="연수구간",
-                y="평균부식률",
-                text="평균부식률",
-                color="평균부식률",
-                color_continuous_scale=px.colors.sequential.Viridis,
-                title="조건별 사용연수 구간 평균 부식률",
-                template="plotly_white"
-            )
-            ymax = grouped["평균부식률"].max() * 2
-            fig1.update_yaxes(range=[0, ymax])
-            fig1.update_traces(
-                texttemplate="%{text:.4f}<br>(n=%{customdata[0]})",
-                textposition="outside",
-                customdata=grouped[["표본수"]].values
-            )
-            st.plotly_chart(fig1, use_container_width=True)
+    if tab_analysis.open:
+        import analyze
 
-        with col_g2:
-            if 내부식률 is not None:
-                fig2 = px.histogram(
-                    filtered, x="부식률", nbins=20, color_discrete_sequence=["#ff7f0e"],
-                    title="같은 조건 표본 분포와 내 탱크 위치", template="plotly_white"
-                )
-                fig2.add_vline(x=내부식률, line_dash="dash", line_color="red",
-                               annotation_text="내 탱크", annotation_position="top left")
-                st.plotly_chart(fig2, use_container_width=True)
-
-    st.markdown("---")
+        with tab_analysis:
+            analyze.render(cube, sketches, trends, version, 조건, 내부식률, 설계두께, 측정두께, 사용연수_내탱크,
+                           intervals)
 
-    # -----------------------------
-    # ⑥ 전체 데이터 요약
-    # -----------------------------
-    st.subheader("⑥ 전체 데이터 요약")
-
-    mat_avg = df.groupby("재질").agg(
-        평균부식률=("부식률","mean"),
-        표본수=("부식률","count")
-    ).reset_index()
-    mat_avg = mat_avg[mat_avg["표본수"] >= 300].sort_values("평균부식률")
-
-    bins_all = [0, 10, 20, 30, 200]
-    labels_all = ["10년 미만", "10년 이상", "20년 이상", "30년 이상"]
-    df["연수구간"] = pd.cut(df["사용연수"], bins=bins_all, labels=labels_all, right=False)
-
-    year_avg = df.groupby("연수구간")["부식률"].mean().reset_index()
-    region_avg = df.groupby("지역")["부식률"].mean().reset_index().sort_values("부식률")
-
-    col1, col2, col3 = st.columns(3)
-
-    with col1:
-        st.dataframe(mat_avg, use_container_width=True, height=200)
-        fig3 = px.bar(
-            mat_avg, x="재질", y="평균부식률", color="평균부식률",
-            color_continuous_scale=px.colors.sequential.Viridis,
-            title="재질별 평균 부식률 (표본≥300)", template="plotly_white"
-        )
-        st.plotly_chart(fig3, use_container_width=True)
-
-    with col2:
-        st.dataframe(year_avg, use_container_width=True, height=200)
-        fig4 = px.bar(
-            year_avg, x="연수구간", y="부식률", color="부식률",
-            color_continuous_scale=px.colors.sequential.Viridis,
-            title="사용연수 구간별 평균 부식률", template="plotly_white"
-        )
-        ymax_all = year_avg["부식률"].max() * 2
-        fig4.update_yaxes(range=[0, ymax_all])
-        st.plotly_chart(fig4, use_container_width=True)
-
-    with col3:
-        st.dataframe(region_avg, use_container_width=True, height=200)
-        fig5 = px.bar(
-            region_avg, x="지역", y="부식률", color="부식률",
-            color_continuous_scale=px.colors.sequential.Viridis,
-            title="지역별 평균 부식률", template="plotly_white"
-        )
-        st.plotly_chart(fig5, use_container_width=True)
+    # =============================
+    # 🏭 일괄평가탭 (탱크 목록 업로드)
+    # =============================
+    with tab_fleet:
+        fleet_section(version)
 
 # =============================
-# 📊 분석탭
+# ⏱ 성능 패널 (이번 재실행 + 이 프로세스 최근 재실행 p50/p95)
 # =============================
-import importlib
-
-with tab_analysis:
-    analyze = importlib.import_module("analyze")
-    importlib.reload(analyze)
-
+if 성능패널:
+    with st.sidebar:
+        st.markdown(f"**이번 재실행: {재실행.total_ms:.0f} ms**")
+        첫화면 = timing.first_render_ms()
+        예열 = warmup_status()
+        st.caption(f"첫 화면까지 (프로세스 시작 → 첫 재실행 완료): "
+                   f"{'-' if 첫화면 is None else f'{첫화면:,.0f} ms'} · 예열: {예열['state']}"
+                   + (f" ({sum(예열['steps'].values()):,.0f} ms)" if 예열["steps"] else ""))
+        st.dataframe(재실행.table(), use_container_width=True, hide_index=True)
+        st.markdown("**최근 재실행 (이 서버 프로세스)**")
+        st.dataframe(timing.summary(), use_container_width=True, hide_index=True)
+        st.caption(f"로그: {로그경로}" if 로그경로 else "로그 파일: 꺼짐 (TIMING_LOG=1 로 켬)")
@@ -0,0 +1,205 @@
+# timing.py — 재실행(rerun)별 구간 소요시간 기록
+#
+# 스크립트 본문을 with recording(): 으로 감싸고, 각 구간이 끝날 때 lap("구간명", rows=행수).
+# lap 은 직전 lap 이후 경과시간을 기록하므로 코드 블록을 감쌀 필요가 없다.
+# 본문이 예외(st.rerun / st.stop 포함)로 끝나도 현재 기록은 with 를 나갈 때 되돌려진다
+# (끝나지 않은 기록이 남아 이후 구간 재실행의 lap 을 받아 가지 않게). 기록은 정상 종료 때만 남는다.
+# 끝난 기록은 프로세스 공유 최근 목록(p50/p95 계산용)에 남고, TIMING_LOG 를 켜면 JSONL 로그 파일에도 남는다.
+#   TIMING_LOG 없음·빈 값·0 → 파일 기록 안 함 (기본)
+#   TIMING_LOG=1            → 데이터 파일 옆 .cache/timing.jsonl (loader 의 캐시 폴더)
+#   TIMING_LOG=<경로>        → 그 파일
+# 로그 파일이 MAX_LOG_BYTES 를 넘으면 <파일>.1 로 돌리고 새로 쓴다 (백업 하나만 유지).
+# 프로세스의 첫 전체 재실행은 "첫 화면까지" 시간(프로세스 시작 → 첫 재실행 완료)도 함께 남긴다.
+import argparse
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from loader import CACHE_DIR
+
+LOG_NAME = "timing.jsonl"
+MAX_LOG_BYTES = 10 * 2**20   # 로그 파일 최대 크기 (넘으면 .1 로 돌림)
+HISTORY = 500            # p50/p95 계산에 쓰는 최근 재실행 수
+
+_current = contextvars.ContextVar("timing_run", default=None)
+_recent = deque(maxlen=HISTORY)
+_lock = threading.Lock()
+
+
+def _process_started():
+    """이 프로세스의 시작 시각 (epoch 초). Linux 는 /proc 에서 읽고, 그 외는 이 모듈을 처음 읽은 시각."""
+    try:
+        with open("/proc/self/stat") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])    # 22번째 필드: 부팅 후 시작 tick
+        with open("/proc/stat") as f:
+            boot = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot + ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return time.time()
+
+
+PROCESS_STARTED = _process_started()
+_first_render_ms = None
+
+
+class Run:
+    """한 번의 재실행에서 기록한 구간 목록."""
+
+    def __init__(self, label=None):
+        self.label = label
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.spans = []
+
+    def lap(self, name, rows=None):
+        now = time.perf_counter()
+        self.spans.append({"name": name, "ms": (now - self._last) * 1000,
+                           "rows": None if rows is None else int(rows)})
+        self._last = now
+
+    @property
+    def total_ms(self):
+        return (self._last - self.started) * 1000
+
+    def table(self):
+        """[구간, 시간(ms), 행수] 표."""
+        return pd.DataFrame(
+            [(s["name"], s["ms"], s["rows"]) for s in self.spans],
+            columns=["구간", "시간(ms)", "행수"],
+        ).astype({"행수": "Int64"})
+
+
+@contextmanager
+def recording(label=None, log_path=None):
+    """with 본문을 한 번의 재실행으로 기록한다 (as 로 Run). 정상 종료 시 최근 목록(과 log_path 로그)에 남긴다."""
+    run = Run(label)
+    token = _current.set(run)
+    try:
+        yield run
+        _record(run, log_path)
+    finally:
+        _current.reset(token)
+
+
+def lap(name, rows=None):
+    """현재 기록에 구간 하나를 남긴다 (기록 중이 아니면 아무것도 하지 않음)."""
+    run = _current.get()
+    if run is not None:
+        run.lap(name, rows)
+
+
+@contextmanager
+def fragment(label):
+    """st.fragment 본문용: 전체 재실행 중이면 그 기록을 그대로 쓰고,
+    구간만 단독 재실행될 때는 label 로 별도 기록을 시작·마감한다."""
+    if _current.get() is not None:
+        yield
+        return
+    with recording(label, log_path()):
+        yield
+
+
+def default_log_path(data_path="data.xlsx"):
+    """데이터 파일 옆 캐시 폴더의 로그 파일 경로 (loader 스냅샷과 같은 위치)."""
+    return os.path.join(os.path.dirname(os.path.abspath(data_path)), CACHE_DIR, LOG_NAME)
+
+
+def log_path(data_path="data.xlsx"):
+    """TIMING_LOG 설정에 따른 로그 파일 경로 — 꺼져 있으면 None."""
+    value = os.environ.get("TIMING_LOG", "").strip()
+    if value in ("", "0"):
+        return None
+    if value.lower() in ("1", "true", "on"):
+        return default_log_path(data_path)
+    return value
+
+
+def _append(path, record):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if os.path.exists(path) and os.path.getsize(path) >= MAX_LOG_BYTES:
+        os.replace(path, path + ".1")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _record(run, log_path=None):
+    """끝난 기록을 최근 목록(과 log_path 가 있으면 로그 파일)에 남긴다."""
+    record = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "label": run.label,
+        "total_ms": round(run.total_ms, 3),
+        "spans": [dict(s, ms=round(s["ms"], 3)) for s in run.spans],
+    }
+    global _first_render_ms
+    with _lock:
+        if _first_render_ms is None and run.label is None:
+            _first_render_ms = (time.time() - PROCESS_STARTED) * 1000
+            record["first_render_ms"] = round(_first_render_ms, 3)
+        _recent.append(record)
+        if log_path:
+            try:
+                _append(log_path, record)
+            except OSError:
+                pass
+
+
+def first_render_ms():
+    """이 프로세스의 첫 화면까지 시간(ms) — 아직 첫 재실행이 끝나지 않았으면 None."""
+    return _first_render_ms
+
+
+def summary(records=None):
+    """구간별 [구간, 횟수, p50(ms), p95(ms)] 표 (전체 재실행은 "전체", 프로세스 시작 → 첫 재실행 완료는 "첫 화면" 행)."""
+    if records is None:
+        with _lock:
+            records = list(_recent)
+    times = {"전체": [r["total_ms"] for r in records],
+             "첫 화면": [r["first_render_ms"] for r in records if "first_render_ms" in r]}
+    for r in records:
+        for s in r["spans"]:
+            times.setdefault(s["name"], []).append(s["ms"])
+    rows = [(name, len(v), np.percentile(v, 50), np.percentile(v, 95))
+            for name, v in times.items() if v]
+    return pd.DataFrame(rows, columns=["구간", "횟수", "p50(ms)", "p95(ms)"])
+
+
+def read_log(log_path):
+    """로그 파일(돌려 둔 .1 포함, 오래된 것부터)의 재실행 기록 목록 (운영 환경 p50/p95 집계용)."""
+    records = []
+    for path in (log_path + ".1", log_path):
+        if path != log_path and not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="재실행 로그의 구간별 p50/p95")
+    parser.add_argument("log", nargs="?", default=None,
+                        help="로그 파일 (기본: TIMING_LOG 경로, 꺼져 있으면 data.xlsx 옆 .cache/timing.jsonl)")
+    args = parser.parse_args(argv)
+    args.log = args.log or log_path() or default_log_path()
+    try:
+        records = read_log(args.log)
+    except OSError as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 1
+    print(f"재실행 {len(records):,}회")
+    print(summary(records).to_string(index=False, float_format="%.1f"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
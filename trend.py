@@ -0,0 +1,192 @@
+# trend.py — 사용연수 대비 부식률 추세 (전체 그룹 일괄 적합)
+#
+# 집계표(AggregationCube)의 5년 구간 통계(표본수·합·제곱합)만으로 64개 키 부분집합의
+# 모든 그룹에 대해 한 번에 적합한다. 그룹 × 구간 2차원 배열에서
+#   - 가중 선형회귀: 원자료 최소제곱과 같은 계수, 잔차분산 기반 95% 신뢰구간
+#   - 단조(isotonic) 회귀: 구간 평균의 가중 PAVA 해 (max-min 구간평균 공식으로 벡터화)
+#   - 화면용 이동평균(창 2): 표본 있는 직전 구간과의 평균
+# 을 계산해 두고, 분석탭의 전기방식 비교 그래프와 감소 효과(%)는 이 표를 조회한다.
+import numpy as np
+import pandas as pd
+
+from rate_index import KEYS
+
+AXIS = "사용연수구간"
+CURVE_COLUMNS = ["평균부식률", "이동평균", "선형추정", "하한", "상한", "단조추정"]
+CONFIDENCE_Z = 1.959964   # 95% 양측 정규분위수
+
+# 자유도 1~30 의 t 분위수 (97.5%); 그보다 크면 전개식으로 근사
+_T975 = np.array([
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+])
+
+
+def t_quantile(dof):
+    """95% 양측 t 분위수 (자유도 배열, 자유도 0 이하는 NaN)."""
+    dof = np.asarray(dof, dtype=float)
+    z = CONFIDENCE_Z
+    with np.errstate(divide="ignore", invalid="ignore"):
+        approx = z + (z ** 3 + z) / (4 * dof) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+    table = _T975[np.clip(dof, 1, len(_T975)).astype(int) - 1]
+    return np.where(dof < 1, np.nan, np.where(dof <= len(_T975), table, approx))
+
+
+def linear_fit(x, n, s, ss):
+    """구간별 (표본수, 합, 제곱합) (G, B) → 그룹별 가중 선형회귀 dict.
+
+    구간 안에서는 x 가 같으므로 구간 평균을 표본수로 가중한 회귀는 원자료 회귀와 같다.
+    잔차제곱합은 구간 내 변동 + 구간 평균과 추정선의 차이.
+    """
+    N = n.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xbar = (n * x).sum(axis=1) / N
+        dx = x[None, :] - xbar[:, None]
+        sxx = (n * dx ** 2).sum(axis=1)
+        slope = np.where(sxx > 0, (dx * s).sum(axis=1) / sxx, np.nan)
+        intercept = s.sum(axis=1) / N - slope * xbar
+        fitted = intercept[:, None] + slope[:, None] * x[None, :]
+        sse = (ss - 2 * fitted * s + n * fitted ** 2).sum(axis=1)
+        dof = N - 2
+        resid_std = np.sqrt(np.maximum(sse, 0) / dof)
+        resid_std = np.where(dof > 0, resid_std, np.nan)
+        slope_se = resid_std / np.sqrt(sxx)
+    return {"count": N, "xbar": xbar, "sxx": sxx, "intercept": intercept, "slope": slope,
+            "slope_se": slope_se, "resid_std": resid_std, "dof": dof}
+
+
+def linear_band(fit, x):
+    """선형 추정값과 95% 신뢰구간 (G, B) — (추정, 하한, 상한)."""
+    fitted = fit["intercept"][:, None] + fit["slope"][:, None] * x[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se = fit["resid_std"][:, None] * np.sqrt(
+            1 / fit["count"][:, None] + (x[None, :] - fit["xbar"][:, None]) ** 2 / fit["sxx"][:, None])
+    half = t_quantile(fit["dof"])[:, None] * se
+    return fitted, fitted - half, fitted + half
+
+
+def isotonic_fit(n, s, increasing):
+    """가중 단조회귀 (G, B). 해는 ŷ_i = max_{j≤i} min_{k≥i} 평균(j..k) 이므로
+    누적합으로 모든 구간평균 (G, B, B) 을 만든 뒤 구간 수(B)만큼만 반복한다."""
+    G, B = n.shape
+    sign = np.where(increasing, 1.0, -1.0)[:, None]
+    W = np.concatenate([np.zeros((G, 1)), np.cumsum(n, axis=1)], axis=1)
+    S = np.concatenate([np.zeros((G, 1)), np.cumsum(s * sign, axis=1)], axis=1)
+    j, k = np.arange(B)[:, None], np.arange(B)[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg = (S[:, None, 1:] - S[:, :-1, None]) / (W[:, None, 1:] - W[:, :-1, None])
+    avg = np.where((j <= k)[None, :, :], avg, np.nan)
+    out = np.empty((G, B))
+    for i in range(B):
+        # 표본 없는 구간만으로 된 구간평균은 NaN → fmin/fmax 가 건너뜀
+        out[:, i] = np.fmax.reduce(np.fmin.reduce(avg[:, :i + 1, i:], axis=2), axis=1)
+    return np.where(n > 0, out * sign, np.nan)
+
+
+def rolling_previous(y):
+    """(G, B) 구간 평균의 창 2 이동평균 — 비어 있는 구간은 건너뛴다 (pandas rolling(2, min_periods=1) 과 같음)."""
+    G, B = y.shape
+    valid = ~np.isnan(y)
+    last = np.maximum.accumulate(np.where(valid, np.arange(B), -1), axis=1)
+    prev = np.concatenate([np.full((G, 1), -1), last[:, :-1]], axis=1)
+    y_prev = np.take_along_axis(y, np.maximum(prev, 0), axis=1)
+    return np.where(prev >= 0, (y + y_prev) / 2, y)
+
+
+class TrendTable:
+    """모든 (키 부분집합, 그룹) 의 사용연수 추세 조회표."""
+
+    def __init__(self, cube):
+        self._cube = cube
+        self.x = np.asarray(cube.axis_values[AXIS], dtype=float)
+        B = len(self.x)
+
+        # ---- 64개 부분집합의 5년 구간 집계를 (그룹, 구간) 하나의 배열로 ----
+        self.offsets, self.group_ids = {}, {}
+        n_parts, s_parts, ss_parts = [], [], []
+        start = 0
+        for (keys, axis), cell in cube.cells.items():
+            if axis != AXIS:
+                continue
+            bin_, group = cell.ids % (B + 1), cell.ids // (B + 1)
+            keep = bin_ < B                      # 사용연수 결측 구간 제외
+            gids, g = np.unique(group[keep], return_inverse=True)
+            n = np.zeros((len(gids), B))
+            s, ss = np.zeros_like(n), np.zeros_like(n)
+            n[g, bin_[keep]] = cell.count[keep]
+            s[g, bin_[keep]] = cell.sum[keep]
+            ss[g, bin_[keep]] = cell.sumsq[keep]
+            n_parts.append(n)
+            s_parts.append(s)
+            ss_parts.append(ss)
+            self.offsets[keys] = start
+            self.group_ids[keys] = gids
+            start += len(gids)
+
+        n = np.concatenate(n_parts) if n_parts else np.zeros((0, B))
+        s = np.concatenate(s_parts) if s_parts else np.zeros((0, B))
+        ss = np.concatenate(ss_parts) if ss_parts else np.zeros((0, B))
+
+        # ---- 전체 그룹 일괄 적합 ----
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.mean = np.where(n > 0, s / n, np.nan)
+        self.count = n.astype(np.int64)
+        self.fit = linear_fit(self.x, n, s, ss)
+        self.fitted, self.lower, self.upper = linear_band(self.fit, self.x)
+        self.increasing = ~(self.fit["slope"] < 0)          # 기울기 NaN(구간 1개) 은 증가로
+        self.isotonic = isotonic_fit(n, s, self.increasing)
+        self.smooth = rolling_previous(self.mean)
+        with np.errstate(invalid="ignore"):
+            self.bin_mean = np.nanmean(np.where(n > 0, self.mean, np.nan), axis=1)
+        # curve() 조회용: 실수 컬럼을 (그룹, 구간, 컬럼) 하나로 묶어 한 번에 꺼낸다
+        self._curves = np.stack([self.mean, self.smooth, self.fitted, self.lower, self.upper, self.isotonic],
+                                axis=2)
+
+    # =========================
+    # 조회
+    # =========================
+    def _row(self, cond):
+        keys, gid = self._cube._gid({k: v for k, v in cond.items() if k in KEYS})
+        if gid is None or keys not in self.offsets:
+            return None
+        ids = self.group_ids[keys]
+        i = np.searchsorted(ids, gid)
+        if i >= len(ids) or ids[i] != gid:
+            return None
+        return self.offsets[keys] + i
+
+    def curve(self, cond):
+        """조건 그룹의 구간별 표 [사용연수구간, 표본수, 평균부식률, 이동평균, 선형추정, 하한, 상한, 단조추정]
+        (표본 있는 구간만, 없으면 빈 표)."""
+        r = self._row(cond)
+        if r is None:
+            return pd.DataFrame(columns=[AXIS, "표본수"] + CURVE_COLUMNS)
+        has = self.count[r] > 0
+        values = self._curves[r, has]
+        out = {AXIS: self.x[has].astype(int), "표본수": self.count[r, has]}
+        out.update(zip(CURVE_COLUMNS, values.T))
+        return pd.DataFrame(out)
+
+    def coefficients(self, cond):
+        """조건 그룹의 선형 계수 dict (절편/기울기/기울기 표준오차/잔차 표준편차, 단조 방향) 또는 None."""
+        r = self._row(cond)
+        if r is None:
+            return None
+        return {
+            "count": int(self.fit["count"][r]),
+            "intercept": float(self.fit["intercept"][r]),
+            "slope": float(self.fit["slope"][r]),
+            "slope_se": float(self.fit["slope_se"][r]),
+            "resid_std": float(self.fit["resid_std"][r]),
+            "increasing": bool(self.increasing[r]),
+            "bin_mean": float(self.bin_mean[r]),
+        }
+
+    def effect(self, cond, key="전기방식", treated="O", control="X"):
+        """조건에서 key 만 바꾼 두 그룹의 구간평균 비교 → 감소율(%) (한쪽이라도 없으면 None)."""
+        r_t = self._row(dict(cond, **{key: treated}))
+        r_c = self._row(dict(cond, **{key: control}))
+        if r_t is None or r_c is None:
+            return None
+        return float((1 - self.bin_mean[r_t] / self.bin_mean[r_c]) * 100)
@@ -0,0 +1,238 @@
+# validate.py — 적재 시 한 번 하는 검증·정규화 (형 변환 / 범주 표기 / 하한 / 이상치·중복 표시)
+#
+# 사용 예:
+#   python validate.py data.xlsx                        # 품질 보고서 출력
+#   python validate.py 2025_1분기.csv --flagged 표시행.csv  # 문제 행 목록 저장
+#
+# 원본 스냅샷(loader.build_snapshot)과 델타(ingest.read_inspections)가 모두 이 단계를 거친다.
+# 그 뒤의 화면·집계 경로는 숫자형·정규화된 라벨·하한 적용이 끝난 자료만 받으므로
+# 렌더링마다 형 변환이나 하한 보정을 다시 하지 않는다.
+#
+# 제외: 부식률 결측/음수, 사용연수 0 이하·결측, 측정두께 > 설계두께 (측정 오류)
+# 표시만: 이상치, 중복 행, 부식률 ≠ (설계두께-측정두께)/사용연수, 범주 표기 오류
+#   - 같은 탱크의 여러 측정점이 같은 값을 갖는 경우가 많아(탱크 식별 컬럼 없음)
+#     중복 행은 기본으로 남긴다 (drop_duplicates=True 로 제외 가능).
+#   - 이상치는 P90 등 보수적 분위수에 필요한 실제 고부식 사례일 수 있어 제외하지 않는다.
+import argparse
+import json
+import re
+import sys
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from rate_index import KEYS, RATE_FLOOR
+
+NUMERIC_COLUMNS = ["사용연수", "설계두께", "측정두께", "부식률"]
+FLAG_COLUMNS = ["히팅코일", "전기방식"]
+OUTLIER_Z = 5.0           # log(부식률) 의 로버스트 z (중위수/MAD) 기준
+MISMATCH_TOL = 1e-6       # 부식률 재계산 허용 오차 (mm/년)
+SAMPLE_ROWS = 20          # 보고서에 남기는 항목별 예시 행 수
+
+# O/X 표기 통일 (대문자·공백 제거 후 비교)
+_FLAG_VALUES = {
+    "O": "O", "Y": "O", "YES": "O", "유": "O", "있음": "O", "설치": "O",
+    "X": "X", "N": "X", "NO": "X", "무": "X", "없음": "X", "미설치": "X",
+}
+
+# 검사 항목: 이름 → (설명, 제외 여부)
+ISSUES = {
+    "숫자변환실패": ("숫자 컬럼에 숫자가 아닌 값", False),
+    "부식률결측": ("부식률 없음", True),
+    "부식률음수": ("부식률 < 0", True),
+    "사용연수오류": ("사용연수 0 이하 또는 없음", True),
+    "두께역전": ("측정두께 > 설계두께", True),
+    "부식률불일치": ("부식률 ≠ (설계두께-측정두께)/사용연수", False),
+    "하한적용": (f"0 ≤ 부식률 < {RATE_FLOOR} → {RATE_FLOOR}", False),
+    "이상치": (f"log(부식률) 로버스트 z > {OUTLIER_Z:g}", False),
+    "중복": ("앞 행과 모든 값이 같음", False),
+    "범주오류": ("키 없음 또는 O/X 로 읽을 수 없는 값", False),
+}
+
+
+# =========================
+# 범주 표기 정규화
+# =========================
+def clean_label(value, key):
+    """키 값 하나의 표기 정규화 (NFKC, 대시·공백 통일, O/X 표기) — 빈 값·결측은 None."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    text = unicodedata.normalize("NFKC", str(value)).strip()
+    text = re.sub(r"[‐-―−]", "-", text)          # 여러 종류의 대시 → '-'
+    if key == "재질":
+        return re.sub(r"\s+", " ", text).upper() or None
+    if key in FLAG_COLUMNS:
+        compact = re.sub(r"\s+", "", text).upper()
+        return _FLAG_VALUES.get(compact, compact) or None
+    return re.sub(r"\s+", "", text) or None       # 품명/탱크형상/지역: 띄어쓰기 차이 무시
+
+
+def normalize_labels(df):
+    """6개 키의 표기를 통일한다 → (DataFrame, {키: {원래값: 바뀐값}}). 고유값 단위로 처리."""
+    out = df.copy()
+    changes = {}
+    for k in KEYS:
+        if k not in out.columns:
+            continue
+        uniques = pd.unique(out[k])
+        mapping = {u: clean_label(u, k) for u in uniques}
+        changed = {str(u): v for u, v in mapping.items() if v != u and not pd.isna(u)}
+        if changed:
+            changes[k] = changed
+        codes = pd.Index(uniques).get_indexer(out[k])
+        out[k] = pd.array([mapping[u] for u in uniques], dtype="str")[codes]
+    return out, changes
+
+
+# =========================
+# 검증
+# =========================
+def _robust_z(rate):
+    """log(부식률) 의 (값 - 중위수) / (1.4826 × MAD). 0 이하 값은 NaN."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_rate = np.where(rate > 0, np.log(rate), np.nan)
+    ok = ~np.isnan(log_rate)
+    if not ok.any():
+        return np.full(len(rate), np.nan)
+    med = np.median(log_rate[ok])
+    mad = np.median(np.abs(log_rate[ok] - med)) * 1.4826
+    return np.abs(log_rate - med) / mad if mad > 0 else np.zeros(len(rate))
+
+
+def validate(df, drop_duplicates=False):
+    """원자료 한 묶음을 검증·정규화한다 → (정리된 DataFrame, 품질 보고서 dict, 항목별 행 표시 dict).
+
+    정리된 자료: 숫자 컬럼 float/int, 라벨 정규화, 제외 항목 행 삭제, 부식률 하한 적용.
+    보고서: 항목별 행 수와 예시 행 번호(원본 0부터), 라벨 변경 내역.
+    """
+    df, changes = normalize_labels(df)
+    n = len(df)
+    flags = {}
+
+    # ---- 형 변환 (한 번만) ----
+    failed = np.zeros(n, dtype=bool)
+    for c in NUMERIC_COLUMNS:
+        if c in df.columns:
+            raw = df[c]
+            df[c] = pd.to_numeric(raw, errors="coerce")
+            failed |= (df[c].isna() & raw.notna()).to_numpy()
+    flags["숫자변환실패"] = failed
+
+    rate = df["부식률"].to_numpy(dtype=float)
+    age = df["사용연수"].to_numpy(dtype=float)
+    design = df["설계두께"].to_numpy(dtype=float) if "설계두께" in df.columns else np.full(n, np.nan)
+    measured = df["측정두께"].to_numpy(dtype=float) if "측정두께" in df.columns else np.full(n, np.nan)
+
+    # ---- 값 검사 ----
+    flags["부식률결측"] = np.isnan(rate)
+    flags["부식률음수"] = rate < 0
+    flags["사용연수오류"] = ~(age > 0)
+    flags["두께역전"] = measured > design
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = (design - measured) / age
+    flags["부식률불일치"] = np.abs(rate - expected) > MISMATCH_TOL
+    flags["하한적용"] = (rate >= 0) & (rate < RATE_FLOOR)
+    flags["이상치"] = _robust_z(rate) > OUTLIER_Z
+    flags["중복"] = df.duplicated().to_numpy()
+
+    bad_label = np.zeros(n, dtype=bool)
+    for k in KEYS:
+        if k in df.columns:
+            bad_label |= df[k].isna().to_numpy()
+            if k in FLAG_COLUMNS:
+                bad_label |= ~df[k].isin(["O", "X"]).to_numpy()
+    flags["범주오류"] = bad_label
+
+    # ---- 제외 / 하한 ----
+    excluded = np.zeros(n, dtype=bool)
+    for name, (_, drop) in ISSUES.items():
+        if drop:
+            excluded |= flags[name]
+    if drop_duplicates:
+        excluded |= flags["중복"]
+
+    clean = df[~excluded].reset_index(drop=True)
+    clean["부식률"] = np.maximum(clean["부식률"].to_numpy(dtype=float), RATE_FLOOR)
+    if (clean["사용연수"] % 1 == 0).all():
+        clean["사용연수"] = clean["사용연수"].astype(np.int64)
+
+    report = {
+        "rows_in": n,
+        "rows_out": len(clean),
+        "excluded": int(excluded.sum()),
+        "drop_duplicates": drop_duplicates,
+        "issues": {
+            name: {
+                "description": desc,
+                "excluded": drop or (name == "중복" and drop_duplicates),
+                "count": int(flags[name].sum()),
+                "rows": np.flatnonzero(flags[name])[:SAMPLE_ROWS].tolist(),
+            }
+            for name, (desc, drop) in ISSUES.items()
+        },
+        "label_changes": changes,
+    }
+    return clean, report, flags
+
+
+def flagged_rows(df, flags):
+    """표시된 행만 모은 표 (원본 컬럼 + 항목 목록 컬럼)."""
+    names = np.array(list(ISSUES))
+    matrix = np.column_stack([flags[name] for name in names])
+    any_flag = matrix.any(axis=1)
+    out = df[any_flag].copy()
+    out.insert(0, "원본행", np.flatnonzero(any_flag))
+    out["검증항목"] = [", ".join(names[row]) for row in matrix[any_flag]]
+    return out
+
+
+def format_report(report):
+    lines = [f"입력 {report['rows_in']:,}행 → 정리 {report['rows_out']:,}행 (제외 {report['excluded']:,}행)"]
+    for name, item in report["issues"].items():
+        if item["count"]:
+            tag = "제외" if item["excluded"] else "표시"
+            lines.append(f"  [{tag}] {name:<8} {item['count']:>8,}행  — {item['description']}")
+    for k, mapping in report["label_changes"].items():
+        pairs = ", ".join(f"{a} → {b}" for a, b in list(mapping.items())[:5])
+        more = f" 외 {len(mapping) - 5}개" if len(mapping) > 5 else ""
+        lines.append(f"  라벨 통일 {k}: {pairs}{more}")
+    return "\n".join(lines)
+
+
+def write_report(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="부식률 자료 검증·정규화 품질 보고서")
+    parser.add_argument("file", help="점검자료 (Excel / CSV)")
+    parser.add_argument("--flagged", default=None, help="표시된 행을 저장할 CSV")
+    parser.add_argument("--json", default=None, help="품질 보고서 JSON 경로")
+    parser.add_argument("--drop-duplicates", action="store_true", help="중복 행도 제외")
+    args = parser.parse_args(argv)
+
+    from loader import DROP_COLUMNS, SHEET_NAME  # loader 가 이 모듈을 쓰므로 실행 시에만 가져온다
+    if args.file.lower().endswith(".csv"):
+        df = pd.read_csv(args.file, encoding="utf-8-sig")
+    else:
+        df = pd.read_excel(args.file, sheet_name=SHEET_NAME, engine="openpyxl")
+    df = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+    missing = [c for c in KEYS + ["사용연수", "부식률"] if c not in df.columns]
+    if missing:
+        print(f"오류: 필수 컬럼 누락: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    _, report, flags = validate(df, args.drop_duplicates)
+    print(format_report(report))
+    if args.json:
+        write_report(report, args.json)
+    if args.flagged:
+        flagged_rows(df, flags).to_csv(args.flagged, index=False, encoding="utf-8-sig")
+        print(f"→ {args.flagged}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())